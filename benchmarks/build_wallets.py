@@ -0,0 +1,148 @@
+"""Measures how long it takes to build wallets from the database.
+
+Inserts ``--wallets`` wallets that each received a transfer, sent a transfer and
+voted ``--votes`` times, and then times ``WalletManager.build``. Rows are added to
+a block at a height that real chains don't reach yet and are deleted afterwards.
+The benchmark needs a migrated database configured with the ``POSTGRES_DB_*``
+variables and overwrites wallets stored in the redis configured with the
+``REDIS_*`` variables.
+"""
+from hashlib import sha256
+from itertools import islice
+from time import perf_counter
+
+import click
+
+from chain.common.config import config
+from chain.common.plugins import load_plugin
+from chain.crypto.address import address_from_public_key
+from chain.crypto.constants import (
+    TRANSACTION_TYPE_DELEGATE_REGISTRATION,
+    TRANSACTION_TYPE_TRANSFER,
+    TRANSACTION_TYPE_VOTE,
+)
+from chain.plugins.database.migrate import migrate
+from chain.plugins.database.models.block import Block
+from chain.plugins.database.models.transaction import Transaction
+
+from .save_blocks import FIRST_HEIGHT, FIRST_TIMESTAMP
+
+NUM_DELEGATES = 51
+
+
+def _public_key(index):
+    return "02" + sha256(str(index).encode()).hexdigest()
+
+
+def _make_block():
+    return {
+        "id": "benchmark",
+        "version": 0,
+        "timestamp": FIRST_TIMESTAMP,
+        "previous_block": None,
+        "height": FIRST_HEIGHT,
+        "number_of_transactions": 0,
+        "total_amount": 0,
+        "total_fee": 0,
+        "reward": 200000000,
+        "payload_length": 0,
+        "payload_hash": "",
+        "generator_public_key": _public_key(0),
+        "block_signature": "",
+    }
+
+
+def _make_transactions(num_wallets, num_votes):
+    delegates = [_public_key(index) for index in range(NUM_DELEGATES)]
+    # Genesis wallets are allowed to have a negative balance
+    genesis_public_key = config.genesis_block["transactions"][0]["senderPublicKey"]
+    sequence = 0
+
+    def transaction(type, sender_public_key, **kwargs):
+        nonlocal sequence
+        sequence += 1
+        row = {
+            "id": "{:064x}".format(sequence),
+            "version": 1,
+            "block_id": "benchmark",
+            "sequence": sequence % 32000,
+            "timestamp": FIRST_TIMESTAMP + sequence,
+            "sender_public_key": sender_public_key,
+            "recipient_id": None,
+            "type": type,
+            "vendor_field": None,
+            "amount": 0,
+            "fee": 10000000,
+            "serialized": b"",
+            "asset": None,
+        }
+        row.update(kwargs)
+        return row
+
+    for index, public_key in enumerate(delegates):
+        yield transaction(
+            TRANSACTION_TYPE_DELEGATE_REGISTRATION,
+            public_key,
+            fee=0,
+            asset={"delegate": {"username": "benchmark{}".format(index)}},
+        )
+    for index in range(num_wallets):
+        public_key = _public_key(NUM_DELEGATES + index)
+        yield transaction(
+            TRANSACTION_TYPE_TRANSFER,
+            genesis_public_key,
+            recipient_id=address_from_public_key(public_key),
+            amount=1000000000,
+        )
+        yield transaction(
+            TRANSACTION_TYPE_TRANSFER,
+            public_key,
+            recipient_id=address_from_public_key(delegates[1]),
+            amount=1000,
+        )
+        for vote in range(num_votes):
+            yield transaction(
+                TRANSACTION_TYPE_VOTE,
+                public_key,
+                asset={"votes": ["+" + delegates[(index + vote) % NUM_DELEGATES]]},
+            )
+
+
+def _delete():
+    Transaction.delete().where(Transaction.block_id == "benchmark").execute()
+    Block.delete().where(Block.id == "benchmark").execute()
+
+
+@click.command()
+@click.option("--wallets", default=20000, help="Number of wallets")
+@click.option("--votes", default=3, help="Number of votes of every wallet")
+def build_wallets(wallets, votes):
+    database = load_plugin("chain.plugins.database")
+    migrate()
+    _delete()
+    with database.db.atomic():
+        Block.insert(_make_block()).execute()
+        rows = 0
+        transactions = _make_transactions(wallets, votes)
+        while True:
+            batch = list(islice(transactions, 1000))
+            if not batch:
+                break
+            Transaction.insert_many(batch).execute()
+            rows += len(batch)
+
+    try:
+        start = perf_counter()
+        database.wallets.build()
+        timing = perf_counter() - start
+    finally:
+        _delete()
+    click.echo(
+        "{} transactions, {} wallets built in {:.2f}s".format(
+            rows, len(database.wallets._wallets), timing
+        )
+    )
+
+
+if __name__ == "__main__":
+    build_wallets()
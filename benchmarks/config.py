@@ -0,0 +1,62 @@
+"""Measures the config lookups done while processing a single block.
+
+A block goes through milestone lookups for its id, header bytes, verification, slots
+and rounds, one block exception check and exception checks for the bytes and id of
+every transaction. The benchmark repeats the same lookups for a block at the first
+and at the last milestone height, as finding a milestone used to depend on its
+position.
+"""
+from types import SimpleNamespace
+
+import click
+
+from chain.common.config import config
+from chain.crypto import slots
+from chain.crypto.utils import (
+    calculate_round,
+    is_block_exception,
+    is_new_round,
+    is_transaction_exception,
+)
+
+from .utils import best_of
+
+
+def _process_block(block, transaction_ids):
+    height = block.height
+    for _ in range(6):
+        config.get_milestone(height)
+    for _ in range(2):
+        config.get_milestone(height - 1)
+    slots.get_slot_number(height, block.timestamp)
+    slots.is_forging_allowed(height, block.timestamp)
+    calculate_round(height)
+    is_new_round(height)
+    is_block_exception(block)
+    for transaction_id in transaction_ids:
+        is_transaction_exception(transaction_id)
+        is_transaction_exception(transaction_id)
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs")
+@click.option("--number", default=1000, help="Number of blocks per timed run")
+@click.option("--transactions", default=150, help="Number of transactions per block")
+def config_overhead(repeat, number, transactions):
+    transaction_ids = ["{:064x}".format(index) for index in range(transactions)]
+
+    click.echo("{:>10} {:>14}".format("height", "us/block"))
+    for height in [2, config.milestones[-1]["height"] + 1]:
+        block = SimpleNamespace(
+            id="1234567890123456789", height=height, timestamp=height * 8
+        )
+        timing = best_of(
+            lambda: _process_block(block, transaction_ids),
+            repeat=repeat,
+            number=number,
+        )
+        click.echo("{:>10} {:>14.2f}".format(height, timing * 1e6))
+
+
+if __name__ == "__main__":
+    config_overhead()
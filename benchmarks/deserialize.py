@@ -0,0 +1,102 @@
+"""Measures block decoding time versus the number of transactions in a block.
+
+Two timings are reported per block size:
+
+- ``decode``: full ``Block.from_bytes`` including transaction objects
+- ``split``: walking the transaction payload of a block and splitting it into
+  transactions, once with ``ByteBuffer`` and once with the previous pop-and-delete
+  ``bytearray`` buffer
+
+With a linear decoder the time per transaction stays flat as blocks get bigger.
+Note that CPython deletes from the front of a ``bytearray`` in amortized constant
+time, so the old buffer does not go quadratic there either; the cursor mostly
+saves the copies of the payload handed to each transaction.
+"""
+import struct
+
+import click
+
+from chain.crypto.bytebuffer import ByteBuffer
+from chain.crypto.objects.block import Block
+
+from .utils import best_of, make_block, make_transfers
+
+_UINT32 = struct.Struct("<I")
+
+
+def _split_with_cursor(data, num_transactions, offset):
+    buff = ByteBuffer(data)
+    buff.pop_bytes(offset)
+    lengths = [buff.pop_uint32() for _ in range(num_transactions)]
+    return [buff.pop_buffer(length) for length in lengths]
+
+
+class _PopAndDeleteBuffer(bytearray):
+    """The previous ByteBuffer implementation, kept here as a reference"""
+
+    def pop_uint32(self):
+        data = _UINT32.unpack_from(self)[0]
+        del self[:4]
+        return data
+
+    def pop_bytes(self, num_bytes):
+        data = self[:num_bytes]
+        del self[:num_bytes]
+        return bytes(data)
+
+
+def _split_with_pop_and_delete(data, num_transactions, offset):
+    buff = _PopAndDeleteBuffer(data)
+    buff.pop_bytes(offset)
+    lengths = [buff.pop_uint32() for _ in range(num_transactions)]
+    return [_PopAndDeleteBuffer(buff.pop_bytes(length)) for length in lengths]
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs per block size")
+@click.option(
+    "--sizes",
+    default="0,50,150,500,1000",
+    help="Comma separated numbers of transactions per block",
+)
+def deserialize(repeat, sizes):
+    sizes = [int(size) for size in sizes.split(",")]
+    transactions = make_transfers(max(sizes))
+
+    click.echo(
+        "{:>12} {:>10} {:>12} {:>12} {:>16} {:>16}".format(
+            "transactions",
+            "bytes",
+            "decode ms",
+            "decode us/tx",
+            "split cursor us",
+            "split del us",
+        )
+    )
+    for size in sizes:
+        block = make_block(transactions[:size])
+        data = block.to_bytes_full()
+        header_length = len(block.to_bytes())
+
+        decode = best_of(lambda: Block.from_bytes(data), repeat=repeat)
+        split_cursor = best_of(
+            lambda: _split_with_cursor(data, size, header_length), repeat=repeat
+        )
+        split_del = best_of(
+            lambda: _split_with_pop_and_delete(data, size, header_length),
+            repeat=repeat,
+        )
+        click.echo(
+            "{:>12} {:>10} {:>12.3f} {:>12.1f} {:>16.1f} {:>16.1f}".format(
+                size,
+                len(data),
+                decode * 1e3,
+                decode / size * 1e6 if size else 0,
+                split_cursor * 1e6,
+                split_del * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    deserialize()
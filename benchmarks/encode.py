@@ -0,0 +1,58 @@
+"""Measures block encoding time versus the number of transactions in a block.
+
+Two timings are reported per block size:
+
+- ``encode``: ``Block.to_bytes_full`` with every transaction encoded from its fields
+- ``get_bytes``: legacy ``get_bytes`` of every transaction, which is what ids and
+  signatures are calculated from
+
+Cached bytes are cleared before every run, so the encoders do the full work.
+"""
+import click
+
+from .utils import best_of, make_block, make_transfers
+
+
+def _encode_block(block):
+    block.invalidate_cache()
+    for transaction in block.transactions:
+        transaction.invalidate_cache()
+    return block.to_bytes_full()
+
+
+def _get_bytes(transactions):
+    for transaction in transactions:
+        transaction.invalidate_cache()
+        transaction.get_bytes()
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs per block size")
+@click.option(
+    "--sizes",
+    default="50,150,500",
+    help="Comma separated numbers of transactions per block",
+)
+def encode(repeat, sizes):
+    sizes = [int(size) for size in sizes.split(",")]
+    transactions = make_transfers(max(sizes))
+
+    click.echo(
+        "{:>12} {:>12} {:>14} {:>16}".format(
+            "transactions", "encode ms", "encode us/tx", "get_bytes us/tx"
+        )
+    )
+    for size in sizes:
+        block = make_block(transactions[:size])
+
+        encode = best_of(lambda: _encode_block(block), repeat=repeat)
+        get_bytes = best_of(lambda: _get_bytes(block.transactions), repeat=repeat)
+        click.echo(
+            "{:>12} {:>12.3f} {:>14.1f} {:>16.1f}".format(
+                size, encode * 1e3, encode / size * 1e6, get_bytes / size * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    encode()
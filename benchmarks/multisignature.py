@@ -0,0 +1,69 @@
+"""Measures verification of multi signature registrations.
+
+Verifies a registration with ``--keys`` keys that all have to sign it. Signatures
+are either in the order of the keysgroup or in reverse order, which is the worst
+case for matching signatures to keys.
+
+- ``cold``: parsed keysgroup and transaction bytes are not cached yet
+- ``warm``: repeated verification of the same transaction object
+"""
+import click
+
+from chain.common.config import config
+from chain.crypto.constants import TRANSACTION_TYPE_MULTI_SIGNATURE
+from chain.crypto.objects.transactions import MultiSignatureTransaction
+
+from .utils import best_of, private_key_from_passphrase, public_key_hex, sign
+
+
+def make_multi_signature_registration(num_keys):
+    sender = private_key_from_passphrase("benchmark sender")
+    keys = [
+        private_key_from_passphrase("benchmark key {}".format(index))
+        for index in range(num_keys)
+    ]
+    transaction = MultiSignatureTransaction(
+        version=1,
+        network=config.network["pubKeyHash"],
+        type=TRANSACTION_TYPE_MULTI_SIGNATURE,
+        timestamp=1,
+        sender_public_key=public_key_hex(sender),
+        fee=500000000 * (num_keys + 1),
+        amount=0,
+        asset={
+            "multisignature": {
+                "min": num_keys,
+                "lifetime": 24,
+                "keysgroup": ["+{}".format(public_key_hex(key)) for key in keys],
+            }
+        },
+    )
+    message = transaction.get_bytes(skip_signature=True, skip_second_signature=True)
+    transaction.signatures = [sign(key, message) for key in keys]
+    transaction.signature = sign(sender, transaction.get_bytes(skip_signature=True))
+    return transaction
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs")
+@click.option("--number", default=20, help="Number of verifications per timed run")
+@click.option("--keys", default=15, help="Number of keys in the keysgroup")
+def multisignature(repeat, number, keys):
+    click.echo("{:>10} {:>10} {:>10}".format("order", "cold ms", "warm ms"))
+    for order in ["keysgroup", "reversed"]:
+        transaction = make_multi_signature_registration(keys)
+        if order == "reversed":
+            transaction.signatures = list(reversed(transaction.signatures))
+        assert transaction._verify_signatures()
+
+        def verify_cold():
+            transaction.invalidate_cache()
+            transaction._verify_signatures()
+
+        cold = best_of(verify_cold, repeat=repeat, number=number)
+        warm = best_of(transaction._verify_signatures, repeat=repeat, number=number)
+        click.echo("{:>10} {:>10.3f} {:>10.3f}".format(order, cold * 1e3, warm * 1e3))
+
+
+if __name__ == "__main__":
+    multisignature()
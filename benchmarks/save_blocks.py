@@ -0,0 +1,110 @@
+"""Measures how fast blocks and their transactions are written to the database.
+
+- ``per row``: a block and then every transaction saved with its own INSERT, as
+  ``Database.save_block`` used to do
+- ``save_block``: ``Database.save_block`` for each block
+- ``save_blocks``: ``Database.save_blocks`` for all blocks at once
+
+Blocks are decoded from bytes, like blocks received from peers. The benchmark needs
+a migrated database configured with the ``POSTGRES_DB_*`` variables. Blocks are
+created at heights and timestamps that real chains don't reach yet and are deleted
+after every timed run.
+"""
+from time import perf_counter
+
+import click
+
+from chain.common.plugins import load_plugin
+from chain.crypto.address import address_from_public_key
+from chain.crypto.objects.block import Block as CryptoBlock
+from chain.plugins.database.migrate import migrate
+from chain.plugins.database.models.block import Block
+from chain.plugins.database.models.transaction import Transaction
+
+from .utils import (
+    make_block,
+    make_transfer,
+    private_key_from_passphrase,
+    public_key_hex,
+)
+
+FIRST_HEIGHT = 2000000000
+FIRST_TIMESTAMP = 2000000000
+
+
+def _make_blocks(num_blocks, num_transactions):
+    sender = private_key_from_passphrase("benchmark sender")
+    recipient_id = address_from_public_key(
+        public_key_hex(private_key_from_passphrase("benchmark recipient"))
+    )
+    blocks = []
+    previous_block = None
+    timestamp = FIRST_TIMESTAMP
+    for height in range(FIRST_HEIGHT, FIRST_HEIGHT + num_blocks):
+        transactions = []
+        for _ in range(num_transactions):
+            timestamp += 1
+            transactions.append(
+                make_transfer(sender, recipient_id, timestamp=timestamp)
+            )
+        block = make_block(
+            transactions,
+            height=height,
+            previous_block=previous_block.id if previous_block else None,
+        )
+        previous_block = CryptoBlock.from_bytes(block.to_bytes_full())
+        blocks.append(previous_block)
+    return blocks
+
+
+def _save_per_row(database, blocks):
+    for block in blocks:
+        with database.db.atomic():
+            Block.from_crypto(block).save(force_insert=True)
+        with database.db.atomic():
+            for transaction in block.transactions:
+                Transaction.from_crypto(transaction).save(force_insert=True)
+
+
+def _delete(blocks):
+    block_ids = [block.id for block in blocks]
+    Transaction.delete().where(Transaction.block_id.in_(block_ids)).execute()
+    Block.delete().where(Block.id.in_(block_ids)).execute()
+
+
+@click.command()
+@click.option("--repeat", default=3, help="Number of timed runs")
+@click.option("--blocks", default=20, help="Number of blocks saved per run")
+@click.option("--transactions", default=150, help="Number of transactions per block")
+def save_blocks(repeat, blocks, transactions):
+    database = load_plugin("chain.plugins.database")
+    migrate()
+    crypto_blocks = _make_blocks(blocks, transactions)
+    num_rows = blocks * (transactions + 1)
+
+    paths = [
+        ("per row", lambda: _save_per_row(database, crypto_blocks)),
+        (
+            "save_block",
+            lambda: [database.save_block(block) for block in crypto_blocks],
+        ),
+        ("save_blocks", lambda: database.save_blocks(crypto_blocks)),
+    ]
+    click.echo("{:>12} {:>10} {:>12}".format("path", "ms", "rows/sec"))
+    for name, save in paths:
+        timings = []
+        for _ in range(repeat):
+            _delete(crypto_blocks)
+            start = perf_counter()
+            save()
+            timings.append(perf_counter() - start)
+            assert Block.select().where(Block.height >= FIRST_HEIGHT).count() == blocks
+        _delete(crypto_blocks)
+        timing = min(timings)
+        click.echo(
+            "{:>12} {:>10.1f} {:>12.0f}".format(name, timing * 1e3, num_rows / timing)
+        )
+
+
+if __name__ == "__main__":
+    save_blocks()
@@ -0,0 +1,110 @@
+"""Helpers for building signed transactions and blocks used by the benchmarks.
+
+Benchmarks need the chain config, so run them with ``CHAIN_CONFIG_FOLDER`` set, for
+example ``make bench`` or
+``CHAIN_CONFIG_FOLDER=ark/devnet python -m benchmarks.deserialize``.
+"""
+import time
+from binascii import hexlify, unhexlify
+from hashlib import sha256
+
+from coincurve import PrivateKey
+
+from chain.common.config import config
+from chain.crypto.address import address_from_public_key
+from chain.crypto.constants import TRANSACTION_TYPE_TRANSFER
+from chain.crypto.objects.block import Block
+from chain.crypto.objects.transactions import TransferTransaction
+
+
+def private_key_from_passphrase(passphrase):
+    return PrivateKey(sha256(passphrase.encode("utf-8")).digest())
+
+
+def public_key_hex(private_key):
+    return private_key.public_key.format(compressed=True).hex()
+
+
+def sign(private_key, message):
+    return hexlify(private_key.sign(message)).decode("utf-8")
+
+
+def make_transfer(private_key, recipient_id, amount=1, fee=10000000, timestamp=1):
+    transaction = TransferTransaction(
+        version=1,
+        network=config.network["pubKeyHash"],
+        type=TRANSACTION_TYPE_TRANSFER,
+        timestamp=timestamp,
+        sender_public_key=public_key_hex(private_key),
+        fee=fee,
+        amount=amount,
+        expiration=0,
+        recipient_id=recipient_id,
+        vendor_field="benchmark",
+    )
+    transaction.signature = sign(
+        private_key, transaction.get_bytes(skip_signature=True)
+    )
+    transaction.id = transaction.get_id()
+    return transaction
+
+
+def make_transfers(num_transactions):
+    sender = private_key_from_passphrase("benchmark sender")
+    recipient_id = address_from_public_key(
+        public_key_hex(private_key_from_passphrase("benchmark recipient"))
+    )
+    return [
+        make_transfer(sender, recipient_id, amount=index + 1, timestamp=index + 1)
+        for index in range(num_transactions)
+    ]
+
+
+def make_block(transactions, height=None, previous_block=None):
+    """Creates a signed block containing given transactions. Unless the id of
+    `previous_block` is given, the block is chained to a made up previous block. The
+    block is not valid on any real network.
+    """
+    if height is None:
+        height = config.milestones[-1]["height"] + 1
+    generator = private_key_from_passphrase("benchmark delegate")
+
+    if previous_block is None:
+        if config.is_id_full_sha256(height - 1):
+            previous_block = sha256(b"previous block").hexdigest()
+        else:
+            previous_block = "1234567890123456789"
+
+    payload = bytes()
+    for transaction in transactions:
+        payload += unhexlify(transaction.id)
+
+    block = Block(
+        version=0,
+        timestamp=transactions[-1].timestamp if transactions else 1,
+        height=height,
+        previous_block=previous_block,
+        number_of_transactions=len(transactions),
+        total_amount=sum(transaction.amount for transaction in transactions),
+        total_fee=sum(transaction.fee for transaction in transactions),
+        reward=config.get_reward(height),
+        payload_length=len(payload),
+        payload_hash=sha256(payload).hexdigest(),
+        generator_public_key=public_key_hex(generator),
+    )
+    block.block_signature = sign(generator, block.to_bytes(include_signature=False))
+    block.transactions = transactions
+    return block
+
+
+def best_of(func, repeat=5, number=1):
+    """Returns the best time in seconds of `repeat` runs of calling `func` `number`
+    times.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
@@ -0,0 +1,95 @@
+"""Measures block verification time with transaction objects versus the columnar
+``TransactionBatch``.
+
+- ``eager``: ``Block.from_bytes`` followed by ``Block.verify``
+- ``lazy``: ``Block.from_bytes(lazy=True)`` followed by ``Block.verify``, which
+  checks ids, totals and signatures of transfers on the batch columns
+- ``batch``: lazy blocks of a sync batch of ``--blocks`` blocks verified together
+  with ``SignatureVerifier.verify_blocks`` on the chosen ``--executor``, reported
+  per block. With ``--cached`` the verifier uses the shared ``SignatureCache``, so
+  all timed runs after the first one measure blocks of already verified
+  transactions, eg. transactions admitted to the pool.
+
+Both include decoding, as that is what the blockchain process does for every block
+it pops from the process queue.
+"""
+import click
+
+from chain.crypto.objects.block import Block
+from chain.crypto.signature_cache import SignatureCache
+from chain.crypto.verifier import (
+    EXECUTOR_PROCESS,
+    EXECUTOR_SERIAL,
+    EXECUTOR_THREAD,
+    SignatureVerifier,
+)
+
+from .utils import best_of, make_block, make_transfers
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs per block size")
+@click.option(
+    "--sizes",
+    default="50,150,500",
+    help="Comma separated numbers of transactions per block",
+)
+@click.option(
+    "--executor",
+    default=EXECUTOR_THREAD,
+    type=click.Choice([EXECUTOR_SERIAL, EXECUTOR_THREAD, EXECUTOR_PROCESS]),
+    help="Executor used for verifying sync batches",
+)
+@click.option("--workers", default=None, type=int, help="Number of workers")
+@click.option("--blocks", default=10, help="Number of blocks in a sync batch")
+@click.option("--cached", is_flag=True, help="Cache verified signatures in redis")
+def verify(repeat, sizes, executor, workers, blocks, cached):
+    sizes = [int(size) for size in sizes.split(",")]
+    transactions = make_transfers(max(sizes))
+    cache = SignatureCache() if cached else None
+    verifier = SignatureVerifier(executor=executor, workers=workers, cache=cache)
+
+    click.echo("{} executor with {} workers".format(executor, verifier.workers))
+    click.echo(
+        "{:>12} {:>12} {:>12} {:>12} {:>14} {:>14} {:>14}".format(
+            "transactions",
+            "eager ms",
+            "lazy ms",
+            "batch ms",
+            "eager us/tx",
+            "lazy us/tx",
+            "batch us/tx",
+        )
+    )
+    for size in sizes:
+        data = make_block(transactions[:size]).to_bytes_full()
+
+        eager = best_of(lambda: Block.from_bytes(data).verify(), repeat=repeat)
+        lazy = best_of(
+            lambda: Block.from_bytes(data, lazy=True).verify(), repeat=repeat
+        )
+        batch = (
+            best_of(
+                lambda: verifier.verify_blocks(
+                    [Block.from_bytes(data, lazy=True) for _ in range(blocks)]
+                ),
+                repeat=repeat,
+            )
+            / blocks
+        )
+        click.echo(
+            "{:>12} {:>12.3f} {:>12.3f} {:>12.3f} {:>14.1f} {:>14.1f} {:>14.1f}".format(
+                size,
+                eager * 1e3,
+                lazy * 1e3,
+                batch * 1e3,
+                eager / size * 1e6,
+                lazy / size * 1e6,
+                batch / size * 1e6,
+            )
+        )
+    verifier.shutdown()
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,122 @@
+"""Compares wallets serialized with ``Wallet.to_json`` and ``Wallet.to_bytes``.
+
+Creates ``--wallets`` wallets shaped like the wallets of mainnet: every wallet has
+an address and a balance, most of them a public key and many vote for one of
+``--delegates`` delegates. For both formats it reports the average size of a
+serialized wallet, the memory redis uses for a hash of all wallets (``MEMORY
+USAGE``) and the time it takes to encode and decode a wallet.
+
+The benchmark writes temporary hashes to the redis configured with the
+``REDIS_*`` variables and deletes them afterwards.
+"""
+import json
+import os
+import random
+from binascii import hexlify
+from time import perf_counter
+
+import click
+from peewee import chunked
+from redis import Redis
+
+from chain.crypto.address import address_from_public_key
+from chain.crypto.models.wallet import Wallet
+
+_KEY = "benchmark:wallets:{}"
+_ARKTOSHI = 100000000
+
+
+def _random_public_key(rand):
+    return "02" + hexlify(bytes(rand.getrandbits(8) for _ in range(32))).decode()
+
+
+def make_wallets(num_wallets, num_delegates, seed=0):
+    rand = random.Random(seed)
+    delegate_keys = [_random_public_key(rand) for _ in range(num_delegates)]
+    wallets = []
+    for index in range(num_wallets):
+        if index < num_delegates:
+            public_key = delegate_keys[index]
+        elif rand.random() < 0.7:
+            public_key = _random_public_key(rand)
+        else:
+            public_key = None
+        wallet = Wallet(
+            {
+                "address": address_from_public_key(
+                    public_key or _random_public_key(rand)
+                ),
+                "public_key": public_key,
+                "balance": rand.randrange(100000 * _ARKTOSHI),
+            }
+        )
+        if public_key and rand.random() < 0.05:
+            wallet.second_public_key = _random_public_key(rand)
+        if public_key and rand.random() < 0.4:
+            wallet.vote = rand.choice(delegate_keys)
+        if index < num_delegates:
+            wallet.username = "delegate_{}".format(index)
+            wallet.vote_balance = rand.randrange(10000000 * _ARKTOSHI)
+            wallet.produced_blocks = rand.randrange(100000)
+            wallet.missed_blocks = rand.randrange(1000)
+            wallet.forged_fees = rand.randrange(10000 * _ARKTOSHI)
+            wallet.forged_rewards = wallet.produced_blocks * 2 * _ARKTOSHI
+        wallets.append(wallet)
+    return wallets
+
+
+def _measure(redis, wallets, name, encode, decode):
+    start = perf_counter()
+    values = [encode(wallet) for wallet in wallets]
+    encode_time = perf_counter() - start
+    start = perf_counter()
+    for value in values:
+        decode(value)
+    decode_time = perf_counter() - start
+
+    key = _KEY.format(name)
+    redis.unlink(key)
+    for batch in chunked(zip(wallets, values), 1000):
+        redis.hmset(key, {wallet.address: value for wallet, value in batch})
+    memory = redis.memory_usage(key, samples=0)
+    redis.unlink(key)
+    return (
+        sum(len(value) for value in values) / len(values),
+        memory,
+        encode_time / len(wallets),
+        decode_time / len(wallets),
+    )
+
+
+@click.command()
+@click.option("--wallets", default=200000, help="Number of wallets")
+@click.option("--delegates", default=201, help="Number of delegates")
+def wallet_codec(wallets, delegates):
+    redis = Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=os.environ.get("REDIS_PORT", 6379),
+        db=os.environ.get("REDIS_DB", 0),
+    )
+    wallet_set = make_wallets(wallets, delegates)
+    formats = [
+        ("json", Wallet.to_json, lambda data: Wallet(json.loads(data))),
+        ("binary", Wallet.to_bytes, Wallet.from_bytes),
+    ]
+    click.echo(
+        "{:>8} {:>12} {:>12} {:>12} {:>12}".format(
+            "format", "bytes", "redis MB", "encode us", "decode us"
+        )
+    )
+    for name, encode, decode in formats:
+        size, memory, encode_time, decode_time = _measure(
+            redis, wallet_set, name, encode, decode
+        )
+        click.echo(
+            "{:>8} {:>12.1f} {:>12.1f} {:>12.2f} {:>12.2f}".format(
+                name, size, memory / (1024 * 1024), encode_time * 1e6, decode_time * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    wallet_codec()
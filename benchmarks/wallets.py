@@ -0,0 +1,59 @@
+"""Measures reading and saving wallets with the blockchain ``WalletManager``.
+
+Each operation finds a wallet by address, changes its balance and saves it.
+
+- ``redis``: wallets are read from and written to redis, as in the p2p process
+- ``memory``: wallets are kept in memory of the manager, as they are once wallets
+  are built, and written to redis with a single flush after every ``--flush``
+  operations, like after every block
+
+The benchmark writes ``--wallets`` wallets to the redis configured with the
+``REDIS_*`` variables.
+"""
+import click
+
+from chain.crypto.models.wallet import Wallet
+from chain.plugins.database.wallet_manager import WalletManager
+
+from .utils import best_of
+
+
+def _update_wallets(manager, addresses, flush):
+    for index, address in enumerate(addresses, 1):
+        wallet = manager.find_by_address(address)
+        wallet.balance += 1
+        manager.save_wallet(wallet)
+        if index % flush == 0:
+            manager.flush()
+    manager.flush()
+
+
+@click.command()
+@click.option("--repeat", default=5, help="Number of timed runs")
+@click.option("--wallets", default=5000, help="Number of wallets updated per run")
+@click.option("--flush", default=500, help="Number of updates between flushes")
+def wallets(repeat, wallets, flush):
+    addresses = ["benchmark{}".format(index) for index in range(wallets)]
+    manager = WalletManager()
+    for address in addresses:
+        manager.save_wallet(Wallet({"address": address}))
+
+    click.echo("{:>10} {:>10} {:>12}".format("store", "ms", "updates/sec"))
+    for store in ["redis", "memory"]:
+        if store == "memory":
+            manager._is_built = True
+            for address in addresses:
+                manager.save_wallet(manager.find_by_address(address))
+            manager.flush()
+        timing = best_of(
+            lambda: _update_wallets(manager, addresses, flush), repeat=repeat
+        )
+        click.echo(
+            "{:>10} {:>10.1f} {:>12.0f}".format(store, timing * 1e3, wallets / timing)
+        )
+
+    manager.redis.hdel(manager._wallets_key, *addresses)
+
+
+if __name__ == "__main__":
+    wallets()
@@ -1,6 +1,8 @@
 import logging
 import math
+from contextlib import nullcontext
 from datetime import datetime
+from functools import partial
 from random import randint
 from time import sleep
 
@@ -9,7 +11,12 @@ from chain.blockchain.constants import (
     BLOCK_DISCARDED_BUT_CAN_BE_BROADCASTED,
     BLOCK_REJECTED,
 )
-from chain.blockchain.utils import is_block_chained
+from chain.blockchain.sync import SyncPipeline
+from chain.blockchain.utils import (
+    is_block_chained,
+    is_checkpointed,
+    verify_checkpointed_blocks,
+)
 from chain.common.config import config
 from chain.common.exceptions import PeerNotFoundException
 from chain.common.plugins import load_plugin
@@ -68,9 +75,8 @@ class Blockchain(object):
                     break
                 else:
                     logger.error("Database is corrupted: {}".format(errors))
-                    milestone = config.get_milestone(block.height)
                     previous_round = math.floor(
-                        (block.height - 1) / milestone["activeDelegates"]
+                        (block.height - 1) / config.get_active_delegates(block.height)
                     )
                     if previous_round <= 1:
                         raise Exception(
@@ -110,8 +116,8 @@ class Blockchain(object):
                 )
                 self.database.delete_round(current_round)
 
-            # Rebuild wallets
-            self.database.wallets.build()
+            # Load wallets from the latest snapshot or rebuild them
+            self.database.load_wallets(self.database.get_last_block())
             self.transaction_pool.build_wallets()
 
             if apply_genesis_round:
@@ -150,32 +156,7 @@ class Blockchain(object):
                 blocks[0]
             )
             if is_chained:
-                logger.info(
-                    (
-                        "Downloaded %s new blocks accounting for a total of %s "
-                        "transactions"
-                    ),
-                    len(blocks),
-                    sum([x.number_of_transactions for x in blocks]),
-                )
-
-                for block in blocks:
-                    status = self.process_block(block, last_block)
-                    logger.info("Block %s was %s", block.id, status)
-                    if status == BLOCK_ACCEPTED:
-                        last_block = block
-                    else:
-
-                        raise Exception("Block not accepted")
-
-                        # TODO: Think about banning the peer at this point as it's most
-                        # likely that it's a bad peer
-                        logger.info(block.serialize())
-                        logger.info(
-                            "Block %s was %s. Skipping all other blocks in this batch",
-                            block.id,
-                            status,
-                        )
+                self._sync_batch(blocks, last_block)
             else:
                 # TODO: Think about banning the peer at this point as it's most
                 # likely that it's a bad peer
@@ -186,6 +167,67 @@ class Blockchain(object):
         else:
             logger.info("No new block found on this peer")
 
+    def _group_commit(self):
+        """Returns the context in which synced blocks are applied
+        """
+        if config.sync["group_commit"]:
+            return self.database.group_commit()
+        return nullcontext()
+
+    def _sync_batch(self, blocks, last_block):
+        logger.info(
+            "Downloaded %s new blocks accounting for a total of %s transactions",
+            len(blocks),
+            sum([x.number_of_transactions for x in blocks]),
+        )
+
+        verifications = [None] * len(blocks)
+        if config.sync["fast"]:
+            # Blocks are sorted by height, so checkpointed blocks come first
+            num_checkpointed = sum(1 for block in blocks if is_checkpointed(block))
+            verifications[:num_checkpointed] = verify_checkpointed_blocks(
+                blocks[:num_checkpointed]
+            )
+
+        with self._group_commit():
+            for block, verification in zip(blocks, verifications):
+                status = self.process_block(
+                    block, last_block, verification=verification
+                )
+                logger.info("Block %s was %s", block.id, status)
+                if status == BLOCK_ACCEPTED:
+                    last_block = block
+                else:
+                    # TODO: Think about banning the peer at this point as it's most
+                    # likely that it's a bad peer
+                    logger.info(
+                        "Block %s was %s. Skipping all other blocks in this batch",
+                        block.id,
+                        status,
+                    )
+                    raise Exception("Block not accepted")
+
+    def sync_blocks_pipelined(self, last_block):
+        """Fetches and processes blocks after the last_block.height from random peers
+        until they run out of blocks, see `SyncPipeline`
+
+        :param Block last_block: Last crypto Block object that is in the database
+        """
+        logger.info("###############################")
+        logger.info("Syncing blocks from height %s", last_block.height)
+        pipeline = SyncPipeline(
+            self.peers,
+            last_block,
+            queue_size=config.sync["queue_size"],
+            fast=config.sync["fast"],
+            group_commit=self._group_commit,
+        )
+        pipeline.run(
+            lambda block, previous_block, verification: self.process_block(
+                block, previous_block, verification=verification
+            )
+        )
+
     def sync_chain(self):
         """Syncs the chain up to the latest height by fetching the blocks from random
         peers.
@@ -196,7 +238,10 @@ class Blockchain(object):
             last_block = self.database.get_last_block()
             if not self.is_synced(last_block):
                 try:
-                    self.sync_blocks_from_random_peer(last_block)
+                    if config.sync["pipelined"]:
+                        self.sync_blocks_pipelined(last_block)
+                    else:
+                        self.sync_blocks_from_random_peer(last_block)
                 except PeerNotFoundException as e:
                     logger.error(str(e))
                     logger.info(
@@ -260,7 +305,7 @@ class Blockchain(object):
         :param Block last_block: last block that is in the database
         """
         current_time = time.get_time()
-        blocktime = config.get_milestone(last_block.height)["blocktime"]
+        blocktime = config.get_blocktime(last_block.height)
         return (current_time - last_block.timestamp) < (3 * blocktime)
 
     def _handle_exception_block(self, block):
@@ -280,7 +325,10 @@ class Blockchain(object):
         logger.info("====== Handle apply block ======")
         self.database.apply_block(block)
 
-        self.transaction_pool.accept_chained_block(block)
+        # Pool changes can't be rolled back, so they wait for the block to commit
+        self.database.on_commit(
+            partial(self.transaction_pool.accept_chained_block, block)
+        )
 
         return BLOCK_ACCEPTED
 
@@ -390,7 +438,7 @@ class Blockchain(object):
 
     def _block_contains_forged_transactions(self, block):
         if len(block.transactions) > 0:
-            transaction_ids = [transaction.id for transaction in block.transactions]
+            transaction_ids = block.get_transaction_ids()
             forged_ids = self.database.get_forged_transaction_ids(transaction_ids)
             if len(forged_ids) > 0:
                 logger.info(
@@ -404,7 +452,12 @@ class Blockchain(object):
                 return True
         return False
 
-    def process_block(self, block, last_block):
+    def process_block(self, block, last_block, verification=None):
+        """Processes a block following the last_block
+
+        :param (tuple) verification: result of `block.verify`, if the block was
+            already verified
+        """
         logger.info("***************************")
         logger.info("Started processing block %s", block.id)
         logger.info("Last block height: %s", last_block.height)
@@ -412,7 +465,7 @@ class Blockchain(object):
         if is_block_exception(block):
             return self._handle_exception_block(block)
 
-        is_verified, errors = block.verify()
+        is_verified, errors = verification or block.verify()
         if not is_verified:
             logger.error(errors)
             return self._hande_verification_failed(block)
@@ -437,14 +490,17 @@ class Blockchain(object):
             serialized_block = self.process_queue.pop_block()
             if serialized_block:
                 last_block = self.database.get_last_block()
-                block = Block.from_serialized(serialized_block)
+                # Blocks in the queue were already decoded and validated by the p2p
+                # process. Transactions are decoded lazily as most of the checks
+                # only need their ids and totals.
+                block = Block.from_bytes(serialized_block, trusted=True, lazy=True)
                 status = self.process_block(block, last_block)
                 logger.info(status)
                 if status in [BLOCK_ACCEPTED, BLOCK_DISCARDED_BUT_CAN_BE_BROADCASTED]:
                     # TODO: Broadcast only current block
-                    milestone = config.get_milestone(block.height)
+                    blocktime = config.get_blocktime(block.height)
                     current_slot = slots.get_slot_number(block.height, time.get_time())
-                    if current_slot * milestone["blocktime"] <= block.timestamp:
+                    if current_slot * blocktime <= block.timestamp:
                         # TODO: THIS IS MISSING
                         logger.error("MISSING: IMPLEMENT BROADCASTING")
             else:
@@ -0,0 +1,265 @@
+"""Pipelined sync of blocks from peers.
+
+Sync is split into three stages connected with bounded queues, so the network and
+the verification workers are busy while blocks are being applied:
+
+1. fetch: downloads the next batch of blocks from a random peer
+2. verify: decodes the blocks and verifies them with the shared `SignatureVerifier`,
+   which can run on worker processes (see ``VERIFY_EXECUTOR``)
+3. apply: processes blocks one by one on the calling thread, each batch within
+   the ``group_commit`` context, so it's written to the database at once
+
+In fast mode, blocks below the highest checkpoint of the network are verified with
+`verify_checkpointed_blocks`, which skips signatures of transactions in blocks
+whose chain leads to a checkpoint within the same batch.
+
+Each stage records the time it spent working, which is reported as utilization of
+the stage. The stage with the highest utilization is the one sync is bound by.
+"""
+import logging
+import queue
+import threading
+from contextlib import nullcontext
+from time import perf_counter, sleep
+
+from chain.blockchain.constants import BLOCK_ACCEPTED
+from chain.blockchain.utils import (
+    is_block_chained,
+    is_checkpointed,
+    verify_checkpointed_blocks,
+)
+from chain.common.exceptions import PeerNotFoundException
+from chain.crypto.objects.block import Block
+from chain.crypto.utils import is_block_exception
+from chain.crypto.verifier import get_verifier
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream of batches passed between stages
+_DONE = object()
+
+STAGE_FETCH = "fetch"
+STAGE_VERIFY = "verify"
+STAGE_APPLY = "apply"
+
+
+class StageStats(object):
+    """Time a pipeline stage spent working and the number of batches and blocks it
+    processed
+    """
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.busy = 0.0
+        self.batches = 0
+        self.blocks = 0
+
+    def add(self, busy, num_blocks):
+        self.busy += busy
+        self.batches += 1
+        self.blocks += num_blocks
+
+    def utilization(self, elapsed):
+        return self.busy / elapsed if elapsed else 0.0
+
+
+class SyncPipeline(object):
+    """Syncs blocks following `last_block` until the peers run out of blocks
+
+    :param peers: peers plugin used to fetch blocks
+    :param (Block) last_block: last block in the database
+    :param (int) queue_size: maximum number of batches waiting between two stages
+    :param (int) report_interval: number of seconds between utilization reports
+    :param (bool) fast: skip verification of transaction signatures in blocks that
+        lead to a checkpoint
+    :param group_commit: function that returns the context manager in which each
+        batch of blocks is applied, eg. `Database.group_commit`
+    """
+
+    def __init__(
+        self,
+        peers,
+        last_block,
+        queue_size=2,
+        report_interval=30,
+        fast=False,
+        group_commit=nullcontext,
+    ):
+        super().__init__()
+        self.peers = peers
+        self.last_block = last_block
+        self.fast = fast
+        self.group_commit = group_commit
+        self.report_interval = report_interval
+        self.stats = {
+            name: StageStats(name) for name in [STAGE_FETCH, STAGE_VERIFY, STAGE_APPLY]
+        }
+        self._fetched = queue.Queue(maxsize=queue_size)
+        self._verified = queue.Queue(maxsize=queue_size)
+        self._stopped = threading.Event()
+        self._error = None
+        self._started_at = None
+
+    def _put(self, batches, batch):
+        while not self._stopped.is_set():
+            try:
+                batches.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, batches):
+        while not self._stopped.is_set():
+            try:
+                return batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _fetch(self):
+        stats = self.stats[STAGE_FETCH]
+        height = self.last_block.height
+        try:
+            while not self._stopped.is_set():
+                start = perf_counter()
+                try:
+                    batch = self.peers.fetch_blocks(height, decode=False)
+                except PeerNotFoundException as e:
+                    logger.error(str(e))
+                    logger.info(
+                        "Waiting for 1 second before continuing to give peers time "
+                        "to populate"
+                    )
+                    sleep(1)
+                    continue
+                stats.add(perf_counter() - start, len(batch))
+
+                if not batch:
+                    logger.info("No new block found on this peer")
+                    break
+                if not self._put(self._fetched, batch):
+                    break
+                height = batch[-1]["height"]
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(self._fetched, _DONE)
+
+    def _verify_blocks(self, verifier, blocks):
+        if not self.fast:
+            return verifier.verify_blocks(blocks)
+        # Blocks are sorted by height, so checkpointed blocks come first
+        num_checkpointed = sum(1 for block in blocks if is_checkpointed(block))
+        return verify_checkpointed_blocks(
+            blocks[:num_checkpointed], verifier=verifier
+        ) + verifier.verify_blocks(blocks[num_checkpointed:])
+
+    def _verify(self):
+        stats = self.stats[STAGE_VERIFY]
+        verifier = get_verifier()
+        try:
+            while True:
+                batch = self._get(self._fetched)
+                if batch is _DONE:
+                    break
+
+                start = perf_counter()
+                blocks = [Block.from_dict(data) for data in batch]
+                verifications = self._verify_blocks(verifier, blocks)
+                stats.add(perf_counter() - start, len(blocks))
+
+                if not self._put(self._verified, list(zip(blocks, verifications))):
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(self._verified, _DONE)
+
+    def _apply(self, process_block):
+        stats = self.stats[STAGE_APPLY]
+        last_report = perf_counter()
+        while True:
+            batch = self._get(self._verified)
+            if batch is _DONE:
+                break
+
+            start = perf_counter()
+            first_block = batch[0][0]
+            is_chained = is_block_chained(
+                self.last_block, first_block
+            ) or is_block_exception(first_block)
+            if not is_chained:
+                # TODO: Think about banning the peer at this point as it's most
+                # likely that it's a bad peer
+                logger.warning(
+                    "First block in the current batch of block is not chained. "
+                    "Skipping all blocks in this and following batches."
+                )
+                break
+
+            logger.info(
+                "Downloaded %s new blocks accounting for a total of %s transactions",
+                len(batch),
+                sum(block.number_of_transactions for block, _ in batch),
+            )
+            with self.group_commit():
+                for block, verification in batch:
+                    status = process_block(block, self.last_block, verification)
+                    logger.info("Block %s was %s", block.id, status)
+                    if status != BLOCK_ACCEPTED:
+                        raise Exception("Block not accepted")
+                    self.last_block = block
+            stats.add(perf_counter() - start, len(batch))
+
+            if perf_counter() - last_report >= self.report_interval:
+                self.log_utilization()
+                last_report = perf_counter()
+
+    def utilization(self):
+        """Returns the fraction of time each stage spent working since the pipeline
+        was started
+
+        :returns (dict): utilization by stage name
+        """
+        elapsed = perf_counter() - self._started_at if self._started_at else 0.0
+        return {name: stats.utilization(elapsed) for name, stats in self.stats.items()}
+
+    def log_utilization(self):
+        utilization = self.utilization()
+        for name, stats in self.stats.items():
+            logger.info(
+                "Sync stage %s: %.0f%% busy, %s batches, %s blocks",
+                name,
+                utilization[name] * 100,
+                stats.batches,
+                stats.blocks,
+            )
+
+    def run(self, process_block):
+        """Runs the pipeline until the peers run out of blocks
+
+        :param process_block: function that takes a block, the previous block and
+            the result of `Block.verify` and returns the status of the block
+        :returns (Block): last applied block
+        """
+        self._started_at = perf_counter()
+        threads = [
+            threading.Thread(target=self._fetch, name="sync-fetch", daemon=True),
+            threading.Thread(target=self._verify, name="sync-verify", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._apply(process_block)
+        finally:
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+            self.log_utilization()
+
+        if self._error:
+            raise self._error
+        return self.last_block
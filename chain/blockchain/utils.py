@@ -1,4 +1,10 @@
+from binascii import unhexlify
+from hashlib import sha256
+
+from chain.common.config import config
 from chain.crypto import slots
+from chain.crypto.objects.transaction_batch import TransactionBatch
+from chain.crypto.verifier import get_verifier
 
 
 def is_block_chained(previous_block, next_block):
@@ -11,3 +17,88 @@ def is_block_chained(previous_block, next_block):
     next_slot = slots.get_slot_number(next_block.height, next_block.timestamp)
     is_after_previous_slot = previous_slot < next_slot
     return follows_previous and is_plus_one and is_after_previous_slot
+
+
+def is_checkpointed(block):
+    """Checks if block is below the highest checkpoint of the network, so it's
+    enough to verify it with `verify_checkpointed_blocks`
+    """
+    return block.height <= config.last_checkpoint_height
+
+
+def find_anchored_blocks(blocks):
+    """Returns which of the blocks are anchored to a checkpoint: the links to
+    previous blocks, followed backward from a block with the id of a checkpoint,
+    reach them. Ids are calculated from block headers, so headers of anchored
+    blocks are the ones of the chain that ends with the checkpoint.
+
+    :param (list) blocks: consecutive blocks sorted by height
+    :returns (list): bool for each block
+    """
+    anchored = [False] * len(blocks)
+    chain_start = 0
+    for index, block in enumerate(blocks):
+        if index and block.previous_block != blocks[index - 1].id:
+            chain_start = index
+        if config.checkpoints.get(block.height) == block.id:
+            anchored[chain_start : index + 1] = [True] * (index + 1 - chain_start)
+    return anchored
+
+
+def _verify_anchored_block(block):
+    """Verifies a block that is anchored to a checkpoint. The payload hash must
+    match the transactions, so they can't be changed without changing the block id.
+    """
+    errors = []
+
+    transactions = block.transactions
+    if isinstance(transactions, TransactionBatch):
+        transaction_ids = transactions.ids()
+    else:
+        transaction_ids = [transaction.get_id() for transaction in transactions]
+
+    if len(transaction_ids) != block.number_of_transactions:
+        errors.append("Invalid number of transactions")
+
+    payload_hash = sha256(unhexlify("".join(transaction_ids))).hexdigest()
+    if payload_hash != block.payload_hash:
+        errors.append("Invalid payload hash")
+
+    return len(errors) == 0, errors
+
+
+def verify_checkpointed_blocks(blocks, verifier=None):
+    """Verifies consecutive blocks below the highest checkpoint. Blocks that are
+    anchored to a checkpoint, see `find_anchored_blocks`, only need their payload
+    checked, as their headers are the ones of the chain that ends with the
+    checkpoint. Other blocks are fully verified, including signatures of their
+    transactions.
+
+    :param (list) blocks: consecutive blocks sorted by height
+    :param (SignatureVerifier) verifier: verifier of blocks that are not anchored
+    :returns (list): result of `Block.verify` for each block
+    """
+    anchored = find_anchored_blocks(blocks)
+    verifications = iter(
+        (verifier or get_verifier()).verify_blocks(
+            [block for block, is_anchored in zip(blocks, anchored) if not is_anchored]
+        )
+    )
+
+    results = []
+    for block, is_anchored in zip(blocks, anchored):
+        if is_anchored:
+            is_valid, errors = _verify_anchored_block(block)
+        else:
+            is_valid, errors = next(verifications)
+
+        checkpoint_id = config.checkpoints.get(block.height)
+        if checkpoint_id is not None and block.id != checkpoint_id:
+            is_valid = False
+            errors.append(
+                "Block id {} does not match checkpoint {} at height {}".format(
+                    block.id, checkpoint_id, block.height
+                )
+            )
+        results.append((is_valid, errors))
+    return results
@@ -1,5 +1,6 @@
 import json
 import os
+from bisect import bisect_right
 from hashlib import sha256
 from operator import itemgetter
 
@@ -31,9 +32,11 @@ class Config(dict, metaclass=SingletonMeta):
 
         with open(os.path.join(folder, "network.json")) as f:
             self.network = json.loads(f.read())
+        self._compile_checkpoints()
 
         with open(os.path.join(folder, "exceptions.json")) as f:
             self.exceptions = json.loads(f.read())
+        self._compile_exceptions()
 
         with open(os.path.join(folder, "peers.json")) as f:
             self.peers = json.loads(f.read())
@@ -65,6 +68,29 @@ class Config(dict, metaclass=SingletonMeta):
             },
         }
 
+        # TODO: put this in config file
+        self.sync = {
+            # Fetch, verify and apply blocks concurrently, see chain.blockchain.sync
+            "pipelined": True,
+            # Maximum number of batches of blocks waiting between sync stages
+            "queue_size": 2,
+            # Skip signatures of transactions in blocks that lead to a checkpoint of
+            # the network
+            "fast": True,
+            # Apply each batch of synced blocks with a single commit
+            "group_commit": True,
+        }
+
+        # TODO: put this in config file
+        self.snapshots = {
+            # Folder of wallet snapshots, see chain.plugins.database.snapshots
+            "folder": os.environ.get("WALLET_SNAPSHOT_FOLDER", "snapshots"),
+            # Number of rounds between snapshots, 0 disables them
+            "interval": 10,
+            # Number of newest snapshots that are kept
+            "keep": 3,
+        }
+
         #     /**
         #  * The list of IPs can access the remote/internal API.
         #  *
@@ -80,16 +106,74 @@ class Config(dict, metaclass=SingletonMeta):
         milestones.sort(key=itemgetter("height"))
         self.milestones = milestones
         self.milestone_hash = self._calculate_milestone_hash(milestones)
+        self._compile_milestones()
 
     def _calculate_milestone_hash(self, milestones):
         milestones_json = json.dumps(milestones)
         sha_hash = sha256(milestones_json.encode("utf-8")).hexdigest()
         return sha_hash[:16]
 
+    def _compile_exceptions(self):
+        """Creates lookup tables for the exceptions, which are checked for every
+        block and transaction
+        """
+        self.exception_blocks = frozenset(self.exceptions.get("blocks", []))
+        # TODO: exception files list transactions under the "transactions" key, but
+        # they have always been read from "transaction". Switching the key changes
+        # which transactions get verified and applied as exceptions.
+        self.exception_transactions = frozenset(self.exceptions.get("transaction", []))
+        self.transaction_id_fix_table = dict(
+            self.exceptions.get("transactionIdFixTable", {})
+        )
+
+    def _compile_checkpoints(self):
+        """Creates a lookup table of trusted block ids by height from the
+        "checkpoints" of the network config, eg.
+        ``[{"height": 1000000, "id": "..."}]``
+        """
+        self.checkpoints = {
+            checkpoint["height"]: checkpoint["id"]
+            for checkpoint in self.network.get("checkpoints", [])
+        }
+        self.last_checkpoint_height = max(self.checkpoints, default=0)
+
+    def _compile_milestones(self):
+        """Creates a table of milestone heights that can be bisected, and columns of
+        the milestone values that are looked up for every block
+        """
+        milestones = self.milestones
+        self._milestone_heights = [milestone["height"] for milestone in milestones]
+        self._blocktimes = [milestone["blocktime"] for milestone in milestones]
+        self._active_delegates = [
+            milestone["activeDelegates"] for milestone in milestones
+        ]
+        self._rewards = [milestone["reward"] for milestone in milestones]
+        self._id_full_sha256 = [
+            milestone["block"]["idFullSha256"] for milestone in milestones
+        ]
+
+    def _get_milestone_index(self, height):
+        index = bisect_right(self._milestone_heights, height) - 1
+        if index < 0:
+            raise ValueError("There is no milestone for height {}".format(height))
+        return index
+
     def get_milestone(self, height):
-        for milestone in reversed(self.milestones):
-            if height >= milestone["height"]:
-                return milestone
+        index = bisect_right(self._milestone_heights, height) - 1
+        if index >= 0:
+            return self.milestones[index]
+
+    def get_blocktime(self, height):
+        return self._blocktimes[self._get_milestone_index(height)]
+
+    def get_active_delegates(self, height):
+        return self._active_delegates[self._get_milestone_index(height)]
+
+    def get_reward(self, height):
+        return self._rewards[self._get_milestone_index(height)]
+
+    def is_id_full_sha256(self, height):
+        return self._id_full_sha256[self._get_milestone_index(height)]
 
 
 config = Config()
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """Bounded mapping that evicts the least recently used entry once it holds
+    `max_size` entries. Hits and misses of `get` are counted, so the size can be
+    tuned with `info`. Access is guarded by a lock, as caches are shared between the
+    threads of a process.
+
+    :param (int) max_size: maximum number of entries
+    """
+
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            data = self._data
+            data[key] = value
+            data.move_to_end(key)
+            if len(data) > self.max_size:
+                data.popitem(last=False)
+
+    def is_full(self):
+        return len(self._data) >= self.max_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Returns hit and miss counters and the size of the cache
+
+        :returns (dict): hits, misses, hit_rate, size and max_size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._data),
+            "max_size": self.max_size,
+        }
@@ -1,16 +1,31 @@
 import hashlib
+import os
 import re
 from binascii import unhexlify
 
-from base58 import b58encode_check
+from chain.common.config import config
+from chain.common.lru import LRUCache
+from chain.crypto.address_codec import encode_check
 
-from binary.unsigned_integer import write_bit8
+# Addresses of the configured network by public key. Every transaction, block and
+# vote looks up addresses from public keys, and most of them belong to a small
+# set of active wallets.
+_address_cache = LRUCache(int(os.environ.get("ADDRESS_CACHE_SIZE", 50000)))
 
-from chain.common.config import config
+
+def _address_from_public_key(public_key, network_version):
+    match = re.fullmatch("^[0-9A-Fa-f]{66}$", public_key)
+    if not match:
+        raise Exception("Invalid public key")  # TODO: better exception
+
+    ripemd160 = hashlib.new("ripemd160", unhexlify(public_key.encode()))
+    payload = bytes([network_version]) + ripemd160.digest()
+    return encode_check(payload)
 
 
 def address_from_public_key(public_key, network_version=None):
-    """Get an address from a public key
+    """Get an address from a public key. Addresses of the configured network are
+    cached.
 
     Args:
         public_key (str):
@@ -19,13 +34,29 @@ def address_from_public_key(public_key, network_version=None):
     Returns:
         bytes:
     """
-    match = re.fullmatch("^[0-9A-Fa-f]{66}$", public_key)
-    if not match:
-        raise Exception("Invalid public key")  # TODO: better exception
+    pub_key_hash = config.network["pubKeyHash"]
+    if network_version is not None and network_version != pub_key_hash:
+        return _address_from_public_key(public_key, network_version)
 
-    if not network_version:
-        network_version = config.network["pubKeyHash"]
+    address = _address_cache.get(public_key)
+    if address is None:
+        address = _address_from_public_key(public_key, pub_key_hash)
+        _address_cache.set(public_key, address)
+    return address
 
-    ripemd160 = hashlib.new("ripemd160", unhexlify(public_key.encode()))
-    payload = write_bit8(network_version) + ripemd160.digest()
-    return b58encode_check(payload).decode()
+
+def cache_addresses(addresses):
+    """Adds known addresses of the configured network to the address cache, until
+    the cache is full
+
+    :param (iterable) addresses: (public_key, address) pairs
+    """
+    for public_key, address in addresses:
+        if _address_cache.is_full():
+            break
+        _address_cache.set(public_key, address)
+
+
+def address_cache_info():
+    """Returns hit and miss counters of the address cache, see `LRUCache.info`"""
+    return _address_cache.info()
@@ -0,0 +1,115 @@
+"""Base58check encoding of addresses.
+
+Recipients are stored as 21 byte payloads (network version followed by the
+RIPEMD-160 hash of the public key) in serialized transactions and as base58check
+strings everywhere else, so every serialization and deserialization converts
+between them. Converted addresses are kept in a bounded cache shared by both
+directions.
+"""
+import os
+from hashlib import sha256
+
+from chain.common.lru import LRUCache
+
+_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_INDEXES = {char: index for index, char in enumerate(_ALPHABET)}
+
+# Keys are either addresses (str) or payloads (bytes), so a single cache holds both
+# directions of the mapping without collisions
+_codec_cache = LRUCache(int(os.environ.get("ADDRESS_CODEC_CACHE_SIZE", 50000)))
+
+
+def _checksum(payload):
+    return sha256(sha256(payload).digest()).digest()[:4]
+
+
+def encode_check(payload):
+    """Encodes `payload` to a base58check string, without using the cache
+
+    :param (bytes) payload: data to encode
+    :returns (str): base58check encoded data
+    """
+    data = payload + _checksum(payload)
+    number = int.from_bytes(data, "big")
+    chars = []
+    while number:
+        number, index = divmod(number, 58)
+        chars.append(_ALPHABET[index])
+    num_leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * num_leading_zeros + "".join(reversed(chars))
+
+
+def decode_check(address):
+    """Decodes a base58check string and verifies its checksum, without using the
+    cache
+
+    :param (str) address: base58check encoded data
+    :returns (bytes): decoded data
+    """
+    number = 0
+    for char in address:
+        try:
+            number = number * 58 + _INDEXES[char]
+        except KeyError:
+            raise ValueError("Invalid base58 character {!r}".format(char))
+    num_leading_zeros = len(address) - len(address.lstrip("1"))
+    data = b"\x00" * num_leading_zeros + number.to_bytes(
+        (number.bit_length() + 7) // 8, "big"
+    )
+    payload, checksum = data[:-4], data[-4:]
+    if _checksum(payload) != checksum:
+        raise ValueError("Invalid checksum")
+    return payload
+
+
+def address_to_bytes(address):
+    """Returns the 21 byte payload of an address
+
+    :param (str) address: base58check encoded address
+    :returns (bytes): network version followed by the public key hash
+    """
+    payload = _codec_cache.get(address)
+    if payload is None:
+        payload = decode_check(address)
+        _codec_cache.set(address, payload)
+        _codec_cache.set(payload, address)
+    return payload
+
+
+def address_from_bytes(payload):
+    """Returns the address of a 21 byte payload
+
+    :param (bytes) payload: network version followed by the public key hash
+    :returns (str): base58check encoded address
+    """
+    address = _codec_cache.get(payload)
+    if address is None:
+        address = encode_check(payload)
+        _codec_cache.set(payload, address)
+        _codec_cache.set(address, payload)
+    return address
+
+
+def addresses_to_bytes(addresses):
+    """Returns payloads of a list of addresses, eg. recipients of a multi payment
+
+    :param (list) addresses: base58check encoded addresses
+    :returns (list): 21 byte payloads in the same order
+    """
+    return [address_to_bytes(address) for address in addresses]
+
+
+def addresses_from_bytes(payloads):
+    """Returns addresses of a list of payloads, eg. recipients of a block
+
+    :param (list) payloads: 21 byte payloads
+    :returns (list): base58check encoded addresses in the same order
+    """
+    return [address_from_bytes(payload) for payload in payloads]
+
+
+def codec_cache_info():
+    """Returns hit and miss counters of the address codec cache, see
+    `LRUCache.info`
+    """
+    return _codec_cache.info()
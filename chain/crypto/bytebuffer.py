@@ -1,36 +1,64 @@
-from binary.unsigned_integer import read_bit32, read_bit64, read_bit8
+import struct
 
+_UINT8 = struct.Struct("<B")
+_UINT32 = struct.Struct("<I")
+_UINT64 = struct.Struct("<Q")
 
-# TODO: Put this into binary package
-class ByteBuffer(bytearray):
-    def read_uint8(self):
-        return read_bit8(self)
 
-    def read_uint32(self):
-        return read_bit32(self)
+class ByteBuffer(object):
+    """Read cursor over a bytes-like object.
 
-    def read_uint64(self):
-        return read_bit64(self)
+    Reading moves an offset over a ``memoryview`` of the underlying data instead of
+    deleting consumed bytes, so decoding a payload is linear in its size and never
+    copies the remaining data. ``len(buff)`` returns the number of unread bytes.
+
+    :param data: bytes-like object to read from
+    """
+
+    __slots__ = ("_view", "_offset")
+
+    def __init__(self, data=b""):
+        self._view = memoryview(data)
+        self._offset = 0
+
+    def __len__(self):
+        return len(self._view) - self._offset
+
+    def read_uint8(self, offset=0):
+        return _UINT8.unpack_from(self._view, self._offset + offset)[0]
+
+    def read_uint32(self, offset=0):
+        return _UINT32.unpack_from(self._view, self._offset + offset)[0]
+
+    def read_uint64(self, offset=0):
+        return _UINT64.unpack_from(self._view, self._offset + offset)[0]
 
     def read_bytes(self, num_bytes, offset=0):
-        return bytes(self[offset : offset + num_bytes])
+        start = self._offset + offset
+        return self._view[start : start + num_bytes].tobytes()
 
     def pop_uint8(self):
-        data = read_bit8(self)
-        del self[:1]
+        data = _UINT8.unpack_from(self._view, self._offset)[0]
+        self._offset += 1
         return data
 
     def pop_uint32(self):
-        data = read_bit32(self)
-        del self[:4]
+        data = _UINT32.unpack_from(self._view, self._offset)[0]
+        self._offset += 4
         return data
 
     def pop_uint64(self):
-        data = read_bit64(self)
-        del self[:8]
+        data = _UINT64.unpack_from(self._view, self._offset)[0]
+        self._offset += 8
         return data
 
     def pop_bytes(self, num_bytes):
-        data = self[:num_bytes]
-        del self[:num_bytes]
-        return bytes(data)
+        data = self._view[self._offset : self._offset + num_bytes].tobytes()
+        self._offset += len(data)
+        return data
+
+    def pop_buffer(self, num_bytes):
+        """Pops `num_bytes` as a new ByteBuffer that shares memory with this one."""
+        view = self._view[self._offset : self._offset + num_bytes]
+        self._offset += len(view)
+        return ByteBuffer(view)
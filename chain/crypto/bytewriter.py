@@ -0,0 +1,48 @@
+import struct
+from binascii import unhexlify
+
+_UINT32 = struct.Struct("<I")
+_UINT64 = struct.Struct("<Q")
+
+
+class ByteWriter(object):
+    """Write counterpart of ``ByteBuffer``.
+
+    Values are appended to a single growable ``bytearray``, so building a payload
+    doesn't create a new ``bytes`` object for every field like ``bytes +=`` does.
+    Fixed layouts can be written in one call with a precompiled ``struct.Struct``.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def __len__(self):
+        return len(self._data)
+
+    def write_uint8(self, value):
+        self._data.append(value)
+
+    def write_uint32(self, value):
+        self._data += _UINT32.pack(value)
+
+    def write_uint64(self, value):
+        self._data += _UINT64.pack(value)
+
+    def write_bytes(self, data):
+        self._data += data
+
+    def write_hex(self, data):
+        """Writes hex encoded `data` (str or bytes) as raw bytes"""
+        self._data += unhexlify(data)
+
+    def write_zeros(self, num_bytes):
+        self._data += bytes(num_bytes)
+
+    def write_struct(self, fmt, *values):
+        """Writes `values` packed with a precompiled `struct.Struct`"""
+        self._data += fmt.pack(*values)
+
+    def to_bytes(self):
+        return bytes(self._data)
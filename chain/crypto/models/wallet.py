@@ -1,9 +1,58 @@
 import json
+import struct
+from binascii import Error as BinasciiError, hexlify, unhexlify
 
 from chain.crypto.address import address_from_public_key
+from chain.crypto.bytewriter import ByteWriter
 
 
-# NOTE: This acts like a model, and it's data is stored in redis
+# NOTE: This acts like a model, and it's data is stored in memory of the blockchain
+# process and in redis
+
+# Version of the binary format written by `Wallet.to_bytes`
+WALLET_VERSION = 1
+
+# Optional fields in the order of their bits in the presence bitmap
+_OPTIONAL_FIELDS = [
+    "address",
+    "public_key",
+    "second_public_key",
+    "multisignature",
+    "vote",
+    "username",
+]
+# Public keys are stored as raw bytes instead of hex. Addresses stay text, as
+# converting them to bytes and back costs more than the bytes it saves.
+_KEY_FIELDS = {"public_key", "second_public_key", "vote"}
+_KEY_SIZE = 33
+_INTEGER_FIELDS = [
+    "balance",
+    "vote_balance",
+    "produced_blocks",
+    "missed_blocks",
+    "forged_fees",
+    "forged_rewards",
+]
+_OPTIONAL_MASKS = [(1 << bit, field) for bit, field in enumerate(_OPTIONAL_FIELDS)]
+_VERSION = bytes([WALLET_VERSION])
+# version, present, raw and the integer fields. Amounts are signed, as balances
+# can be negative while wallets are being built.
+_HEADER = struct.Struct("<BBBqqIIqq")
+_UINT16 = struct.Struct("<H")
+_MAX_FIELD_LENGTH = 0xFFFF
+
+
+def _key_to_bytes(value):
+    """Returns raw bytes of a public key, or None if the value can't be restored
+    from them exactly, eg. it's not a valid key
+    """
+    if len(value) != _KEY_SIZE * 2:
+        return None
+    try:
+        raw = unhexlify(value)
+    except (BinasciiError, ValueError):
+        return None
+    return raw if hexlify(raw).decode("utf-8") == value else None
 
 
 class Wallet(object):
@@ -23,17 +72,124 @@ class Wallet(object):
         ("forged_fees", 0),
         ("forged_rewards", 0),
     ]
+    __slots__ = tuple(field for field, _ in fields)
 
     def __init__(self, data):
         super().__init__()
         for field, default in self.fields:
             setattr(self, field, data.get(field, default))
 
+    def copy(self):
+        wallet = Wallet.__new__(Wallet)
+        for field in self.__slots__:
+            setattr(wallet, field, getattr(self, field))
+        return wallet
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field, _ in self.fields}
+
     def to_json(self):
-        data = {}
-        for field, _ in self.fields:
-            data[field] = getattr(self, field)
-        return json.dumps(data)
+        return json.dumps(self.to_dict())
+
+    def to_bytes(self):
+        """Serializes the wallet to a compact binary format::
+
+            version (1) | present (1) | raw (1) | integers (40) | optional fields
+
+        Bit i of ``present`` is set when the i-th optional field is not None and bit
+        i of ``raw`` when it's a public key stored as 33 raw bytes. Other optional
+        fields are prefixed with their length (uint16), multisignature is stored as
+        JSON and the rest as utf-8 text.
+
+        :raises ValueError: if an optional field is longer than 65535 bytes
+        """
+        present = 0
+        is_raw = 0
+        values = []
+        for mask, field in _OPTIONAL_MASKS:
+            value = getattr(self, field)
+            if value is None:
+                continue
+            present |= mask
+            raw = _key_to_bytes(value) if field in _KEY_FIELDS else None
+            if raw is not None:
+                is_raw |= mask
+                values.append((False, raw))
+                continue
+            if field == "multisignature":
+                data = json.dumps(value).encode("utf-8")
+            else:
+                data = value.encode("utf-8")
+            if len(data) > _MAX_FIELD_LENGTH:
+                raise ValueError(
+                    "Wallet field {} is longer than {} bytes".format(
+                        field, _MAX_FIELD_LENGTH
+                    )
+                )
+            values.append((True, data))
+
+        writer = ByteWriter()
+        writer.write_struct(
+            _HEADER,
+            WALLET_VERSION,
+            present,
+            is_raw,
+            *[getattr(self, field) for field in _INTEGER_FIELDS],
+        )
+        for has_length, data in values:
+            if has_length:
+                writer.write_struct(_UINT16, len(data))
+            writer.write_bytes(data)
+        return writer.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a wallet from bytes returned by `to_bytes`. Wallets that were
+        stored with `to_json` are read as well.
+
+        :param (bytes) data: serialized wallet
+        :raises ValueError: if data is malformed or of an unknown version
+        """
+        if data[:1] == b"{":
+            return cls(json.loads(bytes(data)))
+        if data[:1] != _VERSION:
+            raise ValueError("Unknown wallet version {!r}".format(bytes(data[:1])))
+
+        try:
+            _, present, is_raw, *integers = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Wallet data is truncated")
+        wallet = cls.__new__(cls)
+        for field, value in zip(_INTEGER_FIELDS, integers):
+            setattr(wallet, field, value)
+
+        offset = _HEADER.size
+        for mask, field in _OPTIONAL_MASKS:
+            value = None
+            if present & mask:
+                try:
+                    if is_raw & mask:
+                        start = offset
+                        end = start + _KEY_SIZE
+                    else:
+                        start = offset + _UINT16.size
+                        end = start + _UINT16.unpack_from(data, offset)[0]
+                except struct.error:
+                    raise ValueError("Wallet data is truncated")
+                if end > len(data):
+                    raise ValueError("Wallet data is truncated")
+
+                if is_raw & mask:
+                    value = hexlify(data[start:end]).decode("utf-8")
+                elif field == "multisignature":
+                    value = json.loads(bytes(data[start:end]))
+                else:
+                    value = str(data[start:end], "utf-8")
+                offset = end
+            setattr(wallet, field, value)
+        if offset != len(data):
+            raise ValueError("Unexpected data after wallet")
+        return wallet
 
     def apply_block(self, block):
         address = address_from_public_key(block.generator_public_key)
@@ -10,15 +10,30 @@ class Field(object):
     :param str label: A label to use as the name of the serialized field instead of using the
         attribute name of the field.
     :param bool required: Whether the field is required.
+    :param bool invalidates_cache: Whether setting the field clears cached values
+        (eg. bytes and hashes) of the object. Disable it for fields that don't affect
+        any of the cached values.
     """
 
+    __slots__ = (
+        "attr",
+        "required",
+        "_default",
+        "invalidates_cache",
+        "name",
+        "_getter",
+        "_setter",
+        "_trusted_setter",
+    )
+
     getter_takes_serializer = False
     accepted_types = None
 
-    def __init__(self, attr=None, required=True, default=None):
+    def __init__(self, attr=None, required=True, default=None, invalidates_cache=True):
         self.attr = attr
         self.required = required
         self._default = default
+        self.invalidates_cache = invalidates_cache
 
     @property
     def default(self):
@@ -160,7 +175,6 @@ class BytesField(Field):
             return value.encode("utf-8")
         return value
 
-
     @staticmethod
     def serialize(value):
         """Transform to serialized value.
@@ -170,6 +184,72 @@ class BytesField(Field):
         return value.decode("utf-8")
 
 
+def _compile_trusted_setter(field, slot, cache_slot):
+    """Compiles a setter that stores the value in the slot of the field without any
+    validation or conversion.
+
+    :param (Field) field: field the setter is compiled for
+    :param slot: slot descriptor in which the value is stored
+    :param cache_slot: slot descriptor of the object cache
+    """
+    set_slot = slot.__set__
+
+    if not field.invalidates_cache:
+
+        def trusted_setter(obj, value, validate_required=True):
+            set_slot(obj, value)
+
+    else:
+        set_cache = cache_slot.__set__
+
+        def trusted_setter(obj, value, validate_required=True):
+            set_slot(obj, value)
+            set_cache(obj, None)
+
+    return trusted_setter
+
+
+def _compile_setter(field, slot, cache_slot):
+    """Compiles a setter that validates and converts the value before storing it in
+    the slot of the field. Field properties are bound to local variables so the
+    setter doesn't need to look them up on every call.
+
+    :param (Field) field: field the setter is compiled for
+    :param slot: slot descriptor in which the value is stored
+    :param cache_slot: slot descriptor of the object cache
+    """
+    name = field.name
+    required = field.required
+    accepted_types = field.accepted_types
+    to_value = field.to_value
+    set_slot = _compile_trusted_setter(field, slot, cache_slot)
+
+    if to_value is Field.to_value and not accepted_types:
+
+        def setter(obj, value, validate_required=True):
+            if value is None and required and validate_required:
+                raise ValueError('Attribute "{}" is required'.format(name))
+            set_slot(obj, value)
+
+    else:
+
+        def setter(obj, value, validate_required=True):
+            if value is None:
+                if required and validate_required:
+                    raise ValueError('Attribute "{}" is required'.format(name))
+                set_slot(obj, None)
+                return
+            if accepted_types and not isinstance(value, accepted_types):
+                raise TypeError(
+                    "Attribute {} ({}) must be of type {}".format(
+                        name, type(value), accepted_types
+                    )
+                )
+            set_slot(obj, to_value(value))
+
+    return setter
+
+
 # TODO: try and refactor this
 def _compile_fields(field, name, object_cls):
     getter = operator.itemgetter(field.attr or name)
@@ -177,18 +257,24 @@ def _compile_fields(field, name, object_cls):
     # Set the field name to a supplied label; defaults to the attribute name.
     field.name = name
     field._getter = getter
+    slot = getattr(object_cls, name)
+    cache_slot = getattr(object_cls, "_cache")
+    field._setter = _compile_setter(field, slot, cache_slot)
+    field._trusted_setter = _compile_trusted_setter(field, slot, cache_slot)
     return field
 
 
 class BaseObjectMeta(type):
     @staticmethod
-    def _get_fields_from_base_classes(object_cls):
-        fields = []
-        # Get all the fields from base classes.
-        for cls in object_cls.__mro__[::-1]:
-            if isinstance(cls, BaseObjectMeta):
-                fields += cls._fields
-        return fields
+    def _get_fields_from_base_classes(bases):
+        fields = {}
+        # Get all the fields from base classes. Use a dict as fields are inherited
+        # through multiple classes in the mro
+        for base in bases:
+            if isinstance(base, BaseObjectMeta):
+                for field in base._fields:
+                    fields.setdefault(field.name, field)
+        return list(fields.values())
 
     @staticmethod
     def _compile_fields(field_map, object_cls):
@@ -208,21 +294,57 @@ class BaseObjectMeta(type):
         for k in direct_fields.keys():
             del attrs[k]
 
+        base_classes_fields = cls._get_fields_from_base_classes(bases)
+
+        # Values of fields are stored in slots instead of the instance dict. Fields
+        # that are already slotted on a base class reuse the base class slot.
+        base_field_names = {field.name for field in base_classes_fields}
+        attrs["__slots__"] = tuple(attrs.get("__slots__", ())) + tuple(
+            name for name in direct_fields if name not in base_field_names
+        )
+
         real_cls = super().__new__(cls, name, bases, attrs)
         compiled_fields = cls._compile_fields(direct_fields, real_cls)
 
-        base_classes_fields = cls._get_fields_from_base_classes(real_cls)
-
-        all_fields = compiled_fields + base_classes_fields
+        all_fields = compiled_fields + [
+            field for field in base_classes_fields if field.name not in direct_fields
+        ]
         real_cls._fields = all_fields
         real_cls._field_map = {x.name: x for x in all_fields}
+        real_cls._setters = {x.name: x._setter for x in all_fields}
+        real_cls._trusted_setters = {x.name: x._trusted_setter for x in all_fields}
         return real_cls
 
 
 class BaseObject(Field, metaclass=BaseObjectMeta):
+    """Base class for crypto objects.
+
+    Field values are stored in ``__slots__`` and validated by setters that are
+    compiled once per field when the class is created. The ``__dict__`` slot is kept
+    so non-field attributes can still be set (eg. when mocking), but it's only
+    allocated when that happens.
+
+    :param (dict) data: populate the object from a dict with camelCase keys
+    :param instance: populate the object from attributes of another object
+    :param (bool) trusted: skip validation and conversion of values that are set on
+        this object. Only use it for objects that are created from our own database
+        or from bytes that were already verified.
+
+    Values derived from fields (eg. bytes, hashes and ids) can be memoized with
+    ``_cached``. The cache is cleared whenever a field with ``invalidates_cache`` is
+    set. Fields holding mutable values (dicts and lists) can be changed in place
+    without going through a setter, so call ``invalidate_cache`` after doing that.
+    """
+
+    __slots__ = ("__dict__", "_trusted", "_cache")
+
     _fields = []
+    _setters = {}
+    _trusted_setters = {}
 
-    def __init__(self, data=None, instance=None, **kwargs):
+    def __init__(self, data=None, instance=None, trusted=False, **kwargs):
+        object.__setattr__(self, "_trusted", trusted)
+        object.__setattr__(self, "_cache", None)
         super().__init__()
         if data:
             if not isinstance(data, dict):
@@ -234,23 +356,37 @@ class BaseObject(Field, metaclass=BaseObjectMeta):
             self._populate_with_default_values(kwargs)
 
     def __setattr__(self, name, value, validate_required=True):
-        if name in self._field_map:
-            field = self._field_map[name]
-            if validate_required and field.required and value is None:
-                raise ValueError('Attribute "{}" is required'.format(field.name))
-            if (
-                value is not None
-                and field.accepted_types
-                and not isinstance(value, field.accepted_types)
-            ):
-                raise TypeError(
-                    "Attribute {} ({}) must be of type {}".format(
-                        field.name, type(value), field.accepted_types
-                    )
-                )
-            value = field.to_value(value)
+        if self._trusted:
+            setter = self._trusted_setters.get(name)
+        else:
+            setter = self._setters.get(name)
+
+        if setter is None:
+            object.__setattr__(self, name, value)
+        else:
+            setter(self, value, validate_required)
+
+    def _cached(self, key, func):
+        """Returns cached value for the `key`. If value is not cached yet, it's
+        calculated by calling `func` and stored in the cache.
 
-        super().__setattr__(name, value)
+        :param key: hashable cache key
+        :param func: function without arguments that calculates the value
+        """
+        cache = self._cache
+        if cache is None:
+            cache = {}
+            object.__setattr__(self, "_cache", cache)
+        elif key in cache:
+            return cache[key]
+        value = func()
+        cache[key] = value
+        return value
+
+    def invalidate_cache(self):
+        """Clears all cached values of the object
+        """
+        object.__setattr__(self, "_cache", None)
 
     def _populate_from_instance(self, instance):
         for field in self._fields:
@@ -1,12 +1,13 @@
 from binascii import hexlify, unhexlify
+import struct
 from hashlib import sha256
 
 # import avocato
-from binary.unsigned_integer import write_bit32, write_bit64
 
 from chain.common.config import config
 from chain.crypto import slots, time
 from chain.crypto.bytebuffer import ByteBuffer
+from chain.crypto.bytewriter import ByteWriter
 from chain.crypto.objects.base import (
     BigIntField,
     BytesField,
@@ -14,25 +15,38 @@ from chain.crypto.objects.base import (
     ListField,
     StrField,
 )
+from chain.crypto.objects.transaction_batch import TransactionBatch
 from chain.crypto.objects.transactions import (
     BaseTransaction,
+    from_buffer,
     from_dict,
     from_serialized,
 )
 from chain.crypto.utils import verify_hash
+from chain.crypto.verifier import get_verifier
 from chain.crypto.objects.base import BaseObject
 
-
+# Version, timestamp and height of a serialized block header
+_HEADER = struct.Struct("<III")
+# Number of transactions, total amount, total fee, reward and payload length
+_TOTALS = struct.Struct("<IQQQI")
 
 
 class Block(BaseObject):
-    id = StrField(attr="id", required=False, default=None)
-    id_hex = BytesField(attr="idHex", required=False, default=None)
+    # Fields that are derived from the header bytes or are not a part of them don't
+    # invalidate the cached bytes and ids
+    id = StrField(attr="id", required=False, default=None, invalidates_cache=False)
+    id_hex = BytesField(
+        attr="idHex", required=False, default=None, invalidates_cache=False
+    )
     timestamp = IntField(attr="timestamp", required=True, default=None)
     version = IntField(attr="version", required=True, default=None)
     height = IntField(attr="height", required=True, default=None)
     previous_block_hex = BytesField(
-        attr="previousBlockHex", required=False, default=None
+        attr="previousBlockHex",
+        required=False,
+        default=None,
+        invalidates_cache=False,
     )
     previous_block = StrField(attr="previousBlock", required=False, default=None)
     number_of_transactions = IntField(
@@ -47,7 +61,9 @@ class Block(BaseObject):
         attr="generatorPublicKey", required=True, default=None
     )
     block_signature = StrField(attr="blockSignature", required=False, default=None)
-    transactions = ListField(attr="transactions", required=False)
+    transactions = ListField(
+        attr="transactions", required=False, invalidates_cache=False
+    )
 
     @staticmethod
     def to_bytes_hex(value):
@@ -73,7 +89,11 @@ class Block(BaseObject):
             self.id_hex = self.get_id_hex()
             self.id = self.get_id()
 
-        if self.transactions:
+        if isinstance(self.transactions, TransactionBatch):
+            # Transactions in a batch get the block id and sequence when they're
+            # decoded
+            self.transactions.block_id = self.id
+        elif self.transactions:
             for index, transaction in enumerate(self.transactions):
                 # override blockId and timestamp so all transactions match
                 # with the current block
@@ -85,6 +105,7 @@ class Block(BaseObject):
                 # add sequence to keep the data in sequence when storing it to db
                 transaction.sequence = index
 
+        if self.transactions:
             # // order of transactions messed up in mainnet V1
             # // TODO: move this to network constants exception using block ids
             if self.number_of_transactions == 2 and (
@@ -120,7 +141,15 @@ class Block(BaseObject):
         #     value = field.to_value(value)
         #     setattr(cls, field.name, value)
 
-        if cls.transactions and isinstance(cls.transactions, list):
+        if cls.transactions and all(
+            isinstance(transaction_data, str) for transaction_data in cls.transactions
+        ):
+            # Serialized transactions are kept as they are and only decoded when
+            # they're accessed
+            cls.transactions = TransactionBatch.from_raw(
+                [unhexlify(transaction_data) for transaction_data in cls.transactions]
+            )
+        elif cls.transactions and isinstance(cls.transactions, list):
             transactions = []
             for transaction_data in cls.transactions:
                 converter = from_dict
@@ -135,11 +164,11 @@ class Block(BaseObject):
         return cls
 
     @classmethod
-    def from_object(cls, data):
+    def from_object(cls, data, trusted=False):
         # if not isinstance(data, dict):
         #     raise TypeError('Data must be in dictionary format')
         # fields = cls._fields
-        cls = cls(instance=data)
+        cls = cls(instance=data, trusted=trusted)
         # for field in fields:
         #     value = getattr(data, field.name, field.default)
         #     if value is None and field.required:
@@ -170,31 +199,63 @@ class Block(BaseObject):
     def from_serialized(cls, bytes_string):
         if not isinstance(bytes_string, bytes):
             raise TypeError("bytes_string must be bytes")
-        cls = cls()
-        cls.deserialize(bytes_string)
+        return cls.from_bytes(unhexlify(bytes_string))
+
+    @classmethod
+    def from_bytes(cls, data, trusted=False, lazy=False):
+        """Creates a block from raw (not hexlified) bytes as returned by
+        `to_bytes_full`
+
+        :param (bytes) data: serialized block
+        :param (bool) trusted: skip validation of values on the block and its
+            transactions, see `BaseObject`
+        :param (bool) lazy: decode transactions into a `TransactionBatch` which only
+            creates transaction objects when they are accessed
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError("data must be bytes")
+        cls = cls(trusted=trusted)
+        cls.deserialize_buffer(ByteBuffer(data), lazy=lazy)
         cls._construct_common()
         return cls
 
     def get_id_hex(self):
-        payload_hash = unhexlify(self.serialize())
+        return self._cached("get_id_hex", self._get_id_hex)
+
+    def _get_id_hex(self):
+        payload_hash = self.to_bytes()
         full_hash = sha256(payload_hash).digest()
-        milestone = config.get_milestone(self.height)
-        if milestone["block"]["idFullSha256"]:
+        if config.is_id_full_sha256(self.height):
             return hexlify(full_hash)
 
         small_hash = full_hash[:8][::-1]
         return hexlify(small_hash)
 
     def get_id(self):
+        return self._cached("get_id", self._get_id)
+
+    def _get_id(self):
         id_hex = self.get_id_hex()
-        milestone = config.get_milestone(self.height)
-        if milestone["block"]["idFullSha256"]:
+        if config.is_id_full_sha256(self.height):
             return id_hex.decode("utf-8")
         return str(int(id_hex, 16))
 
     def serialize(self, include_signature=True):
-        milestone = config.get_milestone(self.height - 1)
-        if milestone["block"]["idFullSha256"]:
+        """Serialize block header to hex. Only use this where hex is required (eg.
+        p2p payloads), use `to_bytes` everywhere else.
+        """
+        return hexlify(self.to_bytes(include_signature=include_signature))
+
+    def to_bytes(self, include_signature=True):
+        """Serialize block header to raw bytes
+        """
+        return self._cached(
+            ("to_bytes", include_signature),
+            lambda: self._to_bytes(include_signature),
+        )
+
+    def _to_bytes(self, include_signature):
+        if config.is_id_full_sha256(self.height - 1):
             if len(self.previous_block) != 64:
                 raise Exception(
                     "Previous block shoud be SHA256, but found a non SHA256 block id"
@@ -203,57 +264,75 @@ class Block(BaseObject):
         else:
             self.previous_block_hex = Block.to_bytes_hex(self.previous_block)
 
-        bytes_data = bytes()
-        bytes_data += write_bit32(self.version)
-        bytes_data += write_bit32(self.timestamp)
-        bytes_data += write_bit32(self.height)
-        bytes_data += unhexlify(self.previous_block_hex)
-        bytes_data += write_bit32(self.number_of_transactions)
-        bytes_data += write_bit64(int(self.total_amount))
-        bytes_data += write_bit64(int(self.total_fee))
-        bytes_data += write_bit64(int(self.reward))
-        bytes_data += write_bit32(self.payload_length)
-        bytes_data += unhexlify(self.payload_hash.encode("utf-8"))
-        bytes_data += unhexlify(self.generator_public_key)
+        writer = ByteWriter()
+        writer.write_struct(_HEADER, self.version, self.timestamp, self.height)
+        writer.write_hex(self.previous_block_hex)
+        writer.write_struct(
+            _TOTALS,
+            self.number_of_transactions,
+            int(self.total_amount),
+            int(self.total_fee),
+            int(self.reward),
+            self.payload_length,
+        )
+        writer.write_hex(self.payload_hash)
+        writer.write_hex(self.generator_public_key)
 
         if include_signature and self.block_signature:
-            bytes_data += unhexlify(self.block_signature.encode("utf-8"))
+            writer.write_hex(self.block_signature)
 
-        return hexlify(bytes_data)
+        return writer.to_bytes()
 
     def serialize_full(self):
+        """Serialize block header and its transactions to hex. Only use this where
+        hex is required (eg. p2p payloads), use `to_bytes_full` everywhere else.
+        """
+        return hexlify(self.to_bytes_full())
+
+    def to_bytes_full(self):
+        """Serialize block header and its transactions to raw bytes
+        """
         if not self.transactions:
             self.transactions = []
         if not self.number_of_transactions:
             self.number_of_transactions = len(self.transactions)
 
-        bytes_data = unhexlify(self.serialize())
-
-        all_transaction_bytes = bytes()
-        for transaction in self.transactions:
-            serialized_transaction = unhexlify(transaction.serialize())
-            bytes_data += write_bit32(len(serialized_transaction))
-            all_transaction_bytes += serialized_transaction
-
-        bytes_data += all_transaction_bytes
-        return hexlify(bytes_data)
+        if isinstance(self.transactions, TransactionBatch):
+            return self.to_bytes() + self.transactions.to_bytes()
+
+        transactions = [transaction.to_bytes() for transaction in self.transactions]
+        writer = ByteWriter()
+        writer.write_bytes(self.to_bytes())
+        for serialized_transaction in transactions:
+            writer.write_uint32(len(serialized_transaction))
+        for serialized_transaction in transactions:
+            writer.write_bytes(serialized_transaction)
+        return writer.to_bytes()
+
+    def _deserialize_transactions(self, buff, lazy):
+        if lazy:
+            self.transactions = TransactionBatch.from_buffer(
+                buff, self.number_of_transactions, trusted=self._trusted
+            )
+            return
 
-    def _deserialize_transactions(self, buff):
         transaction_lenghts = []
         for _ in range(self.number_of_transactions):
             transaction_lenghts.append(buff.pop_uint32())
         self.transactions = []
         for trans_len in transaction_lenghts:
-            serialized_hex = hexlify(buff.pop_bytes(trans_len))
-            self.transactions.append(from_serialized(serialized_hex))
+            # Transactions are decoded from views into the block buffer, so their
+            # bytes are never copied or hexlified
+            self.transactions.append(
+                from_buffer(buff.pop_buffer(trans_len), trusted=self._trusted)
+            )
 
     def _deserialize_previous_block(self, buff):
         """
         For deserializing previous block id, we need to check the milestone for
         previous block
         """
-        milestone = config.get_milestone(self.height - 1)
-        if milestone["block"]["idFullSha256"]:
+        if config.is_id_full_sha256(self.height - 1):
             self.previous_block_hex = hexlify(buff.pop_bytes(32))
             self.previous_block = self.previous_block_hex.decode("utf-8")
         else:
@@ -262,7 +341,9 @@ class Block(BaseObject):
             self.previous_block = str(int(self.previous_block_hex, 16))
 
     def deserialize(self, serialized_hex):
-        buff = ByteBuffer(unhexlify(serialized_hex))
+        self.deserialize_buffer(ByteBuffer(unhexlify(serialized_hex)))
+
+    def deserialize_buffer(self, buff, lazy=False):
         self.version = buff.pop_uint32()
         self.timestamp = buff.pop_uint32()
         self.height = buff.pop_uint32()
@@ -275,12 +356,11 @@ class Block(BaseObject):
         self.payload_hash = hexlify(buff.pop_bytes(32)).decode("utf-8")
         self.generator_public_key = hexlify(buff.pop_bytes(33)).decode("utf-8")
         # TODO: test the case where block signature is not present
-        signature_len = int(hexlify(buff.read_bytes(1, offset=1)), 16)
-        signature_to = signature_len + 2
+        signature_to = buff.read_uint8(offset=1) + 2
         self.block_signature = hexlify(buff.pop_bytes(signature_to)).decode("utf-8")
 
         if len(buff) != 0:
-            self._deserialize_transactions(buff)
+            self._deserialize_transactions(buff, lazy)
         # TODO: implement edge cases (outlookTable thingy) where some block ids are
         # broken
         # const { outlookTable } = configManager.config.exceptions;
@@ -289,20 +369,50 @@ class Block(BaseObject):
         #     block.idHex = Block.toBytesHex(block.id);
         # }
 
-    def verify_signature(self):
-        """Verify signature associated with this block
+    def get_signature_check(self):
+        """Returns the message, signature and public key bytes of the block
+        signature, or None if the block isn't signed
         """
-        bytes_data = unhexlify(self.serialize(include_signature=False))
-        is_verified = verify_hash(
-            bytes_data,
+        if not self.block_signature:
+            return None
+        return (
+            self.to_bytes(include_signature=False),
             unhexlify(self.block_signature.encode("utf-8")),
             unhexlify(self.generator_public_key.encode("utf-8")),
         )
-        return is_verified
 
-    def verify(self):
+    def get_signature_checks(self):
+        """Returns the signature check of the block followed by signature checks of
+        all of its transactions, so they can be verified together with
+        `SignatureVerifier`
+        """
+        transactions = self.transactions
+        if isinstance(transactions, TransactionBatch):
+            transaction_checks = transactions.get_signature_checks()
+        else:
+            transaction_checks = [
+                transaction.get_signature_check() for transaction in transactions
+            ]
+        return [self.get_signature_check()] + transaction_checks
+
+    def verify_signature(self):
+        """Verify signature associated with this block
+        """
+        check = self.get_signature_check()
+        return check is not None and verify_hash(*check)
+
+    def verify(self, signature_results=None):
+        """Verifies the block and its transactions
+
+        :param (list) signature_results: results of verifying
+            `get_signature_checks`, when they were already verified in a batch
+        :returns (tuple): whether the block is valid and a list of errors
+        """
         errors = []
 
+        if signature_results is None:
+            signature_results = get_verifier().verify(self.get_signature_checks())
+
         # TODO: find a better way to get milestone data
         milestone = config.get_milestone(self.height)
         # Check that the previous block is set if it's not a genesis block
@@ -318,7 +428,7 @@ class Block(BaseObject):
             )
 
         # Verify block signature
-        is_valid_signature = self.verify_signature()
+        is_valid_signature = signature_results[0]
         if not is_valid_signature:
             errors.append("Failed to verify block signature")
 
@@ -333,12 +443,20 @@ class Block(BaseObject):
         if is_invalid_timestamp:
             errors.append("Invalid block timestamp")
 
-        # Check if all transactions are valid
-        invalid_transactions = [
-            trans for trans in self.transactions if not trans.verify()
-        ]
+        transactions = self.transactions
+        if isinstance(transactions, TransactionBatch):
+            # Checks are done on the columns of the batch, so transaction objects
+            # are only created for transactions that can't be checked that way
+            transaction_ids = transactions.ids()
+            total_amount = transactions.total_amount()
+            total_fee = transactions.total_fee()
+        else:
+            transaction_ids = [trans.id for trans in transactions]
+            total_amount = sum(trans.amount for trans in transactions)
+            total_fee = sum(trans.fee for trans in transactions)
 
-        if len(invalid_transactions) > 0:
+        # Check if all transactions are valid
+        if not all(signature_results[1:]):
             errors.append("One or more transactions are not verified")
 
         # Check that number of transactions and block.number_of_transactions match
@@ -353,20 +471,14 @@ class Block(BaseObject):
             errors.append("Too many transactions")
 
         # Check if transactions add up to the block values
-        applied_transactions = []
-        total_amount = 0
-        total_fee = 0
-        bytes_data = bytes()
-        for transaction in self.transactions:
-            if transaction.id in applied_transactions:
+        applied_transactions = set()
+        for transaction_id in transaction_ids:
+            if transaction_id in applied_transactions:
                 errors.append(
-                    "Encountered duplicate transaction: {}".format(transaction.id)
+                    "Encountered duplicate transaction: {}".format(transaction_id)
                 )
-
-            applied_transactions.append(transaction.id)
-            total_amount += transaction.amount
-            total_fee += transaction.fee
-            bytes_data += unhexlify(transaction.id)
+            applied_transactions.add(transaction_id)
+        bytes_data = unhexlify("".join(transaction_ids))
 
         if total_amount != self.total_amount:
             errors.append("Invalid total amount")
@@ -382,6 +494,22 @@ class Block(BaseObject):
 
         return len(errors) == 0, errors
 
+    def get_transaction_ids(self):
+        """Returns ids of transactions in the block without decoding transactions
+        that are in a `TransactionBatch`
+        """
+        if isinstance(self.transactions, TransactionBatch):
+            return self.transactions.ids()
+        return [transaction.id for transaction in self.transactions]
+
+    def get_sender_public_keys(self):
+        """Returns sender public keys of transactions in the block without decoding
+        transactions that are in a `TransactionBatch`
+        """
+        if isinstance(self.transactions, TransactionBatch):
+            return self.transactions.sender_public_keys()
+        return [transaction.sender_public_key for transaction in self.transactions]
+
     def get_header(self):
         exclude_fields = ["transactions"]
         data = {}
@@ -393,9 +521,26 @@ class Block(BaseObject):
             data[field.attr] = field.serialize(value)
         return data
 
-    def to_json(self):
+    def get_raw_transactions(self):
+        """Returns serialized transactions of the block without decoding
+        transactions that are in a `TransactionBatch`
+        """
+        if isinstance(self.transactions, TransactionBatch):
+            return [self.transactions.raw(i) for i in range(len(self.transactions))]
+        return [transaction.to_bytes() for transaction in self.transactions]
+
+    def to_json(self, serialized=False):
+        """
+        :param (bool) serialized: return transactions as hex strings instead of
+            dicts
+        """
         # TODO: figure out another name for this as it's not really json, its a
         # dictionary but with the camelcase names as keys
         data = self.get_header()
-        data["transactions"] = [t.to_json() for t in self.transactions]
+        if serialized:
+            data["transactions"] = [
+                hexlify(raw).decode("utf-8") for raw in self.get_raw_transactions()
+            ]
+        else:
+            data["transactions"] = [t.to_json() for t in self.transactions]
         return data
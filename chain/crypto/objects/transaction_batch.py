@@ -0,0 +1,373 @@
+import struct
+from array import array
+from binascii import hexlify
+from hashlib import sha256
+
+from chain.common.config import config
+from chain.crypto.address_codec import addresses_from_bytes
+from chain.crypto.bytebuffer import ByteBuffer
+from chain.crypto.constants import (
+    TRANSACTION_TYPE_DELEGATE_REGISTRATION,
+    TRANSACTION_TYPE_DELEGATE_RESIGNATION,
+    TRANSACTION_TYPE_IPFS,
+    TRANSACTION_TYPE_MULTI_PAYMENT,
+    TRANSACTION_TYPE_MULTI_SIGNATURE,
+    TRANSACTION_TYPE_SECOND_SIGNATURE,
+    TRANSACTION_TYPE_TIMELOCK_TRANSFER,
+    TRANSACTION_TYPE_TRANSFER,
+    TRANSACTION_TYPE_VOTE,
+)
+from chain.crypto.objects.transactions import from_buffer
+from chain.crypto.utils import is_transaction_exception
+from chain.crypto.verifier import get_verifier
+
+# Common header of a serialized transaction: marker, version, network, type,
+# timestamp, sender public key, fee and vendor field length
+_HEADER = struct.Struct("<BBBBI33sQB")
+_UINT32 = struct.Struct("<I")
+_UINT64 = struct.Struct("<Q")
+
+_SENDER_PUBLIC_KEY_OFFSET = 8
+_FEE_OFFSET = 41
+_VENDOR_FIELD_OFFSET = 50
+_VENDOR_FIELD_PADDING = bytes(64)
+# Offsets of the recipient in the type specific data of transfers and timelock
+# transfers
+_RECIPIENT_OFFSETS = {
+    TRANSACTION_TYPE_TRANSFER: 8 + 4,
+    TRANSACTION_TYPE_TIMELOCK_TRANSFER: 8 + 1 + 8,
+}
+
+
+def _parse_asset(data, offset, transaction_type):
+    """Parses amount and length of the type specific data of a transaction without
+    decoding the data itself.
+
+    :param (bytes) data: serialized transactions
+    :param (int) offset: offset at which the type specific data starts
+    :param (int) transaction_type: type of the transaction
+    :returns (tuple): amount and length of the type specific data in bytes
+    """
+    if transaction_type == TRANSACTION_TYPE_TRANSFER:
+        # amount, expiration and recipient
+        return _UINT64.unpack_from(data, offset)[0], 8 + 4 + 21
+    elif transaction_type == TRANSACTION_TYPE_SECOND_SIGNATURE:
+        return 0, 33
+    elif transaction_type == TRANSACTION_TYPE_DELEGATE_REGISTRATION:
+        return 0, 1 + data[offset]
+    elif transaction_type == TRANSACTION_TYPE_VOTE:
+        return 0, 1 + data[offset] * 34
+    elif transaction_type == TRANSACTION_TYPE_MULTI_SIGNATURE:
+        # min, number of keys and lifetime followed by the keys
+        return 0, 3 + data[offset + 1] * 33
+    elif transaction_type == TRANSACTION_TYPE_IPFS:
+        return 0, 1 + data[offset]
+    elif transaction_type == TRANSACTION_TYPE_TIMELOCK_TRANSFER:
+        # amount, timelock type, timelock and recipient
+        return _UINT64.unpack_from(data, offset)[0], 8 + 1 + 8 + 21
+    elif transaction_type == TRANSACTION_TYPE_MULTI_PAYMENT:
+        total = _UINT32.unpack_from(data, offset)[0]
+        amount = 0
+        for index in range(total):
+            amount += _UINT64.unpack_from(data, offset + 4 + index * 29)[0]
+        return amount, 4 + total * 29
+    elif transaction_type == TRANSACTION_TYPE_DELEGATE_RESIGNATION:
+        return 0, 0
+    raise ValueError(
+        "Couldn't find transaction type {} in mapping".format(transaction_type)
+    )
+
+
+class TransactionBatch(object):
+    """Columnar view over the serialized transactions of a block.
+
+    Decoding only parses the fixed fields of every transaction into ``array``
+    columns, so totals can be calculated and ids and signatures of transfers can be
+    checked without creating transaction objects. Transaction objects are created
+    on first access by index or iteration, which allows the batch to be used in
+    place of the list of transactions on a block. Transactions that are never
+    accessed are passed through to `to_bytes` and `raw` as they were received.
+
+    :param (bytes) data: serialized transactions, one after another
+    :param (list) lengths: length of each serialized transaction
+    :param (bool) trusted: create trusted transaction objects, see `BaseObject`
+    """
+
+    def __init__(self, data, lengths, trusted=False):
+        super().__init__()
+        self.data = data
+        self.trusted = trusted
+        self.starts = array("I")
+        self.ends = array("I")
+        self.versions = array("B")
+        self.types = array("B")
+        self.timestamps = array("I")
+        self.fees = array("Q")
+        self.amounts = array("Q")
+        self.asset_offsets = array("I")
+        self.signature_offsets = array("I")
+
+        self._block_id = None
+        self._ids = None
+        self._replaced = False
+        self._transactions = [None] * len(lengths)
+
+        offset = 0
+        for length in lengths:
+            self._add_columns(offset, offset + length)
+            offset += length
+
+    @classmethod
+    def from_buffer(cls, buff, number_of_transactions, trusted=False):
+        """Creates a batch from a buffer positioned at the transaction lengths of a
+        serialized block.
+
+        :param (ByteBuffer) buff: buffer with the transaction part of a block
+        :param (int) number_of_transactions: number of transactions in the block
+        :param (bool) trusted: create trusted transaction objects
+        """
+        lengths = struct.unpack(
+            "<{}I".format(number_of_transactions),
+            buff.pop_bytes(4 * number_of_transactions),
+        )
+        data = buff.pop_bytes(sum(lengths))
+        return cls(data, lengths, trusted=trusted)
+
+    @classmethod
+    def from_raw(cls, transactions, trusted=False):
+        """Creates a batch from a list of serialized transactions
+
+        :param (list) transactions: list of raw (not hexlified) transactions
+        :param (bool) trusted: create trusted transaction objects
+        """
+        lengths = [len(transaction) for transaction in transactions]
+        return cls(b"".join(transactions), lengths, trusted=trusted)
+
+    def _add_columns(self, start, end):
+        header = _HEADER.unpack_from(self.data, start)
+        _, version, _, transaction_type, timestamp, _, fee, vendor_length = header
+        asset_offset = start + _VENDOR_FIELD_OFFSET + vendor_length
+        amount, asset_length = _parse_asset(self.data, asset_offset, transaction_type)
+
+        self.starts.append(start)
+        self.ends.append(end)
+        self.versions.append(version)
+        self.types.append(transaction_type)
+        self.timestamps.append(timestamp)
+        self.fees.append(fee)
+        self.amounts.append(amount)
+        self.asset_offsets.append(asset_offset)
+        self.signature_offsets.append(asset_offset + asset_length)
+
+    def __len__(self):
+        return len(self._transactions)
+
+    def __getitem__(self, index):
+        transaction = self._transactions[index]
+        if transaction is None:
+            transaction = self._decode(index)
+        return transaction
+
+    def __setitem__(self, index, transaction):
+        self._transactions[index] = transaction
+        self._ids = None
+        self._replaced = True
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def block_id(self):
+        return self._block_id
+
+    @block_id.setter
+    def block_id(self, value):
+        """Sets block id on all transaction objects, including the ones that are
+        created later
+        """
+        self._block_id = value
+        for transaction in self._transactions:
+            if transaction is not None:
+                transaction.block_id = value
+
+    def _decode(self, index):
+        view = memoryview(self.data)[self.starts[index] : self.ends[index]]
+        transaction = from_buffer(ByteBuffer(view), trusted=self.trusted)
+        transaction.block_id = self._block_id
+        transaction.sequence = index
+        self._transactions[index] = transaction
+        return transaction
+
+    def raw(self, index):
+        """Returns serialized bytes of the transaction at `index`"""
+        transaction = self._transactions[index]
+        if transaction is not None:
+            # Decoded transactions keep their original bytes cached, but entries
+            # could also be replaced with a different transaction
+            return transaction.to_bytes()
+        return self.data[self.starts[index] : self.ends[index]]
+
+    def to_bytes(self):
+        """Returns transaction lengths followed by the serialized transactions, as
+        they are laid out in a serialized block
+        """
+        if self._replaced:
+            transactions = [self.raw(index) for index in range(len(self))]
+            lengths = [len(transaction) for transaction in transactions]
+            data = b"".join(transactions)
+        else:
+            lengths = [end - start for start, end in zip(self.starts, self.ends)]
+            data = self.data
+        return struct.pack("<{}I".format(len(lengths)), *lengths) + data
+
+    def recipient_ids(self):
+        """Returns recipient ids of all transactions in the batch, None for
+        transactions without a single recipient
+        """
+        recipient_ids = [None] * len(self)
+        indexes = []
+        payloads = []
+        for index, transaction in enumerate(self._transactions):
+            if transaction is not None:
+                recipient_ids[index] = transaction.recipient_id
+                continue
+            recipient_offset = _RECIPIENT_OFFSETS.get(self.types[index])
+            if recipient_offset is not None:
+                start = self.asset_offsets[index] + recipient_offset
+                indexes.append(index)
+                payloads.append(self.data[start : start + 21])
+
+        for index, recipient_id in zip(indexes, addresses_from_bytes(payloads)):
+            recipient_ids[index] = recipient_id
+        return recipient_ids
+
+    def sender_public_keys(self):
+        """Returns sender public keys of all transactions in the batch"""
+        sender_public_keys = []
+        for index, transaction in enumerate(self._transactions):
+            if transaction is not None:
+                sender_public_keys.append(transaction.sender_public_key)
+                continue
+            start = self.starts[index] + _SENDER_PUBLIC_KEY_OFFSET
+            sender_public_keys.append(
+                hexlify(self.data[start : start + 33]).decode("utf-8")
+            )
+        return sender_public_keys
+
+    def total_amount(self):
+        return sum(self.amounts)
+
+    def total_fee(self):
+        return sum(self.fees)
+
+    def _signatures(self, index):
+        """Returns signature and second signature of the transaction, or None if
+        they're not present
+        """
+        data = self.data
+        offset = self.signature_offsets[index]
+        end = self.ends[index]
+        if offset >= end:
+            return None, None
+        signature_end = offset + data[offset + 1] + 2
+        signature = data[offset:signature_end]
+        if signature_end >= end or data[signature_end] == 0xFF:
+            return signature, None
+        second_signature_end = signature_end + data[signature_end + 1] + 2
+        return signature, data[signature_end:second_signature_end]
+
+    def _can_use_columns(self, index):
+        return (
+            self._transactions[index] is None
+            and self.versions[index] == 1
+            and self.types[index] == TRANSACTION_TYPE_TRANSFER
+            and self._has_valid_vendor_field(index)
+        )
+
+    def _has_valid_vendor_field(self, index):
+        """Returns whether the vendor field is valid utf-8, transactions with an
+        invalid one fail to decode as objects and have no id
+        """
+        start = self.starts[index] + _VENDOR_FIELD_OFFSET
+        try:
+            str(self.data[start : self.asset_offsets[index]], "utf-8")
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _legacy_bytes(self, index, include_signatures):
+        """Builds the same bytes as `BaseTransaction.get_bytes` for a version 1
+        transfer that is not an exception, directly from the serialized data
+        """
+        data = self.data
+        start = self.starts[index]
+        asset_offset = self.asset_offsets[index]
+        vendor_field = data[start + _VENDOR_FIELD_OFFSET : asset_offset]
+
+        parts = [
+            data[start + 3 : start + _SENDER_PUBLIC_KEY_OFFSET],  # type, timestamp
+            data[start + _SENDER_PUBLIC_KEY_OFFSET : start + _FEE_OFFSET],
+            data[asset_offset + 12 : asset_offset + 33],  # recipient
+            vendor_field,
+            _VENDOR_FIELD_PADDING[len(vendor_field) :],
+            data[asset_offset : asset_offset + 8],  # amount
+            data[start + _FEE_OFFSET : start + _FEE_OFFSET + 8],
+        ]
+        if include_signatures:
+            signature, second_signature = self._signatures(index)
+            if signature:
+                parts.append(signature)
+            if second_signature:
+                parts.append(second_signature)
+        return b"".join(parts)
+
+    def ids(self):
+        """Returns ids of all transactions in the batch"""
+        if self._ids is None:
+            fix_table = config.transaction_id_fix_table
+            ids = []
+            for index in range(len(self)):
+                if self._can_use_columns(index):
+                    transaction_id = sha256(
+                        self._legacy_bytes(index, include_signatures=True)
+                    ).hexdigest()
+                    ids.append(fix_table.get(transaction_id, transaction_id))
+                else:
+                    ids.append(self[index].id)
+            self._ids = ids
+        return self._ids
+
+    def get_signature_checks(self):
+        """Returns signature checks of all transactions in the batch, see
+        `BaseTransaction.get_signature_check`
+        """
+        checks = []
+        for index, transaction_id in enumerate(self.ids()):
+            if self._can_use_columns(index) and not is_transaction_exception(
+                transaction_id
+            ):
+                signature, _ = self._signatures(index)
+                start = self.starts[index]
+                checks.append(
+                    (
+                        self._legacy_bytes(index, include_signatures=False),
+                        signature,
+                        self.data[
+                            start + _SENDER_PUBLIC_KEY_OFFSET : start + _FEE_OFFSET
+                        ],
+                    )
+                    if signature
+                    else None
+                )
+            else:
+                checks.append(self[index].get_signature_check())
+        return checks
+
+    def verify_signatures(self):
+        """Verifies signatures of all transactions in the batch
+
+        :returns (list): indexes of transactions that failed to verify
+        """
+        results = get_verifier().verify(self.get_signature_checks())
+        return [index for index, is_verified in enumerate(results) if not is_verified]
@@ -43,16 +43,26 @@ def from_serialized(serialized_hex):
     if not isinstance(serialized_hex, bytes):
         raise TypeError("serialized_hex must be bytes")
 
-    buff = ByteBuffer(unhexlify(serialized_hex))
-    buff.pop_bytes(3)  # skip first 3 bytes (marker, version and network)
-    transaction_type = buff.pop_uint8()
+    return from_bytes(unhexlify(serialized_hex))
+
+
+def from_bytes(data, trusted=False):
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise TypeError("data must be bytes")
+
+    return from_buffer(ByteBuffer(data), trusted=trusted)
+
+
+def from_buffer(buff, trusted=False):
+    # skip first 3 bytes (marker, version and network) to get to the type
+    transaction_type = buff.read_uint8(offset=3)
 
     transaction_cls = TRANSACTION_TYPE_MAPPING.get(transaction_type)
     if not transaction_cls:
         raise ValueError(
             "Couldn't find transaction type {} in mapping".format(transaction_type)
         )
-    return transaction_cls.from_serialized(serialized_hex)
+    return transaction_cls.from_buffer(buff, trusted=trusted)
 
 
 def from_dict(data):
@@ -67,10 +77,10 @@ def from_dict(data):
     return transaction_cls.from_dict(data)
 
 
-def from_object(data):
+def from_object(data, trusted=False):
     transaction_cls = TRANSACTION_TYPE_MAPPING.get(data.type)
     if not transaction_cls:
         raise ValueError(
             "Couldn't find transaction type {} in mapping".format(data.type)
         )
-    return transaction_cls.from_object(data)
+    return transaction_cls.from_object(data, trusted=trusted)
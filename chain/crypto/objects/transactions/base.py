@@ -1,18 +1,20 @@
 import logging
 from binascii import hexlify, unhexlify
 from hashlib import sha256
-from struct import pack
+import struct
 
 from chain.crypto.objects.base import BaseObject
 
-from base58 import b58decode_check, b58encode_check
-
-from binary.hex import write_high
-from binary.unsigned_integer import write_bit32, write_bit64, write_bit8
-
 from chain.common.config import config
 from chain.crypto.address import address_from_public_key
+from chain.crypto.address_codec import (
+    address_from_bytes,
+    address_to_bytes,
+    addresses_from_bytes,
+    addresses_to_bytes,
+)
 from chain.crypto.bytebuffer import ByteBuffer
+from chain.crypto.bytewriter import ByteWriter
 from chain.crypto.constants import (
     TRANSACTION_TYPE_DELEGATE_REGISTRATION,
     TRANSACTION_TYPE_DELEGATE_RESIGNATION,
@@ -37,6 +39,17 @@ from chain.crypto.utils import is_transaction_exception, verify_hash
 
 logger = logging.getLogger(__name__)
 
+# Marker, version, network, type and timestamp of a serialized transaction
+_HEADER = struct.Struct("<BBBBI")
+# Type and timestamp at the start of the legacy (get_bytes) serialization
+_LEGACY_HEADER = struct.Struct("<BI")
+_AMOUNT_AND_FEE = struct.Struct("<QQ")
+_AMOUNT_AND_EXPIRATION = struct.Struct("<QI")
+# Min, number of keys and lifetime of a multi signature registration
+_MULTI_SIGNATURE = struct.Struct("<BBB")
+# Amount, timelock type and timelock of a timelock transfer
+_TIMELOCK = struct.Struct("<QBQ")
+
 
 class BaseTransaction(BaseObject):
     version = IntField(attr="version", required=False, default=None)
@@ -50,13 +63,19 @@ class BaseTransaction(BaseObject):
     recipient_id = StrField(attr="recipientId", required=False, default=None)
     asset = DictField(attr="asset", required=False)
     vendor_field = StrField(attr="vendorField", required=False, default=None)
-    id = StrField(attr="id", required=False, default=None)
+    # id, block_id and sequence are derived from (or assigned after) the bytes of the
+    # transaction, so setting them doesn't invalidate cached bytes and hashes
+    id = StrField(attr="id", required=False, default=None, invalidates_cache=False)
     signature = StrField(attr="signature", required=False, default=None)
     second_signature = StrField(attr="secondSignature", required=False, default=None)
     sign_signature = StrField(attr="signSignature", required=False, default=None)
     signatures = ListField(attr="signatures", required=False)
-    block_id = StrField(attr="blockId", required=False, default=None)
-    sequence = IntField(attr="sequence", required=False, default=0)
+    block_id = StrField(
+        attr="blockId", required=False, default=None, invalidates_cache=False
+    )
+    sequence = IntField(
+        attr="sequence", required=False, default=0, invalidates_cache=False
+    )
     # TODO: What kind of a field is this?
     timelock = Field(attr="timelock", required=False, default=None)
     timelock_type = IntField(attr="timelockType", required=False, default=None)
@@ -81,10 +100,33 @@ class BaseTransaction(BaseObject):
     def from_serialized(cls, bytes_string):
         if not isinstance(bytes_string, bytes):
             raise TypeError("bytes_string must be bytes")
-        cls = cls()
-        cls.deserialize(bytes_string)
-        cls._construct_common()
+        return cls.from_bytes(unhexlify(bytes_string))
+
+    @classmethod
+    def from_bytes(cls, data, trusted=False):
+        """Creates a transaction from raw (not hexlified) serialized bytes.
+
+        :param (bytes) data: serialized transaction as returned by `to_bytes`
+        :param (bool) trusted: skip validation of values, see `BaseObject`
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError("data must be bytes")
+        return cls.from_buffer(ByteBuffer(data), trusted=trusted)
 
+    @classmethod
+    def from_buffer(cls, buff, trusted=False):
+        """Creates a transaction from a ByteBuffer positioned at the start of a
+        serialized transaction.
+
+        :param (ByteBuffer) buff: buffer holding exactly one serialized transaction
+        :param (bool) trusted: skip validation of values, see `BaseObject`
+        """
+        data = buff.read_bytes(len(buff))
+        cls = cls(trusted=trusted)
+        cls.deserialize_buffer(buff)
+
+        # Fill defaults before the id is calculated, as setting fields clears the
+        # cached hashes
         for field in cls._fields:
             value = getattr(cls, field.name, None)
             if value is None:
@@ -92,12 +134,15 @@ class BaseTransaction(BaseObject):
                     raise ValueError("Attribute {} is required".format(field.name))
                 else:
                     setattr(cls, field.name, field.default)
+        cls._construct_common()
+        # Keep the received bytes, so serializing the transaction again passes
+        # them through instead of encoding it from its fields
+        cls._cached("to_bytes", lambda: data)
         return cls
 
     @classmethod
-    def from_object(cls, data):
-        print(data.__dict__)
-        cls = cls(instance=data)
+    def from_object(cls, data, trusted=False):
+        cls = cls(instance=data, trusted=trusted)
         cls._construct_common()
         return cls
 
@@ -111,45 +156,47 @@ class BaseTransaction(BaseObject):
     def _serialize_vendor_field(self):
         """Serialize vendor field of the transaction
         """
-        bytes_data = bytes()
+        writer = ByteWriter()
+        self._write_vendor_field(writer)
+        return writer.to_bytes()
+
+    def _write_vendor_field(self, writer):
         if BaseTransaction.can_have_vendor_field(self.type) and self.vendor_field:
             data = self.vendor_field.encode("utf-8")
-            bytes_data += write_bit8(len(data))
-            bytes_data += data
-            return bytes_data
+            writer.write_uint8(len(data))
+            writer.write_bytes(data)
         else:
-            bytes_data += write_bit8(0x00)
-            return bytes_data
+            writer.write_uint8(0x00)
 
     def _serialize_type(self):
         """Serialize transaction specific data (eg. delegate registration)
         """
-        bytes_data = bytes()
+        writer = ByteWriter()
+        self._write_type(writer)
+        return writer.to_bytes()
 
+    def _write_type(self, writer):
         if self.type == TRANSACTION_TYPE_TRANSFER:
-            bytes_data += write_bit64(self.amount)
-            bytes_data += write_bit32(self.expiration or 0)
-            bytes_data += write_high(hexlify(b58decode_check(self.recipient_id)))
+            writer.write_struct(
+                _AMOUNT_AND_EXPIRATION, self.amount, self.expiration or 0
+            )
+            writer.write_bytes(address_to_bytes(self.recipient_id))
 
         elif self.type == TRANSACTION_TYPE_SECOND_SIGNATURE:
-            bytes_data += unhexlify(
-                self.asset["signature"]["publicKey"].encode("utf-8")
-            )
+            writer.write_hex(self.asset["signature"]["publicKey"])
 
         elif self.type == TRANSACTION_TYPE_DELEGATE_REGISTRATION:
-            delegate_bytes = hexlify(self.asset["delegate"]["username"].encode("utf-8"))
-            bytes_data += write_bit8(len(delegate_bytes))
-            bytes_data += unhexlify(delegate_bytes)
+            delegate_bytes = self.asset["delegate"]["username"].encode("utf-8")
+            # Length is written in hex characters, as it was in the original
+            # implementation
+            writer.write_uint8(len(delegate_bytes) * 2)
+            writer.write_bytes(delegate_bytes)
 
         elif self.type == TRANSACTION_TYPE_VOTE:
-            vote_bytes = []
+            writer.write_uint8(len(self.asset["votes"]))
             for vote in self.asset["votes"]:
-                if vote.startswith("+"):
-                    vote_bytes.append("01{}".format(vote[1:]))
-                else:
-                    vote_bytes.append("00{}".format(vote[1:]))
-            bytes_data += write_bit8(len(self.asset["votes"]))
-            bytes_data += unhexlify("".join(vote_bytes))
+                writer.write_uint8(0x01 if vote.startswith("+") else 0x00)
+                writer.write_hex(vote[1:])
 
         elif self.type == TRANSACTION_TYPE_MULTI_SIGNATURE:
             keysgroup = []
@@ -159,77 +206,97 @@ class BaseTransaction(BaseObject):
             else:
                 keysgroup = self.asset["multisignature"]["keysgroup"]
 
-            bytes_data += write_bit8(self.asset["multisignature"]["min"])
-            bytes_data += write_bit8(len(self.asset["multisignature"]["keysgroup"]))
-            bytes_data += write_bit8(self.asset["multisignature"]["lifetime"])
-            bytes_data += unhexlify("".join(keysgroup).encode("utf-8"))
+            writer.write_struct(
+                _MULTI_SIGNATURE,
+                self.asset["multisignature"]["min"],
+                len(self.asset["multisignature"]["keysgroup"]),
+                self.asset["multisignature"]["lifetime"],
+            )
+            writer.write_hex("".join(keysgroup))
 
         elif self.type == TRANSACTION_TYPE_IPFS:
-            bytes_data += write_bit8(len(self.asset["ipfs"]["dag"]) // 2)
-            bytes_data += unhexlify(self.asset["ipfs"]["dag"])
+            writer.write_uint8(len(self.asset["ipfs"]["dag"]) // 2)
+            writer.write_hex(self.asset["ipfs"]["dag"])
 
         elif self.type == TRANSACTION_TYPE_TIMELOCK_TRANSFER:
-            bytes_data += write_bit64(self.amount)
-            bytes_data += write_bit8(self.timelock_type)
-            bytes_data += write_bit64(self.timelock)
-            bytes_data += b58decode_check(self.recipient_id)
+            writer.write_struct(
+                _TIMELOCK, self.amount, self.timelock_type, self.timelock
+            )
+            writer.write_bytes(address_to_bytes(self.recipient_id))
 
         elif self.type == TRANSACTION_TYPE_MULTI_PAYMENT:
-            bytes_data += write_bit32(len(self.asset["payments"]))
-            for payment in self.asset["payments"]:
-                bytes_data += write_bit64(payment["amount"])
-                bytes_data += b58decode_check(payment["recipientId"])
+            payments = self.asset["payments"]
+            recipients = addresses_to_bytes(
+                [payment["recipientId"] for payment in payments]
+            )
+            writer.write_uint32(len(payments))
+            for payment, recipient in zip(payments, recipients):
+                writer.write_uint64(payment["amount"])
+                writer.write_bytes(recipient)
 
         elif self.type == TRANSACTION_TYPE_DELEGATE_RESIGNATION:
             pass
         else:
             raise Exception("Transaction type is invalid")  # TODO: better exception
-        return bytes_data
 
     def _serialize_signatures(self):
         """Serialize signature data of the transaction
         """
-        bytes_data = bytes()
+        writer = ByteWriter()
+        self._write_signatures(writer)
+        return writer.to_bytes()
+
+    def _write_signatures(self, writer):
         if self.signature:
-            bytes_data += unhexlify(self.signature)
+            writer.write_hex(self.signature)
 
             if self.second_signature:
-                bytes_data += unhexlify(self.second_signature)
+                writer.write_hex(self.second_signature)
             elif self.sign_signature:
-                bytes_data += unhexlify(self.sign_signature)
+                writer.write_hex(self.sign_signature)
 
             if self.signatures:
                 # add 0xff separator to signal start of multi-signature transactions
-                bytes_data += write_bit8(0xFF)
-                bytes_data += unhexlify("".join(self.signatures))
-
-        return bytes_data
+                writer.write_uint8(0xFF)
+                writer.write_hex("".join(self.signatures))
 
     def serialize(self):
-        """Serialize Transaction
+        """Serialize Transaction to hex. Only use this where hex is required (eg.
+        p2p payloads), use `to_bytes` everywhere else.
         """
-        bytes_data = bytes()  # bytes() or bytes(512)?
-        bytes_data += write_bit8(0xFF)  # fill, to distinguish between v1 and v2
-        bytes_data += write_bit8(self.version or 0x01)
-        bytes_data += write_bit8(self.network or config.network["pubKeyHash"])
-        bytes_data += write_bit8(self.type)
-        bytes_data += write_bit32(self.timestamp)
-        bytes_data += write_high(self.sender_public_key.encode("utf-8"))
-        bytes_data += write_bit64(self.fee)
+        return hexlify(self.to_bytes())
+
+    def to_bytes(self):
+        """Serialize Transaction to raw bytes
+        """
+        return self._cached("to_bytes", self._to_bytes)
+
+    def _to_bytes(self):
+        writer = ByteWriter()
+        writer.write_struct(
+            _HEADER,
+            0xFF,  # fill, to distinguish between v1 and v2
+            self.version or 0x01,
+            self.network or config.network["pubKeyHash"],
+            self.type,
+            self.timestamp,
+        )
+        writer.write_hex(self.sender_public_key)
+        writer.write_uint64(self.fee)
 
         # TODO: test this thorougly as it might be completely wrong
-        bytes_data += self._serialize_vendor_field()
-        bytes_data += self._serialize_type()
-        bytes_data += self._serialize_signatures()
+        self._write_vendor_field(writer)
+        self._write_type(writer)
+        self._write_signatures(writer)
 
-        return hexlify(bytes_data)
+        return writer.to_bytes()
 
     def _deserialize_type(self, buff):
         # TODO: test this extensively
         if self.type == TRANSACTION_TYPE_TRANSFER:
             self.amount = buff.pop_uint64()
             self.expiration = buff.pop_uint32()
-            self.recipient_id = b58encode_check(buff.pop_bytes(21)).decode("utf-8")
+            self.recipient_id = address_from_bytes(buff.pop_bytes(21))
 
         elif self.type == TRANSACTION_TYPE_SECOND_SIGNATURE:
             self.asset["signature"] = {
@@ -271,24 +338,22 @@ class BaseTransaction(BaseObject):
             self.amount = buff.pop_uint64()
             self.timelock_type = buff.pop_uint8()
             self.timelock = buff.pop_uint64()
-            self.recipient_id = b58encode_check(buff.pop_bytes(21)).decode("utf-8")
+            self.recipient_id = address_from_bytes(buff.pop_bytes(21))
 
         elif self.type == TRANSACTION_TYPE_MULTI_PAYMENT:
-            self.asset["payments"] = []
             total = buff.pop_uint32()
-            amount = 0
+            amounts = []
+            recipients = []
             for _ in range(total):
-                payment_amount = buff.pop_uint64()
-                self.asset["payments"].append(
-                    {
-                        "amount": payment_amount,
-                        "recipientId": b58encode_check(buff.pop_bytes(21)).decode(
-                            "utf-8"
-                        ),
-                    }
+                amounts.append(buff.pop_uint64())
+                recipients.append(buff.pop_bytes(21))
+            self.asset["payments"] = [
+                {"amount": amount, "recipientId": recipient_id}
+                for amount, recipient_id in zip(
+                    amounts, addresses_from_bytes(recipients)
                 )
-                amount += payment_amount
-            self.amount = amount
+            ]
+            self.amount = sum(amounts)
 
         elif self.type == TRANSACTION_TYPE_DELEGATE_RESIGNATION:
             pass
@@ -299,7 +364,7 @@ class BaseTransaction(BaseObject):
         if self.version == 1:
             self._deserialize_ECDSA(buff)
         else:
-            raise Exception('only v1 is supported atm')
+            raise Exception("only v1 is supported atm")
         #     self._deserialize_schnorr(buff)
 
     def _deserialize_ECDSA(self, buff):
@@ -308,7 +373,7 @@ class BaseTransaction(BaseObject):
         # hexlify(buff.pop_bytes(33)).decode("utf-8")
 
         if len(buff) > 0:
-            signature_length = int(hexlify(buff.read_bytes(1, offset=1)), 16) + 2
+            signature_length = buff.read_uint8(offset=1) + 2
             self.signature = hexlify(buff.pop_bytes(signature_length)).decode("utf-8")
 
         # Second signature
@@ -319,17 +384,13 @@ class BaseTransaction(BaseObject):
                 # Multiple signatures
                 self.signatures = []
                 while len(buff) > 0:
-                    multi_signature_length = (
-                        int(hexlify(buff.read_bytes(1, offset=1)), 16) + 2
-                    )
+                    multi_signature_length = buff.read_uint8(offset=1) + 2
                     self.signatures.append(
                         hexlify(buff.pop_bytes(multi_signature_length)).decode("utf-8")
                     )
             else:
                 # Second signature
-                second_signature_length = (
-                    int(hexlify(buff.read_bytes(1, offset=1)), 16) + 2
-                )
+                second_signature_length = buff.read_uint8(offset=1) + 2
                 self.second_signature = hexlify(
                     buff.pop_bytes(second_signature_length)
                 ).decode("utf-8")
@@ -355,9 +416,13 @@ class BaseTransaction(BaseObject):
                     key = "+{}".format(key)
                 keysgroup.append(key)
             self.asset["multisignature"]["keysgroup"] = keysgroup
+            # asset was changed in place
+            self.invalidate_cache()
 
     def deserialize(self, serialized_hex):
-        buff = ByteBuffer(unhexlify(serialized_hex))
+        self.deserialize_buffer(ByteBuffer(unhexlify(serialized_hex)))
+
+    def deserialize_buffer(self, buff):
         buff.pop_bytes(1)  # skip 0xFF marker
         self.version = buff.pop_uint8()
         self.network = buff.pop_uint8()
@@ -379,14 +444,23 @@ class BaseTransaction(BaseObject):
         """
         Serializes the given transaction prior to AIP11 (legacy).
         """
-        # TODO: rename to to_bytes which makes more sense than get_bytes
+        # Bytes differ for transactions that are defined as exceptions and the id
+        # does not invalidate the cache, so it's a part of the key
+        is_exception = is_transaction_exception(self.id)
+        return self._cached(
+            ("get_bytes", skip_signature, skip_second_signature, is_exception),
+            lambda: self._get_bytes(
+                skip_signature, skip_second_signature, is_exception
+            ),
+        )
+
+    def _get_bytes(self, skip_signature, skip_second_signature, is_exception):
         if self.version and self.version != 1:
             raise Exception("Invalid transaction version")  # TODO: better exception
 
-        bytes_data = bytes()
-        bytes_data += write_bit8(self.type)
-        bytes_data += write_bit32(self.timestamp)
-        bytes_data += write_high(self.sender_public_key)
+        writer = ByteWriter()
+        writer.write_struct(_LEGACY_HEADER, self.type, self.timestamp)
+        writer.write_hex(self.sender_public_key)
 
         # Apply a fix for broken type 1 (second signature) and 4 (multi signature)
         # transactions, which were erroneously calculated with a recipient id,
@@ -396,61 +470,70 @@ class BaseTransaction(BaseObject):
             TRANSACTION_TYPE_MULTI_SIGNATURE,
         ]
 
-        if not self.recipient_id or (
-            is_transaction_exception(self.id) or is_broken_type
-        ):
-            bytes_data += pack("21x")
+        if not self.recipient_id or is_exception or is_broken_type:
+            writer.write_zeros(21)
         else:
-            bytes_data += b58decode_check(self.recipient_id)
+            writer.write_bytes(address_to_bytes(self.recipient_id))
 
         if self.vendor_field:
             encoded_vendor_field = self.vendor_field.encode("utf-8")
-            bytes_data += encoded_vendor_field
+            writer.write_bytes(encoded_vendor_field)
             num_of_zeroes = 64 - len(encoded_vendor_field)
             if num_of_zeroes > 0:
-                bytes_data += pack("{}x".format(num_of_zeroes))
+                writer.write_zeros(num_of_zeroes)
         else:
-            bytes_data += pack("64x")
+            writer.write_zeros(64)
 
-        bytes_data += write_bit64(self.amount)
-        bytes_data += write_bit64(self.fee)
+        writer.write_struct(_AMOUNT_AND_FEE, self.amount, self.fee)
 
         if self.type == TRANSACTION_TYPE_SECOND_SIGNATURE:
-            public_key = self.asset["signature"]["publicKey"]
-            bytes_data += unhexlify(public_key)
+            writer.write_hex(self.asset["signature"]["publicKey"])
         elif self.type == TRANSACTION_TYPE_DELEGATE_REGISTRATION:
-            bytes_data += self.asset["delegate"]["username"].encode()
+            writer.write_bytes(self.asset["delegate"]["username"].encode())
         elif self.type == TRANSACTION_TYPE_VOTE:
-            bytes_data += "".join(self.asset["votes"]).encode()
+            writer.write_bytes("".join(self.asset["votes"]).encode())
         elif self.type == TRANSACTION_TYPE_MULTI_SIGNATURE:
-            bytes_data += write_bit8(self.asset["multisignature"]["min"])
-            bytes_data += write_bit8(self.asset["multisignature"]["lifetime"])
-            bytes_data += "".join(self.asset["multisignature"]["keysgroup"]).encode()
+            writer.write_uint8(self.asset["multisignature"]["min"])
+            writer.write_uint8(self.asset["multisignature"]["lifetime"])
+            writer.write_bytes(
+                "".join(self.asset["multisignature"]["keysgroup"]).encode()
+            )
 
         if not skip_signature and self.signature:
-            bytes_data += write_high(self.signature)
+            writer.write_hex(self.signature)
 
         if not skip_second_signature and self.sign_signature:
-            bytes_data += write_high(self.sign_signature)
+            writer.write_hex(self.sign_signature)
 
-        return bytes_data
+        return writer.to_bytes()
 
-    def verify(self):
+    def get_signature_check(self):
+        """Returns what `verify` checks, so it can be verified in a batch with
+        `SignatureVerifier`
+
+        :returns (tuple): message, signature and public key bytes, or None if the
+            transaction can't be verified
+        """
         if self.version and self.version != 1:
-            return False
+            return None
 
         if not self.signature:
-            return False
+            return None
 
         transaction_bytes = self.get_bytes(
             skip_signature=True, skip_second_signature=True
         )
-        is_verified = verify_hash(
+        return (
             transaction_bytes,
             unhexlify(self.signature.encode("utf-8")),
             unhexlify(self.sender_public_key.encode("utf-8")),
         )
-        return is_verified
+
+    def verify(self):
+        check = self.get_signature_check()
+        if check is None:
+            return False
+        return verify_hash(*check)
 
     def verify_second_signature(self, public_key):
         if self.version and self.version != 1:
@@ -475,22 +558,27 @@ class BaseTransaction(BaseObject):
 
         :returns (str): transaction hash
         """
-        transaction_bytes = self.get_bytes()
-        return sha256(transaction_bytes).hexdigest()
+        return self._cached(
+            ("get_hash", is_transaction_exception(self.id)),
+            lambda: sha256(self.get_bytes()).hexdigest(),
+        )
 
     def get_id(self):
         """Generates an ID for current transaction from bytes
 
         :returns (str): transaction id
         """
+        return self._cached(("get_id", is_transaction_exception(self.id)), self._get_id)
+
+    def _get_id(self):
         transaction_id = self.get_hash()
 
         # Some transactions in the past might have erroneously calculated IDs
         # so if they are defined as exceptions, override the ID with the one defined
         # in exceptions
-        exceptions = config.exceptions.get("transactionIdFixTable", {})
-        if transaction_id in exceptions:
-            transaction_id = exceptions[transaction_id]
+        fix_table = config.transaction_id_fix_table
+        if transaction_id in fix_table:
+            transaction_id = fix_table[transaction_id]
 
         return transaction_id
 
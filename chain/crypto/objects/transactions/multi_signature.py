@@ -1,7 +1,8 @@
 import logging
 from binascii import unhexlify
+from hashlib import sha256
 
-from chain.crypto.utils import verify_hash
+from chain.crypto.utils import get_public_key
 
 from .base import BaseTransaction
 
@@ -9,38 +10,70 @@ logger = logging.getLogger(__name__)
 
 
 class MultiSignatureTransaction(BaseTransaction):
-    def _verify_transaction_signatures(self, public_key):
-        for signature in self.signatures:
-            transaction_bytes = self.get_bytes(
-                skip_signature=True, skip_second_signature=True
-            )
-            is_verified = verify_hash(
-                transaction_bytes,
-                unhexlify(signature.encode("utf-8")),
-                unhexlify(public_key.encode("utf-8")),
-            )
-            if is_verified:
-                return signature
+    def get_keysgroup(self):
+        """Returns parsed public keys of the keysgroup, without the "+" prefixes
+        used by version 1 transactions
+
+        :returns (list): coincurve public keys
+        """
+        return self._cached("get_keysgroup", self._get_keysgroup)
+
+    def _get_keysgroup(self):
+        keysgroup = []
+        for key in self.asset["multisignature"]["keysgroup"]:
+            if key.startswith("+"):
+                key = key[1:]
+            keysgroup.append(get_public_key(unhexlify(key.encode("utf-8"))))
+        return keysgroup
 
     def _verify_signatures(self):
+        """Checks that at least `min` keys of the keysgroup signed the transaction.
+        The message is hashed once and every signature is matched against each key
+        at most once, as matched signatures are removed from the candidates.
+        Signatures are usually in the order of the keysgroup, so the signature at
+        the position of the key is tried first.
+        """
         multisignature = self.asset["multisignature"]
-        if not self.signatures or len(self.signatures) < multisignature["min"]:
+        min_signatures = multisignature["min"]
+        if not self.signatures or len(self.signatures) < min_signatures:
             return False
 
-        keysgroup = []
-        for key in multisignature["keysgroup"]:
-            if key.startswith("+"):
-                keysgroup.append(key[1:])
-            else:
-                keysgroup.append(key)
+        message_hash = sha256(
+            self.get_bytes(skip_signature=True, skip_second_signature=True)
+        ).digest()
+        # Candidates by their position in the signatures
+        candidates = {
+            index: unhexlify(signature.encode("utf-8"))
+            for index, signature in enumerate(self.signatures)
+        }
+        keysgroup = self.get_keysgroup()
 
         num_valid_signatures = 0
-        for key in keysgroup:
-            signature = self._verify_transaction_signatures(key)
-            if signature:
-                num_valid_signatures += 1
-                if num_valid_signatures == multisignature["min"]:
-                    return True
+        for index, public_key in enumerate(keysgroup):
+            if num_valid_signatures + len(keysgroup) - index < min_signatures:
+                # Remaining keys can't add up to the minimum anymore
+                return False
+
+            positions = list(candidates)
+            if index in candidates:
+                positions.remove(index)
+                positions.insert(0, index)
+            for position in positions:
+                try:
+                    is_verified = public_key.verify(
+                        candidates[position], message_hash, hasher=None
+                    )
+                except ValueError:
+                    # Signature could not be parsed, so it won't match any key
+                    del candidates[position]
+                    continue
+                if is_verified:
+                    del candidates[position]
+                    num_valid_signatures += 1
+                    break
+
+            if num_valid_signatures == min_signatures:
+                return True
         return False
 
     def can_be_applied_to_wallet(self, wallet, wallet_manager, block_height):
@@ -0,0 +1,102 @@
+"""Cache of verified signatures shared between processes.
+
+A transaction is verified when it's admitted to the pool and again in every block
+that includes it, by both the p2p and the blockchain process. Checks that passed
+are stored in a Redis sorted set, scored by the time they were verified, under a
+digest of their message, signature and public key, so they are only verified
+once. Only successful checks are cached. Entries expire with the pool's
+``max_transaction_age`` and the oldest ones are evicted once the cache holds
+``SIGNATURE_CACHE_SIZE`` entries.
+"""
+import logging
+import os
+import struct
+import time
+from hashlib import sha256
+
+from redis import Redis, RedisError
+
+from chain.common.config import config
+
+logger = logging.getLogger(__name__)
+
+# Lengths of the message, signature and public key of a check
+_LENGTHS = struct.Struct("<III")
+
+
+class SignatureCache(object):
+    _key = "signatures:verified"
+
+    def __init__(self, redis=None, ttl=None, max_size=None):
+        super().__init__()
+        self.redis = redis or Redis(
+            host=os.environ.get("REDIS_HOST", "localhost"),
+            port=os.environ.get("REDIS_PORT", 6379),
+            db=os.environ.get("REDIS_DB", 0),
+        )
+        self.ttl = ttl or config.pool["max_transaction_age"]
+        self.max_size = max_size or int(os.environ.get("SIGNATURE_CACHE_SIZE", 500000))
+
+    def key_for_check(self, check):
+        """Returns the key of a signature check in the cache. The digest covers the
+        message itself instead of the transaction id, as ids of received
+        transactions are not necessarily derived from their content. Every part is
+        prefixed with its length, so different checks can't have the same key.
+
+        :param (tuple) check: message, signature and public key bytes
+        :returns (bytes): sha256 digest
+        """
+        message, signature, public_key = check
+        return sha256(
+            _LENGTHS.pack(len(message), len(signature), len(public_key))
+            + message
+            + signature
+            + public_key
+        ).digest()
+
+    def get_verified(self, checks):
+        """Returns which of the checks are known to be valid. Checks that are None
+        are never valid. If redis is unavailable, no checks are.
+
+        :param (list) checks: signature checks, see `SignatureVerifier.verify`
+        :returns (list): bool for each check
+        """
+        keys = [self.key_for_check(check) for check in checks if check is not None]
+        if not keys:
+            return [False] * len(checks)
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.zscore(self._key, key)
+        try:
+            scores = iter(pipe.execute())
+        except RedisError:
+            logger.warning("Unable to read verified signatures", exc_info=True)
+            return [False] * len(checks)
+
+        expired = time.time() - self.ttl
+        results = []
+        for check in checks:
+            if check is None:
+                results.append(False)
+                continue
+            score = next(scores)
+            results.append(score is not None and score > expired)
+        return results
+
+    def set_verified(self, checks):
+        """Marks signature checks as valid and evicts expired entries and the
+        oldest entries over `max_size`
+
+        :param (list) checks: signature checks that passed verification
+        """
+        if not checks:
+            return
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zadd(self._key, {self.key_for_check(check): now for check in checks})
+        pipe.zremrangebyscore(self._key, "-inf", now - self.ttl)
+        pipe.zremrangebyrank(self._key, 0, -self.max_size - 1)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.warning("Unable to store verified signatures", exc_info=True)
@@ -6,11 +6,9 @@ from chain.common.config import config
 
 
 def get_slot_number(height, epoch_time):
-    # TODO: find a better way to get milestone data
-    milestone = config.get_milestone(height)
-    return math.floor(epoch_time / milestone["blocktime"])
+    return math.floor(epoch_time / config.get_blocktime(height))
 
 
 def is_forging_allowed(height, epoch_time):
-    milestone = config.get_milestone(height)
-    return epoch_time % milestone["blocktime"] < milestone["blocktime"] / 2
+    blocktime = config.get_blocktime(height)
+    return epoch_time % blocktime < blocktime / 2
@@ -1,12 +1,61 @@
 import logging
 import math
+import os
+from binascii import unhexlify
 
 from coincurve import PublicKey
 
 from chain.common.config import config
+from chain.common.lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Parsed public keys by their serialized bytes. Parsing decompresses the point,
+# which is a noticeable part of verifying a signature, and most signatures are made
+# by a small set of keys. Keys of the active delegates are pinned, as they sign
+# every block.
+_public_key_cache = LRUCache(int(os.environ.get("PUBLIC_KEY_CACHE_SIZE", 10000)))
+_pinned_public_keys = {}
+
+
+def get_public_key(public_key):
+    """Returns a parsed public key, parsing it only if it's not cached
+
+    :param (bytes) public_key: serialized public key
+    :returns (PublicKey): parsed public key
+    """
+    pub_key = _pinned_public_keys.get(public_key)
+    if pub_key is None:
+        pub_key = _public_key_cache.get(public_key)
+        if pub_key is None:
+            pub_key = PublicKey(public_key)
+            _public_key_cache.set(public_key, pub_key)
+    return pub_key
+
+
+def pin_public_keys(public_keys):
+    """Keeps parsed public keys in memory until different keys are pinned, eg.
+    keys of the active delegates for the current round
+
+    :param (list) public_keys: hex encoded public keys
+    """
+    global _pinned_public_keys
+    pinned = {}
+    for public_key in public_keys:
+        public_key = unhexlify(public_key.encode("utf-8"))
+        pinned[public_key] = _pinned_public_keys.get(public_key) or PublicKey(
+            public_key
+        )
+    _pinned_public_keys = pinned
+
+
+def public_key_cache_info():
+    """Returns hit and miss counters of the public key cache, see `LRUCache.info`
+    """
+    info = _public_key_cache.info()
+    info["pinned"] = len(_pinned_public_keys)
+    return info
+
 
 def verify_hash(message, signature, public_key):
     if not isinstance(signature, bytes):
@@ -14,7 +63,7 @@ def verify_hash(message, signature, public_key):
     if not isinstance(public_key, bytes):
         raise TypeError("public_key must be bytes")
 
-    pub_key = PublicKey(public_key)
+    pub_key = get_public_key(public_key)
     try:
         is_verified = pub_key.verify(signature, message)
     except ValueError as e:
@@ -27,11 +76,7 @@ def verify_hash(message, signature, public_key):
 
 
 def is_block_exception(block):
-    # TODO: cache this calculation on config object as it's not gonna change during
-    # runtime
-    exception_blocks = config.exceptions.get("blocks", [])
-    exception_blocks = [block_id for block_id in exception_blocks]
-    return block.id in exception_blocks
+    return block.id in config.exception_blocks
 
 
 def is_transaction_exception(transaction_id):
@@ -39,12 +84,11 @@ def is_transaction_exception(transaction_id):
         return False
     if not isinstance(transaction_id, str):
         raise TypeError("transaction_id must be str")
-    exception_transactions = config.exceptions.get("transaction", [])
-    return transaction_id in exception_transactions
+    return transaction_id in config.exception_transactions
 
 
 def calculate_round(height):
-    max_delegates = config.get_milestone(height)["activeDelegates"]
+    max_delegates = config.get_active_delegates(height)
     current_round = math.floor((height - 1) / max_delegates) + 1
     next_round = math.floor(height / max_delegates) + 1
     return current_round, next_round, max_delegates
@@ -53,5 +97,5 @@ def calculate_round(height):
 def is_new_round(height):
     """Checks if height is at the start of new round
     """
-    max_delegates = config.get_milestone(height)["activeDelegates"]
+    max_delegates = config.get_active_delegates(height)
     return height % max_delegates == 1
@@ -0,0 +1,163 @@
+"""Verification of signatures in batches.
+
+Blocks, the transaction pool and peer verification collect (message, signature,
+public key) checks and verify them through a shared `SignatureVerifier`. The
+verifier splits big batches into chunks and verifies them on a thread pool
+(coincurve releases the GIL while verifying) or a process pool. Configure it with
+the ``VERIFY_EXECUTOR`` (``serial``, ``thread`` or ``process``) and
+``VERIFY_WORKERS`` environment variables. Checks that passed are remembered in a
+`SignatureCache` shared by all processes, unless ``VERIFY_CACHE`` is set to ``0``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from chain.crypto.signature_cache import SignatureCache
+from chain.crypto.utils import verify_hash
+
+EXECUTOR_SERIAL = "serial"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+
+def _verify_checks(checks):
+    return [check is not None and verify_hash(*check) for check in checks]
+
+
+class SignatureVerifier(object):
+    """Verifies lists of signature checks, in parallel when there is more than one
+    worker.
+
+    :param (str) executor: `EXECUTOR_SERIAL`, `EXECUTOR_THREAD` or
+        `EXECUTOR_PROCESS`
+    :param (int) workers: number of threads or processes, defaults to the number of
+        CPUs
+    :param (int) chunk_size: number of checks sent to a worker at once. Batches that
+        fit into a single chunk are verified in the calling thread.
+    :param (SignatureCache) cache: cache of checks that were already verified
+    """
+
+    def __init__(
+        self, executor=EXECUTOR_THREAD, workers=None, chunk_size=32, cache=None
+    ):
+        super().__init__()
+        if executor not in [EXECUTOR_SERIAL, EXECUTOR_THREAD, EXECUTOR_PROCESS]:
+            raise ValueError("Unknown executor {}".format(executor))
+        self.executor = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.executor == EXECUTOR_PROCESS:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _verify(self, checks):
+        if (
+            self.executor == EXECUTOR_SERIAL
+            or self.workers < 2
+            or len(checks) <= self.chunk_size
+        ):
+            return _verify_checks(checks)
+
+        chunks = [
+            checks[start : start + self.chunk_size]
+            for start in range(0, len(checks), self.chunk_size)
+        ]
+        results = []
+        for chunk_results in self._get_pool().map(_verify_checks, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def verify(self, checks, cache_results=True):
+        """Verifies signature checks
+
+        :param (list) checks: (message, signature, public key) tuples of bytes. None
+            is accepted for checks that are known to fail, eg. a missing signature.
+        :param (bool) cache_results: add checks that passed to the cache. Callers
+            that only keep some of the checks add them with `cache_verified`.
+        :returns (list): bool result for each check, in the same order
+        """
+        checks = list(checks)
+        if self.cache is None:
+            return self._verify(checks)
+
+        results = self.cache.get_verified(checks)
+        pending = [
+            index
+            for index, check in enumerate(checks)
+            if check is not None and not results[index]
+        ]
+        verified = []
+        for index, is_verified in zip(
+            pending, self._verify([checks[index] for index in pending])
+        ):
+            results[index] = is_verified
+            if is_verified:
+                verified.append(checks[index])
+        if cache_results:
+            self.cache.set_verified(verified)
+        return results
+
+    def cache_verified(self, checks):
+        """Adds signature checks that passed verification to the cache
+
+        :param (list) checks: checks that were verified with `verify`
+        """
+        if self.cache is not None:
+            self.cache.set_verified(checks)
+
+    def verify_transactions(self, transactions, cache_results=True):
+        """Verifies signatures of transactions, see `BaseTransaction.verify`
+
+        :returns (list): bool result for each transaction
+        """
+        return self.verify(
+            [transaction.get_signature_check() for transaction in transactions],
+            cache_results=cache_results,
+        )
+
+    def verify_blocks(self, blocks):
+        """Verifies a batch of blocks, eg. blocks received during sync, with all of
+        their signatures checked in one go
+
+        :returns (list): result of `Block.verify` for each block
+        """
+        checks = []
+        boundaries = []
+        for block in blocks:
+            block_checks = block.get_signature_checks()
+            boundaries.append((len(checks), len(checks) + len(block_checks)))
+            checks.extend(block_checks)
+
+        results = self.verify(checks)
+        return [
+            block.verify(signature_results=results[start:end])
+            for block, (start, end) in zip(blocks, boundaries)
+        ]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_verifier = None
+
+
+def get_verifier():
+    """Returns the verifier shared by everything in the current process"""
+    global _verifier
+    if _verifier is None:
+        workers = os.environ.get("VERIFY_WORKERS")
+        use_cache = os.environ.get("VERIFY_CACHE", "1") != "0"
+        _verifier = SignatureVerifier(
+            executor=os.environ.get("VERIFY_EXECUTOR", EXECUTOR_THREAD),
+            workers=int(workers) if workers else None,
+            cache=SignatureCache() if use_cache else None,
+        )
+    return _verifier
@@ -33,10 +33,8 @@ class Handlers(object):
         headers_only = data['headers_only']
         serialized = data['serialized']
 
-        blocks = self.db.get_blocks(
-            block_height, block_limit, serialized, not headers_only
-        )
-        return [block.to_json() for block in blocks]
+        blocks = self.db.get_blocks(block_height, block_limit, not headers_only)
+        return [block.to_json(serialized=serialized) for block in blocks]
 
     async def get_common_blocks(self, data):
         self.socket.log_info(data)
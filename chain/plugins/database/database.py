@@ -1,22 +1,34 @@
 import logging
 import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from hashlib import sha256
 
+from peewee import chunked
 from playhouse.pool import PooledPostgresqlExtDatabase
 
+from chain.common.config import config
+from chain.common.exceptions import InvalidSnapshotException
 from chain.crypto.objects.block import Block as CryptoBlock
-from chain.crypto.objects.transactions import from_serialized
-from chain.crypto.utils import calculate_round
+from chain.crypto.objects.transaction_batch import TransactionBatch
+from chain.crypto.utils import calculate_round, is_new_round, pin_public_keys
 
 from .models.block import Block
 from .models.pool_transaction import PoolTransaction
 from .models.round import Round
 from .models.transaction import Transaction
+from .snapshots import list_snapshots, read_snapshot_header
 from .wallet_manager import WalletManager
 
 logger = logging.getLogger(__name__)
 
+# Number of rows inserted with a single statement. Postgres allows up to 65535
+# parameters per statement and a transaction row has 13 columns.
+INSERT_BATCH_SIZE = 1000
+# Number of blocks loaded at once when applying blocks after a wallet snapshot
+REPLAY_BATCH_SIZE = 100
+
 
 # TODO: inherit from interface
 class Database(object):
@@ -45,10 +57,20 @@ class Database(object):
         PoolTransaction._meta.database = self.db
 
         self._active_delegates = []
+        # Blocks applied inside `group_commit` that are not saved yet
+        self._pending_blocks = None
+        self._pending_transaction_ids = None
+        # Snapshot of wallets taken inside `group_commit`, written once it commits
+        self._pending_snapshot = None
+        # Callbacks registered with `on_commit` inside `group_commit`
+        self._pending_callbacks = None
+        # Snapshots are written in the background, one at a time
+        self._snapshot_writer = ThreadPoolExecutor(max_workers=1)
 
         self.wallets = WalletManager()
 
     def close(self):
+        self._snapshot_writer.shutdown()
         self.db.close()
 
     def get_last_block(self):
@@ -60,9 +82,18 @@ class Database(object):
         except Block.DoesNotExist:
             return None
         else:
-            crypto_block = CryptoBlock.from_object(block)
+            crypto_block = CryptoBlock.from_object(block, trusted=True)
             return crypto_block
 
+    def _insert_transactions(self, blocks):
+        rows = (
+            Transaction.row_from_crypto(transaction)
+            for block in blocks
+            for transaction in block.transactions
+        )
+        for batch in chunked(rows, INSERT_BATCH_SIZE):
+            Transaction.insert_many(batch).execute()
+
     def save_block(self, block):
         logger.info("Saving block %s", block.id)
         if not isinstance(block, CryptoBlock):
@@ -72,26 +103,97 @@ class Database(object):
 
         with self.db.atomic() as db_txn:
             try:
-                db_block = Block.from_crypto(block)
-                db_block.save(force_insert=True)
+                Block.insert(Block.row_from_crypto(block)).execute()
             except Exception as e:  # TODO: Make this not so broad!
                 logger.error("Got an exception while saving a block")
                 db_txn.rollback()
                 logger.error(e)
                 return
 
-        with self.db.atomic() as db_txn:
             try:
-                for transaction in block.transactions:
-                    db_transaction = Transaction.from_crypto(transaction)
-                    db_transaction.save(force_insert=True)
+                self._insert_transactions([block])
             except Exception as e:  # TODO: Make this not so broad!
                 logger.error("Got an exception while saving transactions")
                 db_txn.rollback()
-                db_block.delete_instance()
-                logger.error(e)  # TODO: replace with logger.error
+                logger.error(e)
                 raise e
 
+    def save_blocks(self, blocks):
+        """Saves consecutive blocks and their transactions in a single database
+        transaction, eg. a batch of blocks received during sync. Either all of the
+        blocks are saved or none of them.
+
+        :param (list) blocks: crypto blocks
+        """
+        if not blocks:
+            return
+        logger.info(
+            "Saving %s blocks from height %s to %s",
+            len(blocks),
+            blocks[0].height,
+            blocks[-1].height,
+        )
+        for block in blocks:
+            if not isinstance(block, CryptoBlock):
+                raise Exception(
+                    "Block must be a type of crypto.objects.Block"
+                )  # TODO: better exception
+
+        with self.db.atomic() as db_txn:
+            try:
+                for batch in chunked(
+                    (Block.row_from_crypto(block) for block in blocks),
+                    INSERT_BATCH_SIZE,
+                ):
+                    Block.insert_many(batch).execute()
+                self._insert_transactions(blocks)
+            except Exception as e:  # TODO: Make this not so broad!
+                logger.error("Got an exception while saving blocks")
+                db_txn.rollback()
+                logger.error(e)
+                raise e
+
+    @contextmanager
+    def group_commit(self):
+        """Applies blocks with a single commit, eg. consecutive blocks received
+        during sync. Blocks applied with `apply_block` inside the context are saved
+        together when it exits, with rounds and wallet changes committed at the same
+        time, and callbacks registered with `on_commit` are called afterwards. If an
+        exception is raised, none of the changes are committed and no callbacks are
+        called.
+        """
+        self._pending_blocks = []
+        self._pending_transaction_ids = set()
+        callbacks = self._pending_callbacks = []
+        self.wallets.begin_batch()
+        try:
+            with self.db.atomic():
+                yield
+                self.save_blocks(self._pending_blocks)
+            self.wallets.commit_batch()
+            if self._pending_snapshot is not None:
+                self._write_snapshot(*self._pending_snapshot)
+        finally:
+            self._pending_blocks = None
+            self._pending_transaction_ids = None
+            self._pending_snapshot = None
+            self._pending_callbacks = None
+            self.wallets.discard_batch()
+        for callback in callbacks:
+            callback()
+
+    def on_commit(self, callback):
+        """Calls `callback` once the applied blocks are committed. Outside
+        `group_commit` it's called right away, inside it once the whole group is
+        committed.
+
+        :param (callable) callback: function to call without arguments
+        """
+        if self._pending_callbacks is None:
+            callback()
+        else:
+            self._pending_callbacks.append(callback)
+
     def apply_round(self, height):
         next_height = 1 if height == 1 else height + 1
         logger.info("Apply round next height: %s", next_height)
@@ -137,8 +239,14 @@ class Database(object):
         # if (this.blocksInCurrentRound) {
         #     this.blocksInCurrentRound.push(block);
         # }
-        self.save_block(block)
+        if self._pending_blocks is None:
+            self.save_block(block)
+        else:
+            self._pending_blocks.append(block)
+            self._pending_transaction_ids.update(block.get_transaction_ids())
         self.apply_round(block.height)
+        self.wallets.flush()
+        self._save_snapshot(block)
 
         # TODO: em wat?
         # // Check if we recovered from a fork
@@ -148,6 +256,92 @@ class Database(object):
         #     state.forkedBlock = null;
         # }
 
+    def _save_snapshot(self, block):
+        """Takes a snapshot of wallets at the end of every `interval` rounds. Wallets
+        are encoded right away, as they change with the next block, but written in
+        the background once the block is committed.
+        """
+        interval = config.snapshots["interval"]
+        if not interval or not is_new_round(block.height + 1):
+            return
+        current_round, _, _ = calculate_round(block.height)
+        if current_round % interval != 0:
+            return
+        data = self.wallets.encode_snapshot(block.height, block.id)
+        if data is None:
+            return
+        if self._pending_blocks is None:
+            self._write_snapshot(block.height, data)
+        else:
+            self._pending_snapshot = (block.height, data)
+
+    def _write_snapshot(self, height, data):
+        def write():
+            try:
+                self.wallets.write_snapshot(height, data)
+            except Exception:
+                logger.exception("Failed to write snapshot of block %s", height)
+
+        return self._snapshot_writer.submit(write)
+
+    def _apply_blocks_to_wallets(self, height):
+        """Applies all blocks from `height` on to wallets
+        """
+        while True:
+            blocks = self.get_blocks(
+                height, REPLAY_BATCH_SIZE - 1, with_transactions=True
+            )
+            if not blocks:
+                break
+            for block in blocks:
+                self.wallets.apply_block(block)
+            height = blocks[-1].height + 1
+
+    def _load_wallets_from_snapshot(self, last_block):
+        for path in list_snapshots(config.snapshots["folder"]):
+            try:
+                header = read_snapshot_header(path)
+            except InvalidSnapshotException as e:
+                logger.warning(str(e))
+                continue
+
+            block = Block.get_or_none(Block.height == header.height)
+            if block is None or block.id != header.block_id:
+                logger.info("Skipping snapshot %s of a block that was reverted", path)
+                continue
+
+            try:
+                self.wallets.load_snapshot(path)
+            except InvalidSnapshotException as e:
+                logger.warning(str(e))
+                continue
+
+            logger.info(
+                "Applying blocks from height %s to %s",
+                header.height + 1,
+                last_block.height,
+            )
+            self._apply_blocks_to_wallets(header.height + 1)
+            self.wallets.publish()
+            return True
+        return False
+
+    def load_wallets(self, last_block):
+        """Loads wallets from the newest snapshot of a block that's in the database
+        and applies the blocks after it. If there's no such snapshot or applying
+        the blocks fails, wallets are built from all blocks and transactions.
+
+        :param (Block) last_block: last block in the database
+        """
+        try:
+            if self._load_wallets_from_snapshot(last_block):
+                return
+            logger.info("No wallet snapshot found")
+        except Exception:
+            logger.exception("Failed to load wallets from snapshot")
+        logger.info("Building wallets")
+        self.wallets.build()
+
     def verify_blockchain(self):
         """ Verify that the blockchain stored in the db is not corrupted
 
@@ -261,6 +455,7 @@ class Database(object):
                     index += 1
 
             self._active_delegates = delegates
+            pin_public_keys([delegate.public_key for delegate in delegates])
 
         return self._active_delegates
 
@@ -278,18 +473,25 @@ class Database(object):
         except Block.DoesNotExist:
             return None
         else:
-            return CryptoBlock.from_object(block)
+            return CryptoBlock.from_object(block, trusted=True)
 
     def get_forged_transaction_ids(self, transaction_ids):
         transactions = Transaction.select(Transaction.id).where(
             Transaction.id.in_(transaction_ids)
         )
-        return [transaction.id for transaction in transactions]
+        forged_ids = [transaction.id for transaction in transactions]
+        if self._pending_transaction_ids:
+            forged_ids.extend(
+                transaction_id
+                for transaction_id in transaction_ids
+                if transaction_id in self._pending_transaction_ids
+            )
+        return forged_ids
 
     def transaction_is_forged(self, transaction_id):
         return Transaction.select().where(Transaction.id == transaction_id).exists()
 
-    def get_blocks(self, height, limit, serialized, with_transactions=False):
+    def get_blocks(self, height, limit, with_transactions=False):
         blocks = (
             Block.select()
             .where(Block.height.between(height, height + limit))
@@ -299,26 +501,24 @@ class Database(object):
         if with_transactions:
             block_ids = [block.id for block in blocks]
             transactions = (
-                Transaction.select()
+                Transaction.select(Transaction.block_id, Transaction.serialized)
                 .where(Transaction.block_id.in_(block_ids))
                 .order_by(Transaction.block_id.asc(), Transaction.sequence.asc())
             )
 
             transactions_map = defaultdict(list)
             for trans in transactions:
-                # TODO: implement from_object on transaction and use that, instead of
-                # creating it from serialized data.
-                if serialized:
-                    transactions_map[trans.block_id].append(trans.serialized)
-                else:
-                    transactions_map[trans.block_id].append(
-                        from_serialized(trans.serialized)
-                    )
+                transactions_map[trans.block_id_id].append(trans.serialized)
         crypto_blocks = []
         for block in blocks:
-            crypto_block = CryptoBlock.from_object(block)
+            crypto_block = CryptoBlock.from_object(block, trusted=True)
             if with_transactions:
-                crypto_block.transactions = transactions_map[block.id]
+                # Stored transactions are only decoded if they're accessed, so
+                # blocks served to peers as serialized are passed through as is
+                crypto_block.transactions = TransactionBatch.from_raw(
+                    transactions_map[block.id], trusted=True
+                )
+                crypto_block.transactions.block_id = crypto_block.id
             crypto_blocks.append(crypto_block)
         return crypto_blocks
 
@@ -326,14 +526,14 @@ class Database(object):
         blocks = (
             Block.select().where(Block.id.in_(block_ids)).order_by(Block.height.desc())
         )
-        return [CryptoBlock.from_object(block) for block in blocks]
+        return [CryptoBlock.from_object(block, trusted=True) for block in blocks]
 
     def get_blocks_by_heights(self, heights):
         if not isinstance(heights, list):
             raise Exception("heights must be a type of list")
 
         blocks = Block.select().where(Block.height.in_(heights))
-        return [CryptoBlock.from_object(block) for block in blocks]
+        return [CryptoBlock.from_object(block, trusted=True) for block in blocks]
 
     def delete_round(self, round_to_delete):
         Round.delete().where(Round.round == round_to_delete)
@@ -346,6 +546,7 @@ class Database(object):
             self.delete_round(next_round)
 
         self.wallets.revert_block(block)
+        self.wallets.flush()
 
     def rollback_to_round(self, to_round):
         # TODO: Get rid of this and use blockchain.revert_blocks instead
@@ -0,0 +1,23 @@
+"""Peewee migrations -- 002_binary_serialized_transactions.py.
+
+Transactions used to store hexlified bytes in the `serialized` column. They now store
+raw serialized bytes, so convert the existing rows.
+"""
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.sql(
+        "UPDATE transactions "
+        "SET serialized = decode(convert_from(serialized, 'UTF8'), 'hex')"
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.sql(
+        "UPDATE transactions "
+        "SET serialized = convert_to(encode(serialized, 'hex'), 'UTF8')"
+    )
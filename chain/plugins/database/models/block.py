@@ -28,22 +28,26 @@ class Block(Model):
 
     @classmethod
     def from_crypto(cls, block):
-        # TODO: figure out how to improve this
-        model = cls()
-        model.id = block.id
-        model.version = block.version
-        model.timestamp = block.timestamp
-        model.previous_block = block.previous_block
-        model.height = block.height
-        model.number_of_transactions = block.number_of_transactions
-        model.total_amount = block.total_amount
-        model.total_fee = block.total_fee
-        model.reward = block.reward
-        model.payload_length = block.payload_length
-        model.payload_hash = block.payload_hash
-        model.generator_public_key = block.generator_public_key
-        model.block_signature = block.block_signature
-        return model
+        return cls(**cls.row_from_crypto(block))
+
+    @staticmethod
+    def row_from_crypto(block):
+        """Returns column values of a crypto block, as used by `insert_many`"""
+        return {
+            "id": block.id,
+            "version": block.version,
+            "timestamp": block.timestamp,
+            "previous_block": block.previous_block,
+            "height": block.height,
+            "number_of_transactions": block.number_of_transactions,
+            "total_amount": block.total_amount,
+            "total_fee": block.total_fee,
+            "reward": block.reward,
+            "payload_length": block.payload_length,
+            "payload_hash": block.payload_hash,
+            "generator_public_key": block.generator_public_key,
+            "block_signature": block.block_signature,
+        }
 
     # @staticmethod
     # def count():
@@ -40,24 +40,28 @@ class Transaction(Model):
 
     @classmethod
     def from_crypto(cls, transaction):
-        # TODO: figure out how to improve this
-        model = cls()
-        model.id = transaction.id
-        model.version = transaction.version
-        model.block_id = transaction.block_id
-        model.sequence = transaction.sequence
-        model.timestamp = transaction.timestamp
-        model.sender_public_key = transaction.sender_public_key
-        model.recipient_id = transaction.recipient_id
-        model.type = transaction.type
-        model.vendor_field = transaction.vendor_field
-        model.amount = transaction.amount
-        model.fee = transaction.fee
-        model.asset = transaction.asset
-        # TODO: probably obsolete
-        serialized = transaction.serialize()
-        model.serialized = serialized
-        return model
+        return cls(**cls.row_from_crypto(transaction))
+
+    @staticmethod
+    def row_from_crypto(transaction):
+        """Returns column values of a crypto transaction, as used by `insert_many`
+        """
+        return {
+            "id": transaction.id,
+            "version": transaction.version,
+            "block_id": transaction.block_id,
+            "sequence": transaction.sequence,
+            "timestamp": transaction.timestamp,
+            "sender_public_key": transaction.sender_public_key,
+            "recipient_id": transaction.recipient_id,
+            "type": transaction.type,
+            "vendor_field": transaction.vendor_field,
+            "amount": transaction.amount,
+            "fee": transaction.fee,
+            "asset": transaction.asset,
+            # Received transactions keep their bytes, so they're not serialized again
+            "serialized": transaction.to_bytes(),
+        }
 
     @staticmethod
     def statistics():
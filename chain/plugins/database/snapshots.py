@@ -0,0 +1,177 @@
+"""Snapshots of wallet state, written at round boundaries.
+
+A snapshot holds all wallets as they were after the block with the stored height
+and id. On startup, wallets are loaded from the newest snapshot whose block is in
+the database and only blocks after it are applied, instead of building wallets
+from all transactions.
+
+A snapshot file is a header followed by wallets serialized with `Wallet.to_bytes`,
+each prefixed with its length::
+
+    magic (4) | version (1) | height (4) | block id (64) | wallets (4) | sha256 (32)
+    | length (4) | record | length (4) | record | ...
+
+The checksum covers all records. Files are read through `mmap`, so records don't
+have to be copied before they're decoded.
+"""
+import mmap
+import os
+import struct
+from hashlib import sha256
+
+from chain.common.exceptions import InvalidSnapshotException
+from chain.crypto.models.wallet import Wallet
+
+MAGIC = b"WSNP"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sBI64sI32s")
+_LENGTH = struct.Struct("<I")
+
+_PREFIX = "wallets-"
+_SUFFIX = ".snapshot"
+
+
+class SnapshotHeader(object):
+    def __init__(self, version, height, block_id, num_wallets, checksum):
+        super().__init__()
+        self.version = version
+        self.height = height
+        self.block_id = block_id
+        self.num_wallets = num_wallets
+        self.checksum = checksum
+
+
+def snapshot_path(folder, height):
+    return os.path.join(folder, "{}{:010d}{}".format(_PREFIX, height, _SUFFIX))
+
+
+def list_snapshots(folder):
+    """Returns paths of snapshots in the folder, newest first"""
+    if not os.path.isdir(folder):
+        return []
+    names = [
+        name
+        for name in os.listdir(folder)
+        if name.startswith(_PREFIX) and name.endswith(_SUFFIX)
+    ]
+    return [os.path.join(folder, name) for name in sorted(names, reverse=True)]
+
+
+def encode_snapshot(height, block_id, wallets):
+    """Returns a snapshot of wallets after the given block, as it's written by
+    `write_snapshot_data`
+
+    :param (int) height: height of the last applied block
+    :param (str) block_id: id of the last applied block
+    :param (list) wallets: all wallets
+    :returns (bytes): header followed by the records
+    """
+    records = bytearray()
+    for wallet in wallets:
+        data = wallet.to_bytes()
+        records += _LENGTH.pack(len(data))
+        records += data
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        height,
+        block_id.encode("utf-8"),
+        len(wallets),
+        sha256(records).digest(),
+    )
+    return header + records
+
+
+def write_snapshot_data(folder, height, data, keep=None):
+    """Writes a snapshot returned by `encode_snapshot`. The file is written under a
+    temporary name first, so a crash never leaves a partial snapshot.
+
+    :param (str) folder: folder of snapshots, created if it doesn't exist
+    :param (int) height: height of the last applied block
+    :param (bytes) data: encoded snapshot
+    :param (int) keep: if set, only this many newest snapshots are kept
+    :returns (str): path of the snapshot
+    """
+    os.makedirs(folder, exist_ok=True)
+    path = snapshot_path(folder, height)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if keep:
+        for old_path in list_snapshots(folder)[keep:]:
+            os.remove(old_path)
+    return path
+
+
+def write_snapshot(folder, height, block_id, wallets, keep=None):
+    """Writes a snapshot of wallets after the given block, see `encode_snapshot`
+    and `write_snapshot_data`
+
+    :returns (str): path of the snapshot
+    """
+    data = encode_snapshot(height, block_id, wallets)
+    return write_snapshot_data(folder, height, data, keep=keep)
+
+
+def read_snapshot_header(path):
+    """Reads the header of a snapshot without reading its wallets
+
+    :returns (SnapshotHeader): header of the snapshot
+    """
+    with open(path, "rb") as f:
+        data = f.read(_HEADER.size)
+    if len(data) < _HEADER.size:
+        raise InvalidSnapshotException("Snapshot {} is truncated".format(path))
+    magic, version, height, block_id, num_wallets, checksum = _HEADER.unpack(data)
+    if magic != MAGIC:
+        raise InvalidSnapshotException("{} is not a wallet snapshot".format(path))
+    if version != VERSION:
+        raise InvalidSnapshotException(
+            "Snapshot {} has unsupported version {}".format(path, version)
+        )
+    return SnapshotHeader(
+        version, height, block_id.rstrip(b"\0").decode("utf-8"), num_wallets, checksum
+    )
+
+
+def read_snapshot(path):
+    """Reads and validates a snapshot
+
+    :returns (tuple): the snapshot's `SnapshotHeader` and list of wallets
+    """
+    header = read_snapshot_header(path)
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        records = memoryview(data)[_HEADER.size :]
+        try:
+            if sha256(records).digest() != header.checksum:
+                raise InvalidSnapshotException(
+                    "Checksum of snapshot {} does not match".format(path)
+                )
+
+            wallets = []
+            offset = 0
+            try:
+                for _ in range(header.num_wallets):
+                    (length,) = _LENGTH.unpack_from(records, offset)
+                    offset += _LENGTH.size
+                    wallets.append(Wallet.from_bytes(records[offset : offset + length]))
+                    offset += length
+            except (struct.error, ValueError) as e:
+                raise InvalidSnapshotException(
+                    "Snapshot {} is corrupted: {}".format(path, e)
+                )
+            if offset != len(records):
+                raise InvalidSnapshotException(
+                    "Snapshot {} has unexpected data after wallets".format(path)
+                )
+        finally:
+            records.release()
+    return header, wallets
@@ -1,16 +1,21 @@
-import json
 import logging
 import os
+from bisect import bisect_left, insort
 from datetime import datetime
 
-from peewee import fn
+from peewee import chunked, fn
+from playhouse.postgres_ext import ServerSide
 
 import psutil
 
 from redis import Redis
 
 from chain.common.config import config
-from chain.crypto.address import address_from_public_key
+from chain.crypto.address import (
+    address_cache_info,
+    address_from_public_key,
+    cache_addresses,
+)
 from chain.crypto.constants import (
     TRANSACTION_TYPE_DELEGATE_REGISTRATION,
     TRANSACTION_TYPE_MULTI_SIGNATURE,
@@ -23,9 +28,13 @@ from chain.crypto.utils import is_transaction_exception
 
 from .models.block import Block
 from .models.transaction import Transaction
+from .snapshots import encode_snapshot, read_snapshot, write_snapshot_data
 
 logger = logging.getLogger(__name__)
 
+# Marks usernames that were not known before a batch
+_MISSING = object()
+
 
 def get_memory_precent():
     mem = psutil.virtual_memory()
@@ -33,8 +42,20 @@ def get_memory_precent():
 
 
 class WalletManager(object):
-    _key = "wallets:address:{}"
-    _username_key = "wallets:username:{}"
+    # Number of wallets sent to redis at once when writing all wallets
+    WRITE_BATCH_SIZE = 1000
+
+    # Hash of serialized wallets by address
+    _wallets_key = "wallets:addresses"
+    # Hash of delegate addresses by lowercase username
+    _usernames_key = "wallets:usernames"
+    # Number of the latest build of wallets. Wallets are built into hashes named
+    # after the build, which then replace the hashes above at once.
+    _generation_key = "wallets:generation"
+    _generation_wallets_key = "wallets:{}:addresses"
+    _generation_usernames_key = "wallets:{}:usernames"
+    # Hash of public key to address of every wallet with a known public key
+    _public_keys_key = "wallets:public_keys"
 
     def __init__(self):
         super().__init__()
@@ -48,21 +69,218 @@ class WalletManager(object):
         for transaction in config.genesis_block["transactions"]:
             self._genesis_addresses.add(transaction["senderId"])
 
-    def key_for_address(self, address):
-        return self._key.format(address)
+        # Wallets by address and addresses of delegates by lowercase username, None
+        # for removed usernames. Once wallets are built, they hold all wallets and
+        # are the primary wallet state, which is written to redis by `flush` for
+        # the p2p process. Before that, they only hold changes of the current batch.
+        self._wallets = {}
+        self._usernames = {}
+        # Addresses by public key, only kept once wallets are built
+        self._addresses = {}
+        # Index of delegate wallets, only kept once wallets are built. Keys of
+        # delegates are sorted by vote balance descending and public key ascending,
+        # so the active delegates are the first keys.
+        self._delegates = []
+        self._delegate_keys = {}
+        self._is_built = False
+        # Addresses and usernames that changed since the last flush
+        self._dirty_addresses = set()
+        self._dirty_usernames = set()
+        # Wallets and usernames as they were when the current batch began, see
+        # `begin_batch`
+        self._undo_wallets = None
+        self._undo_usernames = None
+        self._undo_dirty = None
+        # Hashes that `flush` writes to, which differ from the hashes that are read
+        # while wallets are built
+        self._target_wallets_key = self._wallets_key
+        self._target_usernames_key = self._usernames_key
+
+        self._load_public_keys()
+
+    def begin_batch(self):
+        """Starts a batch of changes, eg. of multiple blocks, which are only written
+        to redis with `commit_batch` and can be undone with `discard_batch`
+        """
+        self._undo_wallets = {}
+        self._undo_usernames = {}
+        self._undo_dirty = (set(self._dirty_addresses), set(self._dirty_usernames))
+
+    def commit_batch(self):
+        """Writes all changes since `begin_batch` to redis
+        """
+        self._undo_wallets = None
+        self._undo_usernames = None
+        self._undo_dirty = None
+        self.flush()
+
+    def discard_batch(self):
+        """Undoes all changes since `begin_batch`
+        """
+        if self._undo_wallets is None:
+            return
+        for address, wallet in self._undo_wallets.items():
+            if wallet is None:
+                self._wallets.pop(address, None)
+            else:
+                self._wallets[address] = wallet
+            self._index_delegate(address, wallet)
+        for username, address in self._undo_usernames.items():
+            if address is _MISSING:
+                self._usernames.pop(username, None)
+            else:
+                self._usernames[username] = address
+        self._dirty_addresses, self._dirty_usernames = self._undo_dirty
+        self._undo_wallets = None
+        self._undo_usernames = None
+        self._undo_dirty = None
+
+    def flush(self, chunk_size=None):
+        """Writes wallets and usernames that changed since the last flush to redis
+        in a single transaction. Does nothing during a batch.
+
+        :param (int) chunk_size: if set, changes are written without a transaction
+            in commands of this many wallets, eg. when writing all wallets
+        """
+        if self._undo_wallets is not None:
+            return
+        if self._dirty_addresses or self._dirty_usernames:
+            pipe = self.redis.pipeline(transaction=chunk_size is None)
+            addresses = list(self._dirty_addresses)
+            for batch in chunked(addresses, chunk_size or len(addresses) or 1):
+                pipe.hmset(
+                    self._target_wallets_key,
+                    {address: self._wallets[address].to_bytes() for address in batch},
+                )
+                if chunk_size:
+                    pipe.execute()
+
+            usernames = {}
+            removed_usernames = []
+            for username in self._dirty_usernames:
+                address = self._usernames[username]
+                if address is None:
+                    removed_usernames.append(username)
+                else:
+                    usernames[username] = address
+            if usernames:
+                pipe.hmset(self._target_usernames_key, usernames)
+            if removed_usernames:
+                pipe.hdel(self._target_usernames_key, *removed_usernames)
+            pipe.execute()
+            self._dirty_addresses = set()
+            self._dirty_usernames = set()
+            for username in removed_usernames:
+                del self._usernames[username]
+
+        if not self._is_built:
+            self._wallets = {}
+            self._usernames = {}
+
+    def _write_through(self):
+        # Until wallets are built, redis is the primary wallet state
+        if not self._is_built:
+            self.flush()
+
+    def _set_username(self, username, address):
+        username = username.lower()
+        if self._undo_usernames is not None and username not in self._undo_usernames:
+            self._undo_usernames[username] = self._usernames.get(username, _MISSING)
+        self._usernames[username] = address
+        self._dirty_usernames.add(username)
+        self._write_through()
+
+    def _get_username(self, username):
+        """Returns the address of the delegate with the given username or None
+        """
+        username = username.lower()
+        if username in self._usernames:
+            return self._usernames[username]
+        if self._is_built:
+            return None
+        address = self.redis.hget(self._usernames_key, username)
+        return address.decode("utf-8") if address is not None else None
+
+    def _index_delegate(self, address, wallet):
+        """Updates the position of a wallet in the delegate index
 
-    def key_for_username(self, username):
-        return self._username_key.format(username.lower())
+        :param (str) address: address of the wallet
+        :param (Wallet) wallet: the wallet or None if it was removed
+        """
+        if not self._is_built:
+            return
+        key = None
+        if wallet is not None and wallet.username:
+            key = (-wallet.vote_balance, wallet.public_key or "", address)
+        old_key = self._delegate_keys.get(address)
+        if key == old_key:
+            return
+        if old_key is not None:
+            del self._delegates[bisect_left(self._delegates, old_key)]
+            del self._delegate_keys[address]
+        if key is not None:
+            insort(self._delegates, key)
+            self._delegate_keys[address] = key
 
     def save_wallet(self, wallet):
-        self.redis.set(self.key_for_address(wallet.address), wallet.to_json())
+        address = wallet.address
+        if self._undo_wallets is not None and address not in self._undo_wallets:
+            self._undo_wallets[address] = self._wallets.get(address)
+        self._wallets[address] = wallet.copy()
+        if self._is_built and wallet.public_key:
+            self._addresses[wallet.public_key] = address
+        self._index_delegate(address, wallet)
+        self._dirty_addresses.add(address)
+        self._write_through()
+
+    def save_username(self, username, address):
+        self._set_username(username, address)
+
+    def delete_username(self, username):
+        self._set_username(username, None)
 
     def _get_wallet_by_address(self, address):
-        key = self.key_for_address(address)
-        data = self.redis.get(key)
+        wallet = self._wallets.get(address)
+        if wallet is not None:
+            return wallet.copy()
+        if self._is_built:
+            return None
+        data = self.redis.hget(self._wallets_key, address)
         if data is None:
             return None
-        return Wallet(json.loads(data))
+        return Wallet.from_bytes(data)
+
+    def _load_public_keys(self):
+        """Warms up the address cache with addresses that were stored when wallets
+        were built, so they don't need to be calculated in every process
+        """
+        addresses = (
+            (public_key.decode("utf-8"), address.decode("utf-8"))
+            for public_key, address in self.redis.hscan_iter(
+                self._public_keys_key, count=1000
+            )
+        )
+        cache_addresses(addresses)
+
+    def _save_public_keys(self):
+        """Stores addresses of all public keys that sent a transaction or forged a
+        block
+        """
+        public_keys = Transaction.select(
+            Transaction.sender_public_key.alias("public_key")
+        ).union(Block.select(Block.generator_public_key.alias("public_key")))
+
+        pipe = self.redis.pipeline()
+        mapping = {}
+        for row in public_keys.dicts().iterator():
+            public_key = row["public_key"]
+            mapping[public_key] = address_from_public_key(public_key)
+            if len(mapping) == 1000:
+                pipe.hmset(self._public_keys_key, mapping)
+                mapping = {}
+        if mapping:
+            pipe.hmset(self._public_keys_key, mapping)
+        pipe.execute()
 
     def _build_received_transactions(self):
         """Load and apply received transactions to wallets.
@@ -74,7 +292,7 @@ class WalletManager(object):
             .where(Transaction.type == TRANSACTION_TYPE_TRANSFER)
             .group_by(Transaction.recipient_id)
         )
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
             # TODO: make this nicer. It feels like a hack to do it this way
             wallet = self.find_by_address(transaction.recipient_id)
             wallet.balance = int(transaction.amount)
@@ -88,7 +306,7 @@ class WalletManager(object):
             fn.SUM(Block.reward + Block.total_fee).alias("reward"),
         ).group_by(Block.generator_public_key)
 
-        for block in blocks:
+        for block in ServerSide(blocks):
             wallet = self.find_by_public_key(block.generator_public_key)
             wallet.balance += int(block.reward)
             self.save_wallet(wallet)
@@ -124,7 +342,7 @@ class WalletManager(object):
             fn.SUM(Transaction.fee).alias("fee"),
         ).group_by(Transaction.sender_public_key)
 
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
             wallet = self.find_by_public_key(transaction.sender_public_key)
             wallet.balance -= int(transaction.amount)
             wallet.balance -= int(transaction.fee)
@@ -141,43 +359,37 @@ class WalletManager(object):
         transactions = Transaction.select(
             Transaction.sender_public_key, Transaction.asset
         ).where(Transaction.type == TRANSACTION_TYPE_SECOND_SIGNATURE)
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
             wallet = self.find_by_public_key(transaction.sender_public_key)
             wallet.second_public_key = transaction.asset["signature"]["publicKey"]
             self.save_wallet(wallet)
 
     def _build_votes(self):
-        # TODO: try to optimize this query. We only need the last vote that happened
-        # per sender_public_key
+        # Last vote of every sender
         transactions = (
             Transaction.select(Transaction.sender_public_key, Transaction.asset)
             .where(Transaction.type == TRANSACTION_TYPE_VOTE)
-            .order_by(Transaction.timestamp.desc(), Transaction.sequence.asc())
+            .distinct(Transaction.sender_public_key)
+            .order_by(
+                Transaction.sender_public_key,
+                Transaction.timestamp.desc(),
+                Transaction.sequence.asc(),
+            )
         )
-        # TODO: This already_processed_wallets overhead is here so we always just
-        # process the last vote transaction per sender_public_key. If we optimize
-        # the SQL query to only return last record per sender_public_key, this overhead
-        # can go away
-        already_processed_wallets = set()
-        voters = []
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
+            vote = transaction.asset["votes"][0]
+            # wallet.vote is only set if the wallet voted for someone. If wallet
+            # unvoted or haven't woted at all, wallet.vote needs to be set to None
+            if not vote.startswith("+"):
+                continue
             wallet = self.find_by_public_key(transaction.sender_public_key)
-            if wallet.address not in already_processed_wallets:
-                vote = transaction.asset["votes"][0]
-                # wallet.vote is only set if the wallet voted for someone. If wallet
-                # unvoted or haven't woted at all, wallet.vote needs to be set to
-                # None
-                if vote.startswith("+"):
-                    wallet.vote = vote[1:]
-                    self.save_wallet(wallet)
-                    voters.append(wallet.address)
-                already_processed_wallets.add(wallet.address)
-
-        # Calculate vote balances
-        for voter_address in voters:
-            voter = self.find_by_address(voter_address)
-            delegate = self.find_by_public_key(voter.vote)
-            delegate.vote_balance += voter.balance
+            wallet.vote = vote[1:]
+            self.save_wallet(wallet)
+
+            # Balances are final at this point, so they can be added to vote
+            # balances straight away
+            delegate = self.find_by_public_key(wallet.vote)
+            delegate.vote_balance += wallet.balance
             self.save_wallet(delegate)
 
     def _build_delegates(self):
@@ -185,11 +397,11 @@ class WalletManager(object):
             Transaction.sender_public_key, Transaction.asset
         ).where(Transaction.type == TRANSACTION_TYPE_DELEGATE_REGISTRATION)
 
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
             wallet = self.find_by_public_key(transaction.sender_public_key)
             wallet.username = transaction.asset["delegate"]["username"]
             self.save_wallet(wallet)
-            self.redis.set(self.key_for_username(wallet.username), wallet.address)
+            self.save_username(wallet.username, wallet.address)
 
         # Calculate forged blocks
         forged_blocks = Block.select(
@@ -198,7 +410,7 @@ class WalletManager(object):
             fn.SUM(Block.reward).alias("reward"),
             fn.COUNT(Block.total_amount).alias("total_produced"),
         ).group_by(Block.generator_public_key)
-        for block in forged_blocks:
+        for block in ServerSide(forged_blocks):
             wallet = self.find_by_public_key(block.generator_public_key)
             wallet.forged_fees += int(block.total_fee)
             wallet.forged_rewards += int(block.reward)
@@ -206,25 +418,63 @@ class WalletManager(object):
             self.save_wallet(wallet)
 
     def _build_multi_signatures(self):
+        # Last multi signature registration of every sender
         transactions = (
             Transaction.select(Transaction.sender_public_key, Transaction.asset)
             .where(Transaction.type == TRANSACTION_TYPE_MULTI_SIGNATURE)
-            .order_by((Transaction.timestamp + Transaction.sequence).desc())
+            .distinct(Transaction.sender_public_key)
+            .order_by(
+                Transaction.sender_public_key,
+                (Transaction.timestamp + Transaction.sequence).desc(),
+            )
         )
-        for transaction in transactions:
+        for transaction in ServerSide(transactions):
             wallet = self.find_by_public_key(transaction.sender_public_key)
             if not wallet.multisignature:
                 wallet.multisignature = transaction.asset["multisignature"]
                 self.save_wallet(wallet)
 
+    def _reset(self):
+        """Clears all wallets from memory. Wallets are then kept in memory and
+        written to the hashes of a new generation, which replace current wallets in
+        redis with `publish`.
+        """
+        generation = self.redis.incr(self._generation_key)
+        # Remove what's left of the previous build if it didn't finish
+        self.redis.unlink(
+            self._generation_wallets_key.format(generation - 1),
+            self._generation_usernames_key.format(generation - 1),
+        )
+        self._target_wallets_key = self._generation_wallets_key.format(generation)
+        self._target_usernames_key = self._generation_usernames_key.format(generation)
+
+        self._is_built = True
+        self._wallets = {}
+        self._usernames = {}
+        self._addresses = {}
+        self._delegates = []
+        self._delegate_keys = {}
+        self._dirty_addresses = set()
+        self._dirty_usernames = set()
+
+    def publish(self):
+        """Writes all wallets after they were built or loaded and makes them the
+        wallets that are read from redis in one step
+        """
+        self.flush(chunk_size=self.WRITE_BATCH_SIZE)
+        pipe = self.redis.pipeline()
+        # Old hashes are freed in the background
+        pipe.unlink(self._wallets_key, self._usernames_key)
+        if self._wallets:
+            pipe.rename(self._target_wallets_key, self._wallets_key)
+        if self._usernames:
+            pipe.rename(self._target_usernames_key, self._usernames_key)
+        pipe.execute()
+        self._target_wallets_key = self._wallets_key
+        self._target_usernames_key = self._usernames_key
+
     def build(self):
-        logger.info("Clearing existing wallets from redis")
-        keys = self.redis.keys(self._key.format("*"))
-        if keys:
-            self.redis.delete(*keys)
-        username_keys = self.redis.keys(self.key_for_username("*"))
-        if username_keys:
-            self.redis.delete(*username_keys)
+        self._reset()
 
         # Execution order of functions below is very important!
         start = datetime.now()
@@ -260,8 +510,62 @@ class WalletManager(object):
         self._build_multi_signatures()
         logger.info(datetime.now() - start)
 
+        logger.info("Saving %s wallets to redis", len(self._wallets))
+        self.publish()
+        logger.info(datetime.now() - start)
+
+        logger.info("Saving addresses of public keys")
+        self._save_public_keys()
+        logger.info(datetime.now() - start)
+        logger.info("Address cache: %s", address_cache_info())
+
         # TODO: Verify that no wallet has negative balance!
 
+    def encode_snapshot(self, height, block_id):
+        """Returns a snapshot of all wallets after the block at `height`, see
+        `chain.plugins.database.snapshots`, or None if wallets were not built
+        """
+        if not self._is_built:
+            return None
+        return encode_snapshot(height, block_id, list(self._wallets.values()))
+
+    def save_snapshot(self, height, block_id):
+        """Writes a snapshot of all wallets after the block at `height`. Does
+        nothing if wallets were not built.
+        """
+        data = self.encode_snapshot(height, block_id)
+        if data is not None:
+            self.write_snapshot(height, data)
+
+    def write_snapshot(self, height, data):
+        """Writes a snapshot returned by `encode_snapshot`. It doesn't touch the
+        wallets, so it's safe to call from a different thread.
+        """
+        path = write_snapshot_data(
+            config.snapshots["folder"], height, data, keep=config.snapshots["keep"]
+        )
+        logger.info("Saved snapshot of wallets after block %s to %s", height, path)
+
+    def load_snapshot(self, path):
+        """Replaces all wallets with wallets from a snapshot
+
+        :param (str) path: path of the snapshot
+        :returns (SnapshotHeader): header of the loaded snapshot
+        """
+        header, wallets = read_snapshot(path)
+        self._reset()
+        for wallet in wallets:
+            self._wallets[wallet.address] = wallet
+            if wallet.public_key:
+                self._addresses[wallet.public_key] = wallet.address
+            if wallet.username:
+                self._usernames[wallet.username.lower()] = wallet.address
+            self._index_delegate(wallet.address, wallet)
+        self._dirty_addresses = set(self._wallets)
+        self._dirty_usernames = set(self._usernames)
+        logger.info("Loaded %s wallets from snapshot %s", len(wallets), path)
+        return header
+
     def find_by_address(self, address):
         if not isinstance(address, str):
             raise ValueError("address must be str")
@@ -272,7 +576,7 @@ class WalletManager(object):
         return Wallet({"address": address})
 
     def find_by_public_key(self, public_key):
-        address = address_from_public_key(public_key)
+        address = self._addresses.get(public_key) or address_from_public_key(public_key)
         wallet = self.find_by_address(address)
         if wallet.public_key is None:
             wallet.public_key = public_key
@@ -283,22 +587,27 @@ class WalletManager(object):
         return address in self._genesis_addresses
 
     def exists(self, public_key):
-        address = address_from_public_key(public_key)
-        if self.redis.exists(self.key_for_address(address)) == 1:
+        address = self._addresses.get(public_key) or address_from_public_key(public_key)
+        if address in self._wallets:
             return True
-        return False
+        if self._is_built:
+            return False
+        return self.redis.hexists(self._wallets_key, address)
 
     def delegate_exists(self, username):
         if not username:
             return False
 
-        if self.redis.exists(self.key_for_username(username)) == 1:
-            return True
-        return False
+        return self._get_username(username) is not None
 
     def is_delegate(self, public_key):
         """Checks if a given publick_key is a registered delegate
         """
+        if self._is_built:
+            address = self._addresses.get(public_key) or address_from_public_key(
+                public_key
+            )
+            return address in self._delegate_keys
         wallet = self.find_by_public_key(public_key)
         return self.delegate_exists(wallet.username)
 
@@ -427,18 +736,37 @@ class WalletManager(object):
             self.save_wallet(voted_delegate)
 
     def load_active_delegate_wallets(self, height):
-        max_delegates = config.get_milestone(height)["activeDelegates"]
+        max_delegates = config.get_active_delegates(height)
         if height > 1 and height % max_delegates != 1:
             # TODO: exception
             raise Exception("Trying to build delegates outside of round change")
 
+        if self._is_built:
+            if len(self._delegates) < max_delegates:
+                raise Exception(
+                    "Expected to find {} delegates but only found {}.".format(
+                        max_delegates, len(self._delegates)
+                    )
+                )
+            delegate_wallets = [
+                self.find_by_address(address)
+                for _, _, address in self._delegates[:max_delegates]
+            ]
+            logger.info("Loaded %s active delegates", len(delegate_wallets))
+            return delegate_wallets
+
         delegate_wallets = []
 
-        keys = self.redis.keys(self.key_for_username("*"))
-        addresses = self.redis.mget(keys)
-        for address in addresses:
-            wallet = self.find_by_address(address.decode())
-            delegate_wallets.append(wallet)
+        usernames = {
+            username.decode("utf-8"): address.decode("utf-8")
+            for username, address in self.redis.hgetall(self._usernames_key).items()
+        }
+        # Include usernames that are not written to redis yet
+        usernames.update(self._usernames)
+
+        for address in usernames.values():
+            if address is not None:
+                delegate_wallets.append(self.find_by_address(address))
 
         if len(delegate_wallets) < max_delegates:
             raise Exception(
@@ -466,9 +794,7 @@ class WalletManager(object):
 
         # Removing the wallet from the delegates index
         if transaction.type == TRANSACTION_TYPE_DELEGATE_REGISTRATION:
-            self.redis.delete(
-                self.key_for_username(transaction.asset["delegate"]["username"])
-            )
+            self.delete_username(transaction.asset["delegate"]["username"])
 
         recipient = self.find_by_address(transaction.recipient_id)
         if transaction.type == TRANSACTION_TYPE_TRANSFER:
@@ -25,8 +25,9 @@ logger = logging.getLogger(__name__)
 
 class PeerManager(object):
 
-    key_active = "peer:active:{}"
-    key_suspended = "peer:suspended:{}"
+    # Hashes of serialized peers by ip
+    key_active = "peers:active"
+    key_suspended = "peers:suspended"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -46,33 +47,30 @@ class PeerManager(object):
 
         # TODO: We might not want to delete peers from redis, but we shoud put them
         # trough add_peer task so it correctly validates them
-        keys = self.redis.keys(self.key_active.format("*"))
-        keys.extend(self.redis.keys(self.key_suspended.format("*")))
-        if keys:
-            num = self.redis.delete(*keys)
-            logger.info("Deleted %s peers from redis", num)
+        num = self.redis.unlink(self.key_active, self.key_suspended)
+        if num:
+            logger.info("Deleted peers from redis")
         self._populate_seed_peers()
 
     def peers(self):
-        keys = self.redis.keys(self.key_active.format("*"))
-        peers = self.redis.mget(keys)
+        peers = self.redis.hvals(self.key_active)
         logger.info("Got %s peers from redis", len(peers))
         return [Peer.from_json(peer) for peer in peers if peer]
 
     def get_peer_by_ip(self, ip):
-        peer = self.redis.get(self.key_active.format(ip))
+        peer = self.redis.hget(self.key_active, ip)
         if peer:
             return Peer.from_json(peer)
         return None
 
     def peer_with_ip_exists(self, ip):
-        return self.redis.exists(self.key_active.format(ip))
+        return self.redis.hexists(self.key_active, ip)
 
     def is_peer_suspended(self, peer):
-        return self.redis.exists(self.key_suspended.format(peer.ip))
+        return self.redis.hexists(self.key_suspended, peer.ip)
 
     def get_peer(self, ip):
-        peer = self.redis.get(self.key_active.format(ip))
+        peer = self.redis.hget(self.key_active, ip)
         if peer:
             Peer.from_json(peer)
         return None
@@ -95,7 +93,7 @@ class PeerManager(object):
         else:
             raise PeerNotFoundException("Can't find an active peer.")
 
-    def fetch_blocks(self, from_height):
+    def fetch_blocks(self, from_height, decode=True):
         # TODO: Missing error handling
         tries = 3
         while True:
@@ -104,7 +102,7 @@ class PeerManager(object):
                 "Downloading blocks from height %s via %s", from_height, peer.ip
             )
             try:
-                return peer.fetch_blocks_from_height(from_height)
+                return peer.fetch_blocks_from_height(from_height, decode=decode)
             except (
                 PeerRateLimitExceeded,
                 WebSocketTimeoutException,
@@ -127,9 +125,14 @@ class PeerManager(object):
             return None
 
         logger.warning("Suspending peer %s:%s", peer.ip, peer.port)
-        self.redis.delete(self.key_active.format(peer.ip))
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.key_active, peer.ip)
         # TODO: also record for how long peer needs to be suspended
-        self.redis.set(self.key_suspended.format(peer.ip), peer.to_json())
+        pipe.hset(self.key_suspended, peer.ip, peer.to_json())
+        pipe.execute()
+
+    def save_active_peer(self, peer):
+        self.redis.hset(self.key_active, peer.ip, peer.to_json())
 
     def has_minimum_peers(self):
         return len(self.peers()) >= config.peers["minimum_network_reach"]
@@ -163,13 +163,19 @@ class Peer(object):
         logger.info(response)
         return response.get("common")
 
-    def fetch_blocks_from_height(self, from_height):
+    def fetch_blocks_from_height(self, from_height, decode=True):
+        """Fetches blocks following `from_height`
+
+        :param (bool) decode: return blocks as `Block` objects instead of dicts
+        """
         payload = {
             "lastBlockHeight": from_height,
             "serialized": True,
             "headersOnly": False,
         }
         blocks = self._fetch("p2p.peer.getBlocks", payload)
+        if not decode:
+            return blocks
         return [Block.from_dict(block) for block in blocks]
 
     def fetch_peers(self):
@@ -45,7 +45,7 @@ def add_peer(ip, port, chain_version, nethash, os):
             peer.port,
             peer.verification,
         )
-        peer_manager.redis.set(peer_manager.key_active.format(peer.ip), peer.to_json())
+        peer_manager.save_active_peer(peer)
 
 
 @huey.task()
@@ -61,9 +61,7 @@ def reverify_peer(ip):
             peer_manager.suspend_peer(peer)
         else:
             logger.info("Peer %s:%s successfully reverified", peer.ip, peer.port)
-            peer_manager.redis.set(
-                peer_manager.key_active.format(peer.ip), peer.to_json()
-            )
+            peer_manager.save_active_peer(peer)
     else:
         logger.warning("Couldn't find a peer to reverify")
 
@@ -3,6 +3,7 @@ import logging
 from chain.common.config import config
 from chain.common.plugins import load_plugin
 from chain.crypto.utils import calculate_round
+from chain.crypto.verifier import get_verifier
 
 
 logger = logging.getLogger(__name__)
@@ -103,8 +104,13 @@ def _find_highest_common_block_height(peer, min_height, max_height):
     return highest_matching
 
 
-def _is_valid_block(block, height, current_round, delegate_keys):
-    verified, errors = block.verify()
+def _is_valid_block(block, height, current_round, delegate_keys, verification=None):
+    """Checks a block received from a peer
+
+    :param (tuple) verification: result of `block.verify`, when the block was
+        already verified together with other blocks of its batch
+    """
+    verified, errors = verification or block.verify()
 
     if not verified:
         logger.info("Peer's block at height %s does not pass crypto validation", height)
@@ -144,18 +150,25 @@ def _verify_peer_blocks(peer, start_height, peer_height):
     end_height = min(peer_height, last_height_in_round)
 
     height_block_map = {}
+    verification_map = {}
     for height in range(start_height, end_height + 1):
         if height not in height_block_map:
             # Height does not exist in our map yet, so get it from the peer
             # To get the block with current height, we need to fetch for blocks from
             # previous height
             blocks = peer.fetch_blocks_from_height(height - 1)
-            for block in blocks:
+            verifications = get_verifier().verify_blocks(blocks)
+            for block, verification in zip(blocks, verifications):
                 height_block_map[block.height] = block
+                verification_map[block.height] = verification
 
         if height in height_block_map:
             is_valid = _is_valid_block(
-                height_block_map[height], height, current_round, delegate_keys
+                height_block_map[height],
+                height,
+                current_round,
+                delegate_keys,
+                verification=verification_map[height],
             )
             if not is_valid:
                 return False
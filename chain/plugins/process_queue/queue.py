@@ -24,8 +24,7 @@ class Queue(object):
         )
 
     def push_block(self, block):
-        serialized_block = block.serialize_full()
-        self.db.rpush(self.list_name, serialized_block)
+        self.db.rpush(self.list_name, block.to_bytes_full())
 
     def pop_block(self):
         return self.db.lpop(self.list_name)
@@ -37,7 +36,7 @@ class Queue(object):
             self.db.incr(key)
             return True
         else:
-            blocktime = config.get_milestone(block.height)["blocktime"]
+            blocktime = config.get_blocktime(block.height)
             # Expire the key after `blocktime` seconds
             self.db.set(key, 0, ex=blocktime)
             return False
@@ -16,7 +16,7 @@ def _calculate_dynamic_fee(transaction, satoshi_per_byte):
     addon_bytes = config.pool["dynamic_fees"]["addon_bytes_for_type"][
         str(transaction.type)
     ]
-    transaction_bytes = len(transaction.serialize()) / 2
+    transaction_bytes = len(transaction.to_bytes())
     return (addon_bytes + transaction_bytes) * satoshi_per_byte
 
 
@@ -8,6 +8,7 @@ from chain.common.config import config
 from chain.common.plugins import load_plugin
 from chain.crypto import time
 from chain.crypto.objects.transactions import from_dict, from_object
+from chain.crypto.verifier import get_verifier
 from chain.plugins.database.models.pool_transaction import PoolTransaction
 
 from .fees import valid_fee_for_broadcast, valid_fee_for_pool
@@ -34,36 +35,38 @@ class Pool(object):
 
         self.wallets = PoolWalletManager()
 
+    def _remove_transactions(self, ids):
+        """Removes transactions from the pool and drops their changes from pool
+        wallets
+        """
+        if not ids:
+            return
+        PoolTransaction.delete().where(PoolTransaction.id.in_(ids)).execute()
+        self.wallets.drop_transactions(ids)
+
     def _purge_expired(self):
         current_time = time.get_time()
-        expired_transactions = list(
-            PoolTransaction.select().where(PoolTransaction.expires_at <= current_time)
+        expired_transactions = PoolTransaction.select(PoolTransaction.id).where(
+            PoolTransaction.expires_at <= current_time
         )
-
-        ids = []
-        for trans in expired_transactions:
-            transaction = from_object(trans)
-            sender_wallet = self.find_by_public_key(transaction.sender_public_key)
-            transaction.revert_for_sender_wallet(sender_wallet)
-            ids.append(transaction.id)
-
-        delete_query = PoolTransaction.delete().where(PoolTransaction.id.in_(ids))
-        delete_query.execute()
+        self._remove_transactions([trans.id for trans in expired_transactions])
 
     def build_wallets(self):
         self.wallets.clear_wallets()
         self._purge_expired()
         last_block = self.database.get_last_block()
-        for trans in PoolTransaction.select():
-            transaction = from_object(trans)
+        purged_senders = set()
+        for trans in PoolTransaction.select().order_by(PoolTransaction.sequence):
+            if trans.sender_public_key in purged_senders:
+                continue
+            transaction = from_object(trans, trusted=True)
             sender_wallet = self.wallets.find_by_public_key(
                 transaction.sender_public_key
             )
             if transaction.can_be_applied_to_wallet(
-                sender_wallet, self.walelts, self, last_block.height
+                sender_wallet, self.database.wallets, last_block.height
             ):
-                transaction.apply_to_sender_wallet(sender_wallet)
-                self.wallets.save_wallet(sender_wallet)
+                self.wallets.apply_transaction(transaction)
             else:
                 logger.warning(
                     "Transaction %s can't be applied to wallet %s",
@@ -71,25 +74,24 @@ class Pool(object):
                     sender_wallet.address,
                 )
                 self._purge_sender(transaction.sender_public_key)
+                purged_senders.add(transaction.sender_public_key)
 
         logger.info("Transaction pool wallets have been successfully built")
 
     def _purge_sender(self, sender_public_key):
         logger.info("Purging sender %s from pool wallet manager", sender_public_key)
 
-        PoolTransaction.delete().where(
+        transactions = PoolTransaction.select(PoolTransaction.id).where(
             PoolTransaction.sender_public_key == sender_public_key
-        ).execute()
-
-        self.wallets.delete_by_public_key(sender_public_key)
+        )
+        self._remove_transactions([trans.id for trans in transactions])
 
     def transaction_exists(self, transaction_id):
         query = PoolTransaction.select().where(PoolTransaction.id == transaction_id)
         return query.exists()
 
     def remove_transaction_by_id(self, transaction_id):
-        query = PoolTransaction.delete().where(PoolTransaction.id == transaction_id)
-        query.execute()
+        self._remove_transactions([transaction_id])
 
     def is_sender_blocked(self, sender_public_key):
         """Checks if sender is blocked.
@@ -145,6 +147,10 @@ class Pool(object):
         return query.exists()
 
     def _validate_transaction(self, transaction, block_height, transactions):
+        """Returns the reason why a transaction can't be added to the pool, if any.
+        Signatures are not verified, as verifying them costs more than all the
+        other checks.
+        """
         if self.database.transaction_is_forged(transaction.id):
             return "Transaction {} already forged".format(transaction.id)
 
@@ -173,8 +179,18 @@ class Pool(object):
         if pool_error:
             return pool_error
 
-        if not transaction.verify():
-            return "Transaction {} didn't pass verification process".format(
+    def _admission_error(self, transaction, block_height, transactions):
+        """Returns the reason why a transaction can't be added to the pool in its
+        current state, if any, without verifying its signature
+        """
+        validation_error = self._validate_transaction(
+            transaction, block_height, transactions
+        )
+        if validation_error:
+            return validation_error
+
+        if not self.wallets.can_apply_to_sender(transaction, block_height):
+            return "Transaction {} can't be applied to senders wallet".format(
                 transaction.id
             )
 
@@ -219,24 +235,15 @@ class Pool(object):
             transaction.sequence = sequence
             transactions.append(transaction)
 
+        candidates = []
         for transaction in transactions:
             if self.has_sender_exceeded_max_transactions(transaction.sender_public_key):
                 excess.append(transaction.id)
                 continue
 
-            validation_error = self._validate_transaction(
-                transaction, last_block.height, transactions
-            )
-            if validation_error:
-                errors[transaction.id] = validation_error
-                continue
-
-            if not self.wallets.can_apply_to_sender(transaction, last_block.height):
-                errors[
-                    transaction.id
-                ] = "Transaction {} can't be applied to senders wallet".format(
-                    transaction.id
-                )
+            error = self._admission_error(transaction, last_block.height, transactions)
+            if error:
+                errors[transaction.id] = error
                 continue
 
             valid_for_pool = valid_fee_for_pool(transaction, last_block.height)
@@ -252,22 +259,53 @@ class Pool(object):
                 )
                 continue
 
+            candidates.append((transaction, valid_for_pool, valid_for_broadcast))
+
+        # Signatures are verified after the cheaper checks, so transactions that
+        # are rejected anyway are not verified, and only cached once accepted
+        verifier = get_verifier()
+        checks = [transaction.get_signature_check() for transaction, _, _ in candidates]
+        results = verifier.verify(checks, cache_results=False)
+
+        verified_checks = []
+        pool_changed = False
+        for (transaction, valid_for_pool, valid_for_broadcast), check, is_valid in zip(
+            candidates, checks, results
+        ):
+            if not is_valid:
+                errors[
+                    transaction.id
+                ] = "Transaction {} didn't pass verification process".format(
+                    transaction.id
+                )
+                continue
+
+            # Checks above ran before any transaction of this batch was added, so
+            # they are repeated once the pool or its wallets have changed
+            if pool_changed:
+                if self.has_sender_exceeded_max_transactions(
+                    transaction.sender_public_key
+                ):
+                    excess.append(transaction.id)
+                    continue
+
+                error = self._admission_error(
+                    transaction, last_block.height, transactions
+                )
+                if error:
+                    errors[transaction.id] = error
+                    continue
+
             if valid_for_pool:
                 count = PoolTransaction.select().count()
                 if count > config.pool["max_transactions_in_pool"]:
                     lowest_pool = (
-                        PoolTransaction.select(PoolTransaction.fee)
+                        PoolTransaction.select(PoolTransaction.id, PoolTransaction.fee)
                         .order_by(PoolTransaction.fee.asc())
                         .first()
                     )
-                    lowest = from_object(lowest_pool)
-                    if lowest.fee < transaction.fee:
-                        lowest_sender = self.wallets.find_by_public_key(
-                            lowest.sender_public_key
-                        )
-                        lowest.revert_for_sender_wallet(lowest_sender)
-                        self.wallets.save_wallet(lowest_sender)
-                        lowest_pool.delete_instance()
+                    if lowest_pool.fee < transaction.fee:
+                        self._remove_transactions([lowest_pool.id])
                     else:
                         errors[transaction.id] = (
                             "Pool is full (has {} transactions) and this transaction's "
@@ -277,14 +315,13 @@ class Pool(object):
                         continue
 
                 # Add transaction to the pool
-                sender_wallet = self.wallets.find_by_public_key(
-                    transaction.sender_public_key
-                )
-                transaction.apply_to_sender_wallet(sender_wallet)
-                self.wallets.save_wallet(sender_wallet)
+                self.wallets.apply_transaction(transaction)
                 pool_transaction = PoolTransaction.from_crypto(transaction)
                 pool_transaction.save()
                 accepted.append(transaction.id)
+                pool_changed = True
+
+            verified_checks.append(check)
 
             if valid_for_broadcast:
                 broadcasted.append(transaction.id)
@@ -294,6 +331,7 @@ class Pool(object):
                 # (guard.getBroadcastTransactions());
                 # }
 
+        verifier.cache_verified(verified_checks)
         return {
             "accepted": accepted,
             "broadcasted": broadcasted,
@@ -304,50 +342,36 @@ class Pool(object):
 
     def accept_chained_block(self, block):
         """Processes recently accepted block by the blockchain.
-        Removes block transactions from the pool and adjusts pool wallets for non
-        existing transactions.
+        Removes block transactions from the pool and drops their changes from pool
+        wallets. Wallets of the blockchain already include the block, so nothing
+        else has to be applied to pool wallets. Senders that can no longer cover
+        their pool transactions are purged and blocked.
 
         :param Block block: Accepted block object
         """
-        for transaction in block.transactions:
-
-            if self.wallets.exists_by_address(transaction.recipient_id):
-                recipient_wallet = self.wallets.find_by_address(
-                    transaction.recipient_id
-                )
-                transaction.apply_to_recipient_wallet(recipient_wallet)
-                self.wallets.save_wallet(recipient_wallet)
-
-            sender_wallet = None
-            if self.wallets.exists_by_public_key(transaction.sender_public_key):
-                sender_wallet = self.wallets.find_by_public_key(
-                    transaction.sender_public_key
-                )
-
-            if self.transaction_exists(transaction.id):
-                self.remove_transaction_by_id(transaction.id)
-            elif sender_wallet:
-                if transaction.can_be_applied_to_wallet(
-                    sender_wallet, self.wallets, block.height
-                ):
-                    transaction.apply_to_sender_wallet(sender_wallet)
-                    self.wallets.save_wallet(sender_wallet)
-                else:
-                    self._purge_sender(transaction.sender_public_key)
-                    self.block_sender(transaction.sender_public_key)
-
-            if (
-                sender_wallet
-                and sender_wallet.can_be_purged()
-                and not self.sender_has_any_transactions(transaction.sender_public_key)
-            ):
-                self.wallets.delete_by_public_key(sender_wallet.public_key)
-
-        # If delegate is in pool wallet manager apply rewards and fees
-        if self.wallets.exists_by_public_key(block.generator_public_key):
-            delegate_wallet = self.wallets.find_by_public_key(
-                block.generator_public_key
+        ids = block.get_transaction_ids()
+        if not ids:
+            return
+        pool_ids = [
+            trans.id
+            for trans in PoolTransaction.select(PoolTransaction.id).where(
+                PoolTransaction.id.in_(ids)
+            )
+        ]
+        self._remove_transactions(pool_ids)
+
+        pool_ids = set(pool_ids)
+        senders = dict.fromkeys(
+            sender_public_key
+            for transaction_id, sender_public_key in zip(
+                ids, block.get_sender_public_keys()
             )
-            total = block.reward + block.total_fee
-            delegate_wallet.balance += total
-            self.wallets.save_wallet(delegate_wallet)
+            if transaction_id not in pool_ids
+        )
+        for sender_public_key in senders:
+            if not self.wallets.exists_by_public_key(sender_public_key):
+                continue
+            sender_wallet = self.wallets.find_by_public_key(sender_public_key)
+            if sender_wallet.balance < 0:
+                self._purge_sender(sender_public_key)
+                self.block_sender(sender_public_key)
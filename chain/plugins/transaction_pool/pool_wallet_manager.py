@@ -6,14 +6,30 @@ from redis import Redis
 
 from chain.common.plugins import load_plugin
 from chain.crypto.address import address_from_public_key
-from chain.crypto.models.wallet import Wallet
 from chain.crypto.utils import is_transaction_exception
 
 logger = logging.getLogger(__name__)
 
 
 class PoolWalletManager(object):
-    _key = "pool_wallet:address:{}"
+    """Wallets as seen by the transaction pool: wallets of the blockchain wallet
+    manager with pending pool transactions applied.
+
+    Only changes made by pool transactions are stored: the pending debit of each
+    sender and the fields (flags) pool transactions set on wallets. Changes of
+    each transaction are recorded as well, so they can be dropped once the
+    transaction is forged or removed from the pool.
+    """
+
+    # Hash of pending debits by address
+    _debits_key = "pool_wallets:debits"
+    # Hash of JSON values of fields set by pool transactions, by "<address>:<field>"
+    _flags_key = "pool_wallets:flags"
+    # Hash of changes made by each pool transaction, by transaction id
+    _transactions_key = "pool_wallets:transactions"
+
+    # Wallet fields that transactions set on the sender's wallet
+    flag_fields = ["second_public_key", "multisignature", "vote", "username"]
 
     def __init__(self):
         super().__init__()
@@ -26,38 +42,41 @@ class PoolWalletManager(object):
             db=os.environ.get("REDIS_DB", 0),
         )
 
-    def key_for_address(self, address):
-        return self._key.format(address)
+    def _flag_key(self, address, field):
+        return "{}:{}".format(address, field)
 
     def clear_wallets(self):
         """Clear all pool wallets from redis
         """
-        keys = self.redis.keys(self.key_for_address("*"))
-        if keys:
-            self.redis.delete(*keys)
-
-    def save_wallet(self, wallet):
-        self.redis.set(self.key_for_address(wallet.address), wallet.to_json())
+        self.redis.unlink(self._debits_key, self._flags_key, self._transactions_key)
 
     def find_by_address(self, address):
-        """Finds a wallet by a given address. If wallet is not found, it is copied from
-        blockchain wallet manager.
+        """Finds a wallet by a given address. The wallet of the blockchain wallet
+        manager is merged with changes of pending pool transactions.
 
         :param string address: wallet address
         :returns Wallet: wallet object
         """
-        key = self.key_for_address(address)
-        if not self.redis.exists(key):
-            self.save_wallet(self.database.wallets.find_by_address(address))
-        wallet = json.loads(self.redis.get(key))
-        return Wallet(wallet)
+        wallet = self.database.wallets.find_by_address(address)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hget(self._debits_key, address)
+        pipe.hmget(
+            self._flags_key,
+            [self._flag_key(address, field) for field in self.flag_fields],
+        )
+        debit, flags = pipe.execute()
+        if debit is not None:
+            wallet.balance -= int(debit)
+        for field, value in zip(self.flag_fields, flags):
+            if value is not None:
+                setattr(wallet, field, json.loads(value))
+        return wallet
 
     def find_by_public_key(self, public_key):
         """Finds a wallet by public key.
 
         It calculates the address from public key and uses the `find_by_address`
-        function, which if wallet is not found for this address, it copies it from
-        blockchain wallet manager.
+        function.
 
         :param string public_key: wallet's public key
         :returns Wallet: wallet object
@@ -66,21 +85,81 @@ class PoolWalletManager(object):
         return self.find_by_address(address)
 
     def exists_by_address(self, address):
-        key = self.key_for_address(address)
-        return self.redis.exists(key)
+        """Checks if pool transactions changed the wallet
+        """
+        return self.redis.hexists(self._debits_key, address)
 
     def exists_by_public_key(self, public_key):
         address = address_from_public_key(public_key)
         return self.exists_by_address(address)
 
-    def delete_by_public_key(self, public_key):
-        """Deletes a wallet by public key
+    def apply_transaction(self, transaction):
+        """Applies a pool transaction to its sender's wallet by storing the changes
+        it makes
 
-        :param string public_key: wallets' public key
+        :param Transaction transaction: Crypto transaction object
         """
-        address = address_from_public_key(public_key)
-        key = self.key_for_address(address)
-        self.redis.delete(key)
+        wallet = self.find_by_public_key(transaction.sender_public_key)
+        changed = wallet.copy()
+        transaction.apply_to_sender_wallet(changed)
+
+        debit = wallet.balance - changed.balance
+        flags = {
+            self._flag_key(wallet.address, field): json.dumps(getattr(changed, field))
+            for field in self.flag_fields
+            if getattr(changed, field) != getattr(wallet, field)
+        }
+        changes = {"address": wallet.address, "debit": debit, "flags": list(flags)}
+
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self._debits_key, wallet.address, debit)
+        if flags:
+            pipe.hmset(self._flags_key, flags)
+        pipe.hset(self._transactions_key, transaction.id, json.dumps(changes))
+        pipe.execute()
+
+    def drop_transactions(self, transaction_ids):
+        """Drops changes of pool transactions from wallets, eg. when they are forged
+        or removed from the pool. Unknown transactions are ignored.
+
+        :param list transaction_ids: ids of transactions
+        """
+        if not transaction_ids:
+            return
+        changes = [
+            json.loads(data)
+            for data in self.redis.hmget(self._transactions_key, transaction_ids)
+            if data is not None
+        ]
+        pipe = self.redis.pipeline()
+        for change in changes:
+            pipe.hincrby(self._debits_key, change["address"], -change["debit"])
+        flags = [flag for change in changes for flag in change["flags"]]
+        if flags:
+            pipe.hdel(self._flags_key, *flags)
+        pipe.hdel(self._transactions_key, *transaction_ids)
+        debits = pipe.execute()
+
+        addresses = [
+            change["address"] for change, debit in zip(changes, debits) if debit == 0
+        ]
+        if addresses:
+            self._delete_empty_debits(addresses)
+
+    def _delete_empty_debits(self, addresses):
+        # Debits are only deleted if no transaction was added in the meantime
+        def delete(pipe):
+            debits = pipe.hmget(self._debits_key, addresses)
+            empty = [
+                address
+                for address, debit in zip(addresses, debits)
+                if debit is not None and int(debit) == 0
+            ]
+            pipe.multi()
+            if empty:
+                pipe.hdel(self._debits_key, *empty)
+
+        self.redis.transaction(delete, self._debits_key)
 
     def can_apply_to_sender(self, transaction, block_height):
         """Checks if transaction can be applied to senders wallet
@@ -1,10 +1,7 @@
-from base58 import b58decode_check
-
-from binary.unsigned_integer import read_bit8
-
 from chain.common.config import config
+from chain.crypto.address_codec import address_to_bytes
 
 
 def is_recipient_on_current_network(recipient_id):
-    prefix = read_bit8(b58decode_check(recipient_id))
+    prefix = address_to_bytes(recipient_id)[0]
     return prefix == config.network["pubKeyHash"]
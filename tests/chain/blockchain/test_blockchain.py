@@ -0,0 +1,144 @@
+from binascii import unhexlify
+from types import SimpleNamespace
+
+import pytest
+
+from chain.blockchain.blockchain import Blockchain
+from chain.blockchain.constants import BLOCK_REJECTED
+from chain.common.config import config
+from chain.common.plugins import load_plugin
+from chain.crypto.models.wallet import Wallet
+from chain.crypto.objects.block import Block
+from chain.plugins.database.models.pool_transaction import PoolTransaction
+
+SENDER_ADDRESS = "AS2YSSDbbXBAehfbm1KAEvJMJFdPPT2aRT"
+
+
+class StopConsuming(Exception):
+    pass
+
+
+@pytest.fixture
+def block_bytes(dummy_block_full_hash):
+    return unhexlify(dummy_block_full_hash)
+
+
+@pytest.fixture
+def blockchain(mocker):
+    blockchain = Blockchain.__new__(Blockchain)
+    blockchain.database = mocker.Mock()
+    blockchain.process_queue = mocker.Mock()
+    blockchain.peers = mocker.Mock()
+    blockchain.transaction_pool = mocker.Mock()
+    mocker.patch.object(blockchain, "revert_blocks")
+    return blockchain
+
+
+def _previous_block(block):
+    return SimpleNamespace(
+        id=block.previous_block, height=block.height - 1, timestamp=block.timestamp
+    )
+
+
+@pytest.fixture
+def invalid_checkpoint_block(block_bytes, mocker):
+    block = Block.from_bytes(block_bytes, lazy=True)
+    mocker.patch.object(config, "checkpoints", {block.height: "123"})
+    mocker.patch.object(config, "last_checkpoint_height", block.height)
+    mocker.patch.object(Block, "verify", return_value=(False, ["Invalid block"]))
+    return block
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_process_block_rejects_invalid_block_at_checkpoint_height(
+    blockchain, invalid_checkpoint_block, mocker, fast
+):
+    mocker.patch.dict(config.sync, {"fast": fast})
+    block = invalid_checkpoint_block
+
+    assert blockchain.process_block(block, _previous_block(block)) == BLOCK_REJECTED
+    assert blockchain.revert_blocks.call_count == 0
+    assert blockchain.database.apply_block.call_count == 0
+
+
+def test_consume_queue_rejects_invalid_block_at_checkpoint_height(
+    blockchain, invalid_checkpoint_block, block_bytes, mocker
+):
+    block = invalid_checkpoint_block
+    blockchain.process_queue.pop_block.return_value = block_bytes
+    blockchain.database.get_last_block.return_value = _previous_block(block)
+    mocker.patch.object(blockchain, "is_synced", side_effect=StopConsuming)
+    process_block = mocker.spy(blockchain, "process_block")
+
+    with pytest.raises(StopConsuming):
+        blockchain.consume_queue()
+
+    assert process_block.spy_return == BLOCK_REJECTED
+    assert blockchain.revert_blocks.call_count == 0
+    assert blockchain.database.apply_block.call_count == 0
+
+
+@pytest.fixture
+def chained_blockchain(blockchain, empty_db, redis, crypto_transaction, mocker):
+    """Blockchain with a real database and pool, where the pool holds
+    `crypto_transaction` that gets included in a block
+    """
+    mocker.patch.dict(config.snapshots, {"interval": 0})
+    blockchain.database = load_plugin("chain.plugins.database")
+    mocker.patch.object(blockchain.database.wallets, "apply_block")
+    mocker.patch.object(blockchain.database, "apply_round")
+    mocker.patch.object(blockchain.database, "save_blocks")
+    blockchain.transaction_pool = load_plugin("chain.plugins.transaction_pool")
+
+    wallet = Wallet(
+        {
+            "address": SENDER_ADDRESS,
+            "public_key": crypto_transaction.sender_public_key,
+            "balance": 133700000,
+        }
+    )
+    redis.hset("wallets:addresses", SENDER_ADDRESS, wallet.to_bytes())
+    crypto_transaction.version = 1
+    crypto_transaction.sequence = 1
+    blockchain.transaction_pool.wallets.apply_transaction(crypto_transaction)
+    PoolTransaction.from_crypto(crypto_transaction).save(force_insert=True)
+    return blockchain
+
+
+@pytest.fixture
+def chained_block(crypto_transaction, mocker):
+    block = mocker.Mock(id="1", height=2)
+    block.get_transaction_ids.return_value = [crypto_transaction.id]
+    block.get_sender_public_keys.return_value = [crypto_transaction.sender_public_key]
+    return block
+
+
+def test_handle_accepted_block_keeps_pool_changes_if_group_commit_fails(
+    chained_blockchain, chained_block, redis
+):
+    with pytest.raises(ValueError):
+        with chained_blockchain.database.group_commit():
+            chained_blockchain._handle_accepted_block(chained_block)
+            raise ValueError("Block not accepted")
+
+    assert redis.hget("pool_wallets:debits", SENDER_ADDRESS) == b"100342000"
+    assert PoolTransaction.select().count() == 1
+
+
+def test_handle_accepted_block_drops_pool_changes_after_group_commit(
+    chained_blockchain, chained_block, redis, mocker
+):
+    def commit_batch():
+        # Pool changes are still there when wallets of the blockchain are written
+        assert redis.hget("pool_wallets:debits", SENDER_ADDRESS) == b"100342000"
+
+    mocker.patch.object(
+        chained_blockchain.database.wallets, "commit_batch", side_effect=commit_batch
+    )
+
+    with chained_blockchain.database.group_commit():
+        chained_blockchain._handle_accepted_block(chained_block)
+        assert redis.hget("pool_wallets:debits", SENDER_ADDRESS) == b"100342000"
+
+    assert redis.hget("pool_wallets:debits", SENDER_ADDRESS) is None
+    assert PoolTransaction.select().count() == 0
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from chain.blockchain.constants import BLOCK_ACCEPTED, BLOCK_REJECTED
+from chain.blockchain.sync import STAGE_APPLY, STAGE_FETCH, STAGE_VERIFY, SyncPipeline
+from chain.common.config import config
+from chain.common.exceptions import PeerNotFoundException
+
+
+class FakePeers(object):
+    def __init__(self, last_height, batch_size=3, gap=0):
+        self.last_height = last_height
+        self.batch_size = batch_size
+        self.gap = gap
+        self.requested_heights = []
+
+    def fetch_blocks(self, from_height, decode=True):
+        assert decode is False
+        self.requested_heights.append(from_height)
+        from_height += self.gap
+        heights = range(
+            from_height + 1, min(from_height + self.batch_size, self.last_height) + 1
+        )
+        return [{"id": str(height), "height": height} for height in heights]
+
+
+@pytest.fixture(autouse=True)
+def decode(mocker):
+    mocker.patch(
+        "chain.blockchain.sync.Block.from_dict",
+        side_effect=lambda data: SimpleNamespace(number_of_transactions=0, **data),
+    )
+    verifier = mocker.patch("chain.blockchain.sync.get_verifier").return_value
+    verifier.verify_blocks.side_effect = lambda blocks: [(True, [])] * len(blocks)
+    mocker.patch(
+        "chain.blockchain.sync.is_block_chained",
+        side_effect=lambda previous, block: block.height == previous.height + 1,
+    )
+    return verifier
+
+
+def test_run_applies_all_blocks_in_order():
+    peers = FakePeers(last_height=10)
+    pipeline = SyncPipeline(peers, SimpleNamespace(id="1", height=1), queue_size=1)
+    applied = []
+
+    def process_block(block, last_block, verification):
+        assert block.height == last_block.height + 1
+        assert verification == (True, [])
+        applied.append(block.height)
+        return BLOCK_ACCEPTED
+
+    last_block = pipeline.run(process_block)
+
+    assert applied == list(range(2, 11))
+    assert last_block.height == 10
+    assert peers.requested_heights == [1, 4, 7, 10]
+    assert pipeline.stats[STAGE_FETCH].batches == 4
+    assert pipeline.stats[STAGE_VERIFY].blocks == 9
+    assert pipeline.stats[STAGE_APPLY].blocks == 9
+    utilization = pipeline.utilization()
+    assert set(utilization) == {STAGE_FETCH, STAGE_VERIFY, STAGE_APPLY}
+    assert all(0 <= value <= 1 for value in utilization.values())
+
+
+def test_run_stops_at_unchained_batch():
+    peers = FakePeers(last_height=10, gap=1)
+    pipeline = SyncPipeline(peers, SimpleNamespace(height=5))
+    applied = []
+
+    last_block = pipeline.run(lambda block, *args: applied.append(block))
+
+    assert applied == []
+    assert last_block.height == 5
+
+
+def test_run_raises_if_block_is_not_accepted():
+    peers = FakePeers(last_height=100)
+    pipeline = SyncPipeline(peers, SimpleNamespace(height=1))
+
+    def process_block(block, last_block, verification):
+        return BLOCK_ACCEPTED if block.height < 3 else BLOCK_REJECTED
+
+    with pytest.raises(Exception) as excinfo:
+        pipeline.run(process_block)
+    assert str(excinfo.value) == "Block not accepted"
+    assert pipeline.last_block.height == 2
+
+
+def test_run_raises_errors_of_other_stages(mocker):
+    peers = FakePeers(last_height=10)
+    mocker.patch.object(peers, "fetch_blocks", side_effect=ValueError("Bad response"))
+    pipeline = SyncPipeline(peers, SimpleNamespace(height=1))
+
+    with pytest.raises(ValueError):
+        pipeline.run(lambda *args: BLOCK_ACCEPTED)
+
+
+def test_fetch_retries_if_there_are_no_peers(mocker):
+    peers = FakePeers(last_height=4)
+    fetch_blocks = peers.fetch_blocks
+    mocker.patch.object(
+        peers,
+        "fetch_blocks",
+        side_effect=[PeerNotFoundException("Can't find an active peer.")]
+        + [fetch_blocks(1, decode=False), []],
+    )
+    sleep = mocker.patch("chain.blockchain.sync.sleep")
+    pipeline = SyncPipeline(peers, SimpleNamespace(height=1))
+
+    last_block = pipeline.run(lambda *args: BLOCK_ACCEPTED)
+
+    assert sleep.call_count == 1
+    assert last_block.height == 4
+
+
+def test_fast_run_skips_verification_of_checkpointed_blocks(mocker, decode):
+    mocker.patch.object(config, "last_checkpoint_height", 5)
+    verify_checkpointed_blocks = mocker.patch(
+        "chain.blockchain.sync.verify_checkpointed_blocks",
+        side_effect=lambda blocks, verifier: [(True, [])] * len(blocks),
+    )
+    peers = FakePeers(last_height=10)
+    pipeline = SyncPipeline(peers, SimpleNamespace(height=1), fast=True)
+
+    pipeline.run(lambda *args: BLOCK_ACCEPTED)
+
+    checkpointed_heights = [
+        block.height
+        for call_args in verify_checkpointed_blocks.call_args_list
+        for block in call_args[0][0]
+    ]
+    verified_heights = [
+        block.height
+        for call_args in decode.verify_blocks.call_args_list
+        for block in call_args[0][0]
+    ]
+    assert checkpointed_heights == [2, 3, 4, 5]
+    assert verified_heights == [6, 7, 8, 9, 10]
+
+
+def test_run_applies_each_batch_in_group_commit():
+    peers = FakePeers(last_height=7)
+    batches = []
+
+    @contextmanager
+    def group_commit():
+        batches.append([])
+        yield
+
+    def process_block(block, last_block, verification):
+        batches[-1].append(block.height)
+        return BLOCK_ACCEPTED
+
+    pipeline = SyncPipeline(
+        peers, SimpleNamespace(id="1", height=1), group_commit=group_commit
+    )
+    pipeline.run(process_block)
+
+    assert batches == [[2, 3, 4], [5, 6, 7]]
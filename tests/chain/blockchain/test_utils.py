@@ -0,0 +1,126 @@
+from binascii import unhexlify
+from hashlib import sha256
+from types import SimpleNamespace
+
+import pytest
+
+from chain.blockchain.utils import (
+    find_anchored_blocks,
+    is_checkpointed,
+    verify_checkpointed_blocks,
+)
+from chain.common.config import config
+from chain.crypto.objects.block import Block
+
+
+@pytest.fixture
+def block_bytes(dummy_block_full_hash):
+    return unhexlify(dummy_block_full_hash)
+
+
+def _make_block(block_bytes, lazy=False):
+    block = Block.from_bytes(block_bytes, lazy=lazy)
+    # Payload hash of the dummy block doesn't match its transactions
+    block.payload_hash = sha256(
+        unhexlify("".join(block.get_transaction_ids()))
+    ).hexdigest()
+    return block
+
+
+@pytest.fixture
+def checkpoints(mocker):
+    def set_checkpoints(checkpoints):
+        mocker.patch.object(config, "checkpoints", checkpoints)
+        mocker.patch.object(config, "last_checkpoint_height", max(checkpoints))
+
+    return set_checkpoints
+
+
+def test_is_checkpointed(block_bytes, checkpoints):
+    block = Block.from_bytes(block_bytes)
+    checkpoints({block.height: block.id})
+    assert is_checkpointed(block) is True
+
+    checkpoints({block.height - 1: block.id})
+    assert is_checkpointed(block) is False
+
+
+def _header(height, previous_block):
+    return SimpleNamespace(
+        id="id{}".format(height), height=height, previous_block=previous_block
+    )
+
+
+def test_find_anchored_blocks(checkpoints):
+    blocks = [_header(2, "id1"), _header(3, "id2"), _header(4, "id3")]
+    checkpoints({3: "id3"})
+    assert find_anchored_blocks(blocks) == [True, True, False]
+
+    checkpoints({4: "id4"})
+    assert find_anchored_blocks(blocks) == [True, True, True]
+
+    checkpoints({3: "other"})
+    assert find_anchored_blocks(blocks) == [False, False, False]
+
+
+def test_find_anchored_blocks_requires_blocks_to_be_chained(checkpoints):
+    blocks = [_header(2, "id1"), _header(3, "other"), _header(4, "id3")]
+    checkpoints({4: "id4"})
+    assert find_anchored_blocks(blocks) == [False, True, True]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_verify_checkpointed_blocks_skips_signatures_of_anchored_blocks(
+    block_bytes, checkpoints, mocker, lazy
+):
+    block = _make_block(block_bytes, lazy=lazy)
+    checkpoints({block.height: block.id})
+    verifier = mocker.Mock()
+    verifier.verify_blocks.return_value = []
+
+    assert verify_checkpointed_blocks([block], verifier=verifier) == [(True, [])]
+    verifier.verify_blocks.assert_called_once_with([])
+
+
+def test_verify_checkpointed_blocks_fully_verifies_blocks_that_are_not_anchored(
+    block_bytes, checkpoints, mocker
+):
+    block = _make_block(block_bytes, lazy=True)
+    checkpoints({block.height + 1: "123"})
+    verifier = mocker.Mock()
+    verifier.verify_blocks.return_value = [(False, ["Failed to verify"])]
+
+    assert verify_checkpointed_blocks([block], verifier=verifier) == [
+        (False, ["Failed to verify"])
+    ]
+    verifier.verify_blocks.assert_called_once_with([block])
+
+
+def test_verify_checkpointed_blocks_checks_checkpoint_id(
+    block_bytes, checkpoints, mocker
+):
+    block = _make_block(block_bytes, lazy=True)
+    checkpoints({block.height: "123"})
+    verifier = mocker.Mock()
+    verifier.verify_blocks.return_value = [(True, [])]
+
+    assert verify_checkpointed_blocks([block], verifier=verifier) == [
+        (
+            False,
+            [
+                "Block id {} does not match checkpoint 123 at height {}".format(
+                    block.id, block.height
+                )
+            ],
+        )
+    ]
+
+
+def test_verify_checkpointed_blocks_checks_payload(block_bytes, checkpoints):
+    block = _make_block(block_bytes, lazy=True)
+    checkpoints({block.height: block.id})
+    block.transactions = []
+
+    assert verify_checkpointed_blocks([block]) == [
+        (False, ["Invalid number of transactions", "Invalid payload hash"])
+    ]
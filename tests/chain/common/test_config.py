@@ -0,0 +1,35 @@
+import pytest
+
+from chain.common.config import config
+
+
+@pytest.mark.parametrize(
+    "height,expected",
+    [(1, 1), (75599, 1), (75600, 75600), (99999, 75600), (4000000, 4000000)],
+)
+def test_get_milestone_returns_last_milestone_for_height(height, expected):
+    assert config.get_milestone(height)["height"] == expected
+
+
+def test_get_milestone_returns_none_before_first_milestone():
+    assert config.get_milestone(0) is None
+
+
+def test_milestone_values():
+    assert config.get_blocktime(1) == 8
+    assert config.get_active_delegates(1) == 51
+    assert config.get_reward(1) == 0
+    assert config.get_reward(75600) == 200000000
+    assert config.is_id_full_sha256(3999999) is False
+    assert config.is_id_full_sha256(4000000) is True
+
+
+def test_milestone_values_raise_before_first_milestone():
+    with pytest.raises(ValueError) as excinfo:
+        config.get_blocktime(0)
+    assert str(excinfo.value) == "There is no milestone for height 0"
+
+
+def test_exception_tables_are_frozensets():
+    assert isinstance(config.exception_blocks, frozenset)
+    assert isinstance(config.exception_transactions, frozenset)
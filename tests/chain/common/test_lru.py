@@ -0,0 +1,68 @@
+import threading
+
+from chain.common.lru import LRUCache
+
+
+def test_get_returns_default_for_missing_key():
+    cache = LRUCache(2)
+    assert cache.get("spongebob") is None
+    assert cache.get("spongebob", "patrick") == "patrick"
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(2)
+    cache.set("spongebob", 1)
+    cache.set("patrick", 2)
+    cache.get("spongebob")
+    cache.set("squidward", 3)
+
+    assert len(cache) == 2
+    assert "patrick" not in cache
+    assert cache.get("spongebob") == 1
+    assert cache.get("squidward") == 3
+
+
+def test_info_counts_hits_and_misses():
+    cache = LRUCache(10)
+    cache.set("spongebob", 1)
+    cache.get("spongebob")
+    cache.get("spongebob")
+    cache.get("patrick")
+
+    assert cache.info() == {
+        "hits": 2,
+        "misses": 1,
+        "hit_rate": 2 / 3,
+        "size": 1,
+        "max_size": 10,
+    }
+
+
+def test_clear_resets_counters():
+    cache = LRUCache(10)
+    cache.set("spongebob", 1)
+    cache.get("spongebob")
+    cache.clear()
+
+    assert cache.info()["hits"] == 0
+    assert len(cache) == 0
+
+
+def test_can_be_shared_between_threads():
+    cache = LRUCache(10)
+
+    def use_cache(offset):
+        for index in range(5000):
+            cache.set((offset + index) % 20, index)
+            cache.get((offset + index + 1) % 20)
+
+    threads = [
+        threading.Thread(target=use_cache, args=(offset,)) for offset in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 10
+    assert cache.hits + cache.misses == 8 * 5000
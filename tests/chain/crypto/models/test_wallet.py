@@ -1,3 +1,5 @@
+import pytest
+
 from chain.crypto.models.wallet import Wallet
 
 # TODO: MOARD TESTS!!!
@@ -49,3 +51,83 @@ def test_wallet_sets_attributes_with_correct_values():
     assert wallet.missed_blocks == data["missed_blocks"]
     assert wallet.forged_fees == data["forged_fees"]
     assert wallet.forged_rewards == data["forged_rewards"]
+
+
+def test_to_bytes_stores_keys_as_raw_bytes():
+    wallet = Wallet(
+        {
+            "address": "DSMxEhoudwLYVt1jtHDu1dtisa2gS7LeCW",
+            "public_key": (
+                "023918d30ff448ec897e12b77ccd529835c78aee07db1682639320c253cc21a1c7"
+            ),
+            "balance": 1337,
+        }
+    )
+    data = wallet.to_bytes()
+    # header, address with its length and 33 byte public key
+    assert len(data) == 43 + 36 + 33
+    assert data[:3] == b"\x01\x03\x02"
+    assert Wallet.from_bytes(data).to_dict() == wallet.to_dict()
+
+
+def test_from_bytes_restores_all_fields():
+    wallet = Wallet(
+        {
+            "address": "DSMxEhoudwLYVt1jtHDu1dtisa2gS7LeCW",
+            "public_key": (
+                "023918d30ff448ec897e12b77ccd529835c78aee07db1682639320c253cc21a1c7"
+            ),
+            "second_public_key": (
+                "03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"
+            ),
+            "multisignature": {"min": 2, "lifetime": 24, "keysgroup": ["+02aa"]},
+            "vote": (
+                "023918d30ff448ec897e12b77ccd529835c78aee07db1682639320c253cc21a1c7"
+            ),
+            "username": "spongebob",
+            "balance": -100,
+            "vote_balance": int(1e18),
+            "produced_blocks": 3,
+            "missed_blocks": 2,
+            "forged_fees": 1000,
+            "forged_rewards": 200000000,
+        }
+    )
+    assert Wallet.from_bytes(wallet.to_bytes()).to_dict() == wallet.to_dict()
+
+
+def test_from_bytes_keeps_values_that_are_not_keys():
+    wallet = Wallet({"address": "spongebob", "public_key": "harambe", "vote": "AB"})
+    data = wallet.to_bytes()
+    assert data[2] == 0
+    assert Wallet.from_bytes(data).to_dict() == wallet.to_dict()
+
+
+def test_to_bytes_stores_long_text():
+    wallet = Wallet({"address": "spongebob", "username": "a" * 300})
+    assert Wallet.from_bytes(wallet.to_bytes()).to_dict() == wallet.to_dict()
+
+
+def test_to_bytes_raises_for_text_that_is_too_long():
+    wallet = Wallet({"address": "spongebob", "username": "a" * 70000})
+    with pytest.raises(ValueError):
+        wallet.to_bytes()
+
+
+def test_from_bytes_reads_json():
+    wallet = Wallet({"address": "spongebob", "balance": 5})
+    assert Wallet.from_bytes(wallet.to_json().encode()).to_dict() == wallet.to_dict()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\x02" + Wallet({"address": "spongebob"}).to_bytes()[1:],
+        Wallet({"address": "spongebob"}).to_bytes()[:-1],
+        Wallet({"address": "spongebob"}).to_bytes() + b"\x00",
+    ],
+)
+def test_from_bytes_raises_for_invalid_data(data):
+    with pytest.raises(ValueError):
+        Wallet.from_bytes(data)
@@ -0,0 +1,64 @@
+import pytest
+
+from chain.crypto.objects.base import BaseObject, IntField, ListField, StrField
+
+
+class Dummy(BaseObject):
+    name = StrField(attr="name", required=True, default=None)
+    height = IntField(attr="height", required=False, default=None)
+    items = ListField(attr="items", required=False)
+
+
+class ChildDummy(Dummy):
+    nonce = IntField(attr="nonce", required=False, default=0)
+
+
+def test_field_values_are_stored_in_slots():
+    dummy = Dummy(name="spongebob", height=1)
+    assert "name" in Dummy.__slots__
+    assert "height" in Dummy.__slots__
+    assert ChildDummy.__slots__ == ("nonce",)
+    assert dummy.name == "spongebob"
+    assert dummy.height == 1
+
+
+def test_fields_are_not_duplicated_in_subclasses():
+    names = [field.name for field in ChildDummy._fields]
+    assert sorted(names) == ["height", "items", "name", "nonce"]
+
+
+def test_setter_converts_value():
+    dummy = Dummy(name=b"patrick", height="5")
+    assert dummy.name == "patrick"
+    assert dummy.height == 5
+
+
+def test_setter_raises_type_error_for_invalid_type():
+    dummy = Dummy()
+    with pytest.raises(TypeError) as excinfo:
+        dummy.height = 1.5
+    assert str(excinfo.value) == (
+        "Attribute height (<class 'float'>) must be of type (<class 'str'>, "
+        "<class 'int'>)"
+    )
+
+
+def test_setter_raises_value_error_if_required_value_is_none():
+    dummy = Dummy()
+    with pytest.raises(ValueError) as excinfo:
+        dummy.name = None
+    assert str(excinfo.value) == 'Attribute "name" is required'
+
+
+def test_trusted_object_skips_validation():
+    dummy = ChildDummy(data={"name": None, "height": "5"}, trusted=True)
+    assert dummy.name is None
+    assert dummy.height == "5"
+    dummy.nonce = 1.5
+    assert dummy.nonce == 1.5
+
+
+def test_non_field_attributes_can_be_set():
+    dummy = Dummy()
+    dummy.something = "squidward"
+    assert dummy.something == "squidward"
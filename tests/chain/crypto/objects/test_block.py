@@ -1,8 +1,10 @@
+from binascii import unhexlify
 from copy import deepcopy
 
 import pytest
 
 from chain.crypto.objects.block import Block
+from chain.crypto.objects.transaction_batch import TransactionBatch
 
 
 # TODO: MOARD TESTS!!!
@@ -51,6 +53,41 @@ def test_serialize_correctly_serializes_just_the_block(crypto_block, dummy_block
     assert serialized == dummy_block_hash
 
 
+def test_to_bytes_full_returns_raw_bytes(crypto_block, dummy_block_full_hash):
+    data = crypto_block.to_bytes_full()
+    assert data == unhexlify(dummy_block_full_hash)
+
+
+def test_from_bytes_matches_from_serialized(dummy_block_full_hash):
+    block = Block.from_bytes(unhexlify(dummy_block_full_hash))
+    expected = Block.from_serialized(dummy_block_full_hash)
+    assert block.to_json() == expected.to_json()
+    assert block.to_bytes_full() == unhexlify(dummy_block_full_hash)
+
+
+def test_header_bytes_are_cached(dummy_block_full_hash, mocker):
+    block = Block.from_bytes(unhexlify(dummy_block_full_hash))
+    to_bytes_mock = mocker.spy(block, "_to_bytes")
+    block.get_id()
+    block.get_id_hex()
+    block.verify_signature()
+    block.to_bytes()
+    assert to_bytes_mock.call_count == 1
+
+
+def test_setting_field_invalidates_cached_id(dummy_block_full_hash):
+    block = Block.from_bytes(unhexlify(dummy_block_full_hash))
+    block_id = block.get_id()
+    block.reward = 0
+    assert block.get_id() != block_id
+
+
+def test_from_bytes_raises_type_error_if_data_is_not_bytes():
+    with pytest.raises(TypeError) as excinfo:
+        Block.from_bytes("not_bytes")
+    assert str(excinfo.value) == "data must be bytes"
+
+
 def test_from_serialized_correctly_sets_deserialized_types(
     dummy_block_hash, dummy_block
 ):
@@ -152,6 +189,25 @@ def test_from_dict_correctly_sets_data(dummy_block):
         assert transaction.vendor_field == expected["vendorField"]
 
 
+def test_from_dict_keeps_serialized_transactions_raw(dummy_block_full_hash):
+    data = Block.from_bytes(unhexlify(dummy_block_full_hash)).to_json(serialized=True)
+    block = Block.from_dict(data)
+
+    assert isinstance(block.transactions, TransactionBatch)
+    assert block.transactions._transactions == [None, None]
+    assert block.to_bytes_full() == unhexlify(dummy_block_full_hash)
+    assert block.to_json(serialized=True) == data
+    assert block.transactions._transactions == [None, None]
+
+
+def test_to_json_serialized_returns_transactions_as_hex(dummy_block_full_hash):
+    block = Block.from_bytes(unhexlify(dummy_block_full_hash))
+    data = block.to_json(serialized=True)
+    assert data["transactions"] == [
+        transaction.serialize().decode("utf-8") for transaction in block.transactions
+    ]
+
+
 def test_from_dict_raises_exception_for_wrong_type(dummy_block):
     data = deepcopy(dummy_block)
     data["id"] = float(data["id"])
@@ -0,0 +1,144 @@
+import struct
+from binascii import unhexlify
+
+import pytest
+
+from chain.crypto.constants import TRANSACTION_TYPE_TRANSFER
+from chain.crypto.objects.block import Block
+from chain.crypto.objects.transaction_batch import TransactionBatch
+
+
+@pytest.fixture
+def block_bytes(dummy_block_full_hash):
+    return unhexlify(dummy_block_full_hash)
+
+
+def test_lazy_block_uses_transaction_batch(block_bytes):
+    block = Block.from_bytes(block_bytes, lazy=True)
+    assert isinstance(block.transactions, TransactionBatch)
+    assert len(block.transactions) == 2
+    assert block.transactions._transactions == [None, None]
+
+
+def test_columns_match_decoded_transactions(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    batch = Block.from_bytes(block_bytes, lazy=True).transactions
+
+    assert list(batch.types) == [trans.type for trans in eager.transactions]
+    assert list(batch.timestamps) == [trans.timestamp for trans in eager.transactions]
+    assert list(batch.fees) == [trans.fee for trans in eager.transactions]
+    assert list(batch.amounts) == [trans.amount for trans in eager.transactions]
+    assert batch.total_amount() == sum(trans.amount for trans in eager.transactions)
+    assert batch.total_fee() == sum(trans.fee for trans in eager.transactions)
+
+
+def test_ids_match_decoded_transactions(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    block = Block.from_bytes(block_bytes, lazy=True)
+
+    assert block.get_transaction_ids() == eager.get_transaction_ids()
+
+
+def test_transactions_are_decoded_on_access(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    block = Block.from_bytes(block_bytes, lazy=True)
+
+    transaction = block.transactions[1]
+    assert block.transactions._transactions[0] is None
+    assert block.transactions[1] is transaction
+    assert transaction.to_json() == eager.transactions[1].to_json()
+    assert transaction.block_id == block.id
+    assert transaction.sequence == 1
+
+
+def test_raw_returns_serialized_transaction(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    batch = Block.from_bytes(block_bytes, lazy=True).transactions
+
+    assert batch.raw(0) == eager.transactions[0].to_bytes()
+    assert batch.raw(1) == eager.transactions[1].to_bytes()
+
+
+def test_verify_returns_same_result_as_decoded_block(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    block = Block.from_bytes(block_bytes, lazy=True)
+
+    assert block.verify() == eager.verify()
+
+
+def test_verify_signatures_returns_invalid_indexes(block_bytes):
+    data = bytearray(block_bytes)
+    # Change the last byte of the signature of the last transaction
+    data[-1] ^= 0x01
+    batch = Block.from_bytes(bytes(data), lazy=True).transactions
+
+    assert batch.verify_signatures() == [1]
+
+
+def test_raises_for_unknown_transaction_type():
+    data = bytes.fromhex("ff01177b") + bytes(50)
+    with pytest.raises(ValueError) as excinfo:
+        TransactionBatch(data, [len(data)])
+    assert str(excinfo.value) == "Couldn't find transaction type 123 in mapping"
+
+
+def test_from_raw_creates_batch_from_serialized_transactions(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    batch = TransactionBatch.from_raw(
+        [transaction.to_bytes() for transaction in eager.transactions]
+    )
+
+    assert len(batch) == 2
+    assert batch.ids() == eager.get_transaction_ids()
+
+
+def test_to_bytes_passes_through_original_data(block_bytes):
+    block = Block.from_bytes(block_bytes, lazy=True)
+    header_length = len(block.to_bytes())
+
+    assert block.transactions.to_bytes() == block_bytes[header_length:]
+    assert block.transactions._transactions == [None, None]
+
+
+def test_to_bytes_includes_replaced_transactions(block_bytes):
+    block = Block.from_bytes(block_bytes, lazy=True)
+    batch = block.transactions
+    first, second = batch.raw(0), batch.raw(1)
+    batch[0], batch[1] = batch[1], batch[0]
+
+    assert batch.raw(0) == second
+    assert batch.raw(1) == first
+    assert batch.to_bytes() == (
+        struct.pack("<II", len(second), len(first)) + second + first
+    )
+
+
+def test_recipient_ids_match_decoded_transactions(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    batch = Block.from_bytes(block_bytes, lazy=True).transactions
+
+    assert batch.recipient_ids() == [trans.recipient_id for trans in eager.transactions]
+    assert batch._transactions == [None, None]
+
+
+def test_sender_public_keys_match_decoded_transactions(block_bytes):
+    eager = Block.from_bytes(block_bytes)
+    block = Block.from_bytes(block_bytes, lazy=True)
+
+    assert block.get_sender_public_keys() == [
+        trans.sender_public_key for trans in eager.transactions
+    ]
+    assert block.transactions._transactions == [None, None]
+
+
+def test_ids_raise_for_invalid_utf8_vendor_field(block_bytes):
+    raw = Block.from_bytes(block_bytes, lazy=True).transactions.raw(0)
+    vendor_length = raw[49]
+    data = raw[:49] + b"\x02\xff\xfe" + raw[50 + vendor_length :]
+    batch = TransactionBatch.from_raw([data])
+
+    assert batch.versions[0] == 1
+    assert batch.types[0] == TRANSACTION_TYPE_TRANSFER
+    assert not batch._can_use_columns(0)
+    with pytest.raises(UnicodeDecodeError):
+        batch.ids()
@@ -1,3 +1,5 @@
+from binascii import unhexlify
+
 import pytest
 
 from chain.crypto.bytebuffer import ByteBuffer
@@ -474,6 +476,31 @@ def test_serialize(crypto_transaction, dummy_transaction_hash):
     assert serialized == dummy_transaction_hash
 
 
+def test_to_bytes(crypto_transaction, dummy_transaction_hash):
+    data = crypto_transaction.to_bytes()
+    assert data == unhexlify(dummy_transaction_hash)
+
+
+def test_from_bytes(dummy_transaction_hash):
+    transaction = BaseTransaction.from_bytes(unhexlify(dummy_transaction_hash))
+    expected = BaseTransaction.from_serialized(dummy_transaction_hash)
+    assert transaction.to_json() == expected.to_json()
+
+
+def test_from_bytes_keeps_received_bytes(dummy_transaction_hash, mocker):
+    transaction = BaseTransaction.from_bytes(unhexlify(dummy_transaction_hash))
+    to_bytes_mock = mocker.spy(transaction, "_to_bytes")
+    assert transaction.to_bytes() == unhexlify(dummy_transaction_hash)
+    assert to_bytes_mock.call_count == 0
+
+
+def test_from_bytes_keeps_cached_id(dummy_transaction_hash, mocker):
+    transaction = BaseTransaction.from_bytes(unhexlify(dummy_transaction_hash))
+    get_id_mock = mocker.spy(transaction, "_get_id")
+    assert transaction.get_id() == transaction.id
+    assert get_id_mock.call_count == 0
+
+
 def test_deserialize_type():
     transaction = BaseTransaction()
     transaction.type = TRANSACTION_TYPE_TRANSFER
@@ -1127,14 +1154,8 @@ def test_get_id(crypto_transaction):
 
 def test_get_id_for_transaction_exception(crypto_transaction, mocker):
     mocker.patch.dict(
-        "chain.crypto.objects.transactions.base.config.exceptions",
-        {
-            "transactionIdFixTable": {
-                "f861b25c9a87fc8913282da8855ee63b9cbaa9324543377a5bdfc5afccb92aaa": (
-                    "harambe"
-                )
-            }
-        },
+        "chain.crypto.objects.transactions.base.config.transaction_id_fix_table",
+        {"f861b25c9a87fc8913282da8855ee63b9cbaa9324543377a5bdfc5afccb92aaa": "harambe"},
         clear=True,
     )
 
@@ -1142,6 +1163,35 @@ def test_get_id_for_transaction_exception(crypto_transaction, mocker):
     assert transaction_id == "harambe"
 
 
+def test_get_bytes_is_cached(crypto_transaction, mocker):
+    get_bytes_mock = mocker.spy(crypto_transaction, "_get_bytes")
+    bytes_data = crypto_transaction.get_bytes(True, True)
+    assert crypto_transaction.get_bytes(True, True) is bytes_data
+    assert get_bytes_mock.call_count == 1
+
+
+def test_setting_field_invalidates_cached_bytes(crypto_transaction):
+    transaction_hash = crypto_transaction.get_hash()
+    crypto_transaction.amount = 1
+    assert crypto_transaction.get_hash() != transaction_hash
+
+
+def test_setting_block_id_does_not_invalidate_cached_bytes(crypto_transaction):
+    bytes_data = crypto_transaction.to_bytes()
+    crypto_transaction.block_id = "1337"
+    crypto_transaction.sequence = 5
+    assert crypto_transaction.to_bytes() is bytes_data
+
+
+def test_changing_id_to_exception_uses_different_bytes(crypto_transaction, mocker):
+    bytes_data = crypto_transaction.get_bytes(True, True)
+    mocker.patch(
+        "chain.crypto.objects.transactions.base.is_transaction_exception",
+        return_value=True,
+    )
+    assert crypto_transaction.get_bytes(True, True) != bytes_data
+
+
 def test_to_json(crypto_transaction):
     data = crypto_transaction.to_json()
     assert data == {
@@ -82,7 +82,7 @@ def test_apply(redis, mocker):
     )
     transaction.apply(sender_wallet, None, manager)
 
-    data = redis.get("wallets:username:harambe")
+    data = redis.hget("wallets:usernames", "harambe")
 
     assert data == b"AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
 
@@ -1,7 +1,10 @@
+from binascii import unhexlify
+
 import pytest
 
 from chain.crypto.objects.transactions import (
     TransferTransaction,
+    from_bytes,
     from_dict,
     from_object,
     from_serialized,
@@ -17,6 +20,18 @@ def test_from_serialized(dummy_transaction_hash):
     )
 
 
+def test_from_bytes(dummy_transaction_hash):
+    transaction = from_bytes(unhexlify(dummy_transaction_hash))
+    assert isinstance(transaction, TransferTransaction)
+    assert transaction.to_bytes() == unhexlify(dummy_transaction_hash)
+
+
+def test_from_bytes_raises_type_error_if_data_not_bytes():
+    with pytest.raises(TypeError) as excinfo:
+        from_bytes("not_bytes")
+    assert str(excinfo.value) == "data must be bytes"
+
+
 def test_from_serialized_raises_type_error_if_hex_not_bytes():
     with pytest.raises(TypeError) as excinfo:
         from_serialized("not_bytes")
@@ -1,7 +1,83 @@
+from hashlib import sha256
+
+import pytest
+from coincurve import PrivateKey
+
 from chain.crypto.models.wallet import Wallet
 from chain.crypto.objects.transactions.multi_signature import MultiSignatureTransaction
 
 
+@pytest.fixture
+def private_keys():
+    return [
+        PrivateKey(sha256("multisignature {}".format(index).encode()).digest())
+        for index in range(3)
+    ]
+
+
+def _make_registration(private_keys, min_signatures, signers=None):
+    transaction = MultiSignatureTransaction(
+        version=1,
+        type=4,
+        timestamp=1,
+        sender_public_key=private_keys[0].public_key.format().hex(),
+        fee=2000000000,
+        amount=0,
+        asset={
+            "multisignature": {
+                "min": min_signatures,
+                "lifetime": 24,
+                "keysgroup": [
+                    "+{}".format(key.public_key.format().hex()) for key in private_keys
+                ],
+            }
+        },
+    )
+    message = transaction.get_bytes(skip_signature=True, skip_second_signature=True)
+    transaction.signatures = [
+        key.sign(message).hex() for key in (signers or private_keys)
+    ]
+    return transaction
+
+
+def test_verify_signatures_matches_signatures_in_any_order(private_keys):
+    transaction = _make_registration(private_keys, 3)
+    assert transaction._verify_signatures() is True
+
+    transaction.signatures = list(reversed(transaction.signatures))
+    assert transaction._verify_signatures() is True
+
+
+def test_verify_signatures_returns_false_if_min_is_not_reached(private_keys):
+    transaction = _make_registration(private_keys, 3)
+    transaction.signatures[1] = "3006020101020101"
+    assert transaction._verify_signatures() is False
+
+    transaction.asset["multisignature"]["min"] = 2
+    assert transaction._verify_signatures() is True
+
+
+def test_verify_signatures_uses_each_signature_once(private_keys):
+    keys = [private_keys[0], private_keys[0], private_keys[1]]
+    transaction = _make_registration(keys, 2, signers=[private_keys[0]] * 2)
+    # Signatures are the same, as signing is deterministic
+    assert transaction.signatures[0] == transaction.signatures[1]
+    assert transaction._verify_signatures() is True
+
+    transaction.signatures = transaction.signatures[:1] + ["30"]
+    assert transaction._verify_signatures() is False
+
+
+def test_get_keysgroup_is_cached(private_keys):
+    transaction = _make_registration(private_keys, 3)
+    keysgroup = transaction.get_keysgroup()
+
+    assert [key.format() for key in keysgroup] == [
+        key.public_key.format() for key in private_keys
+    ]
+    assert transaction.get_keysgroup() is keysgroup
+
+
 def test_bla():
     a = MultiSignatureTransaction()
     a.signatures = ['a']
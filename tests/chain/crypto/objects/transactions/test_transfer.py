@@ -1,5 +1,3 @@
-import json
-
 from chain.crypto.models.wallet import Wallet
 from chain.crypto.objects.transactions.transfer import TransferTransaction
 from chain.plugins.database.wallet_manager import WalletManager
@@ -14,7 +12,9 @@ def test_apply(redis, mocker):
 
     transaction.apply(None, recipient, manager)
 
-    data = json.loads(redis.get("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"))
+    data = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+    ).to_dict()
     assert data["address"] == recipient.address
     assert apply_mock.call_count == 1
 
@@ -0,0 +1,27 @@
+from chain.common.config import config
+from chain.crypto.address import (
+    _address_cache,
+    address_cache_info,
+    address_from_public_key,
+)
+
+PUBLIC_KEY = "034151a3ec46b5670a682b0a63394f863587d1bc97483b1b6c70eb58e7f0aed192"
+
+
+def test_address_from_public_key_uses_cache_for_network_version():
+    _address_cache.clear()
+    address = address_from_public_key(PUBLIC_KEY)
+
+    assert address_from_public_key(PUBLIC_KEY, config.network["pubKeyHash"]) == address
+    assert address_cache_info()["hits"] == 1
+
+
+def test_address_from_public_key_skips_cache_for_other_network_versions():
+    _address_cache.clear()
+    address = address_from_public_key(PUBLIC_KEY)
+    other_version = (config.network["pubKeyHash"] + 1) % 256
+
+    assert address_from_public_key(PUBLIC_KEY, other_version) != address
+    assert address_from_public_key(PUBLIC_KEY, 0)[0] == "1"
+    assert address_from_public_key(PUBLIC_KEY) == address
+    assert address_cache_info()["hits"] == 1
@@ -0,0 +1,53 @@
+import pytest
+
+from chain.crypto.address_codec import (
+    address_from_bytes,
+    address_to_bytes,
+    addresses_from_bytes,
+    addresses_to_bytes,
+    codec_cache_info,
+    decode_check,
+    encode_check,
+)
+
+ADDRESS = "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
+PAYLOAD = bytes.fromhex("1782c65385dd2258dc2b967262f9d247cca6afa2bc")
+
+
+def test_encode_check():
+    assert encode_check(PAYLOAD) == ADDRESS
+
+
+def test_encode_check_keeps_leading_zeros():
+    assert encode_check(b"\x00\x00\x01") == "11BwW2qR"
+    assert decode_check("11BwW2qR") == b"\x00\x00\x01"
+
+
+def test_decode_check():
+    assert decode_check(ADDRESS) == PAYLOAD
+
+
+def test_decode_check_raises_for_invalid_checksum():
+    with pytest.raises(ValueError) as excinfo:
+        decode_check(ADDRESS[:-1] + "g")
+    assert str(excinfo.value) == "Invalid checksum"
+
+
+def test_decode_check_raises_for_invalid_character():
+    with pytest.raises(ValueError) as excinfo:
+        decode_check(ADDRESS[:-1] + "0")
+    assert str(excinfo.value) == "Invalid base58 character '0'"
+
+
+def test_address_conversions_are_cached_in_both_directions():
+    hits = codec_cache_info()["hits"]
+    assert address_to_bytes(ADDRESS) == PAYLOAD
+    assert address_from_bytes(PAYLOAD) == ADDRESS
+    assert codec_cache_info()["hits"] >= hits + 1
+
+
+def test_batch_conversions():
+    payloads = [PAYLOAD, bytes.fromhex("17" + "00" * 20)]
+    addresses = addresses_from_bytes(payloads)
+    assert addresses[0] == ADDRESS
+    assert addresses_to_bytes(addresses) == payloads
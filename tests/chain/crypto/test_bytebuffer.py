@@ -0,0 +1,55 @@
+import pytest
+
+from chain.crypto.bytebuffer import ByteBuffer
+
+
+def test_pop_moves_cursor_forward():
+    buff = ByteBuffer(b"\x01\x02\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00abc")
+    assert len(buff) == 16
+    assert buff.pop_uint8() == 1
+    assert buff.pop_uint32() == 2
+    assert buff.pop_uint64() == 3
+    assert buff.pop_bytes(3) == b"abc"
+    assert len(buff) == 0
+
+
+def test_read_does_not_move_cursor():
+    buff = ByteBuffer(b"\xff\x01\x02\x00\x00\x00")
+    assert buff.read_uint8() == 255
+    assert buff.read_uint8(offset=1) == 1
+    assert buff.read_uint32(offset=2) == 2
+    assert buff.read_bytes(2, offset=1) == b"\x01\x02"
+    assert len(buff) == 6
+
+
+def test_read_is_relative_to_cursor():
+    buff = ByteBuffer(b"\x00\x00\x05\x06")
+    buff.pop_bytes(2)
+    assert buff.read_uint8() == 5
+    assert buff.read_uint8(offset=1) == 6
+
+
+def test_pop_bytes_returns_bytes():
+    buff = ByteBuffer(bytearray(b"harambe"))
+    data = buff.pop_bytes(4)
+    assert isinstance(data, bytes)
+    assert data == b"hara"
+
+
+def test_pop_buffer_shares_memory_and_advances():
+    data = bytearray(b"\x01\x02\x03\x04\x05")
+    buff = ByteBuffer(data)
+    buff.pop_uint8()
+    sub_buff = buff.pop_buffer(3)
+    assert len(sub_buff) == 3
+    assert len(buff) == 1
+
+    data[1] = 0x09
+    assert sub_buff.pop_bytes(3) == b"\x09\x03\x04"
+    assert buff.pop_uint8() == 5
+
+
+def test_pop_uint32_raises_on_missing_data():
+    buff = ByteBuffer(b"\x01\x02")
+    with pytest.raises(Exception):
+        buff.pop_uint32()
@@ -0,0 +1,38 @@
+import struct
+
+from chain.crypto.bytebuffer import ByteBuffer
+from chain.crypto.bytewriter import ByteWriter
+
+
+def test_written_values_can_be_read_with_bytebuffer():
+    writer = ByteWriter()
+    writer.write_uint8(1)
+    writer.write_uint32(2)
+    writer.write_uint64(3)
+    writer.write_bytes(b"abc")
+    assert len(writer) == 16
+
+    buff = ByteBuffer(writer.to_bytes())
+    assert buff.pop_uint8() == 1
+    assert buff.pop_uint32() == 2
+    assert buff.pop_uint64() == 3
+    assert buff.pop_bytes(3) == b"abc"
+
+
+def test_write_hex_accepts_str_and_bytes():
+    writer = ByteWriter()
+    writer.write_hex("0102")
+    writer.write_hex(b"ff")
+    assert writer.to_bytes() == b"\x01\x02\xff"
+
+
+def test_write_zeros():
+    writer = ByteWriter()
+    writer.write_zeros(3)
+    assert writer.to_bytes() == b"\x00\x00\x00"
+
+
+def test_write_struct():
+    writer = ByteWriter()
+    writer.write_struct(struct.Struct("<BI"), 1, 2)
+    assert writer.to_bytes() == b"\x01\x02\x00\x00\x00"
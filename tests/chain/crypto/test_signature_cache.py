@@ -0,0 +1,58 @@
+import time
+from itertools import count
+
+from redis import RedisError
+
+from chain.crypto.signature_cache import SignatureCache
+
+CHECK = (b"message", b"signature", b"public key")
+
+
+def test_get_verified_returns_false_for_unknown_checks(redis):
+    cache = SignatureCache(redis=redis)
+    assert cache.get_verified([CHECK, None]) == [False, False]
+
+
+def test_set_verified_marks_checks_as_verified(redis):
+    cache = SignatureCache(redis=redis, ttl=60)
+    other = (b"message", b"signature", b"other public key")
+    cache.set_verified([CHECK])
+
+    assert cache.get_verified([None, CHECK, other]) == [False, True, False]
+
+
+def test_key_for_check_includes_lengths_of_parts():
+    cache = SignatureCache(redis=object())
+    assert cache.key_for_check((b"ab", b"c", b"d")) != cache.key_for_check(
+        (b"a", b"bc", b"d")
+    )
+
+
+def test_get_verified_returns_false_for_expired_checks(redis, mocker):
+    cache = SignatureCache(redis=redis, ttl=60)
+    cache.set_verified([CHECK])
+    now = time.time()
+    mocker.patch("chain.crypto.signature_cache.time.time", return_value=now + 61)
+
+    assert cache.get_verified([CHECK]) == [False]
+
+
+def test_set_verified_evicts_oldest_checks(redis, mocker):
+    cache = SignatureCache(redis=redis, max_size=2)
+    mocker.patch(
+        "chain.crypto.signature_cache.time.time", side_effect=count(time.time())
+    )
+    checks = [(b"message", b"signature", bytes([index])) for index in range(3)]
+    for check in checks:
+        cache.set_verified([check])
+
+    assert redis.zcard(cache._key) == 2
+    assert cache.get_verified(checks) == [False, True, True]
+
+
+def test_get_verified_returns_false_if_redis_is_unavailable(redis, mocker):
+    cache = SignatureCache(redis=redis)
+    cache.set_verified([CHECK])
+    mocker.patch("redis.client.Pipeline.execute", side_effect=RedisError)
+
+    assert cache.get_verified([CHECK]) == [False]
@@ -0,0 +1,48 @@
+from binascii import unhexlify
+
+import pytest
+
+from chain.crypto import utils
+from chain.crypto.utils import get_public_key, pin_public_keys, public_key_cache_info
+
+PUBLIC_KEY = "034151a3ec46b5670a682b0a63394f863587d1bc97483b1b6c70eb58e7f0aed192"
+
+
+@pytest.fixture(autouse=True)
+def clear_public_keys():
+    utils._public_key_cache.clear()
+    pin_public_keys([])
+    yield
+    utils._public_key_cache.clear()
+    pin_public_keys([])
+
+
+def test_get_public_key_parses_key_once():
+    public_key = get_public_key(unhexlify(PUBLIC_KEY))
+
+    assert public_key.format().hex() == PUBLIC_KEY
+    assert get_public_key(unhexlify(PUBLIC_KEY)) is public_key
+    assert public_key_cache_info()["hits"] == 1
+
+
+def test_get_public_key_raises_for_invalid_key():
+    with pytest.raises(ValueError):
+        get_public_key(b"\x02" + bytes(32))
+    assert public_key_cache_info()["size"] == 0
+
+
+def test_get_public_key_returns_pinned_key():
+    pin_public_keys([PUBLIC_KEY])
+    public_key = get_public_key(unhexlify(PUBLIC_KEY))
+
+    assert public_key_cache_info() == {
+        "hits": 0,
+        "misses": 0,
+        "hit_rate": 0.0,
+        "size": 0,
+        "max_size": utils._public_key_cache.max_size,
+        "pinned": 1,
+    }
+    # Keys that stay pinned are not parsed again
+    pin_public_keys([PUBLIC_KEY])
+    assert get_public_key(unhexlify(PUBLIC_KEY)) is public_key
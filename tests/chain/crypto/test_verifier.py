@@ -0,0 +1,85 @@
+from binascii import unhexlify
+
+import pytest
+
+from chain.crypto.objects.block import Block
+from chain.crypto.signature_cache import SignatureCache
+from chain.crypto.verifier import (
+    EXECUTOR_PROCESS,
+    EXECUTOR_SERIAL,
+    EXECUTOR_THREAD,
+    SignatureVerifier,
+)
+
+
+@pytest.fixture
+def block_bytes(dummy_block_full_hash):
+    return unhexlify(dummy_block_full_hash)
+
+
+@pytest.fixture
+def checks(block_bytes):
+    valid = Block.from_bytes(block_bytes).get_signature_checks()[1:]
+    message, signature, public_key = valid[0]
+    invalid = (message + b"\x00", signature, public_key)
+    return (valid + [invalid, None]) * 10
+
+
+def test_raises_for_unknown_executor():
+    with pytest.raises(ValueError) as excinfo:
+        SignatureVerifier(executor="gpu")
+    assert "Unknown executor gpu" == str(excinfo.value)
+
+
+def test_verify_returns_false_for_missing_checks():
+    verifier = SignatureVerifier(executor=EXECUTOR_SERIAL)
+    assert verifier.verify([None]) == [False]
+
+
+@pytest.mark.parametrize("executor", [EXECUTOR_THREAD, EXECUTOR_PROCESS])
+def test_verify_matches_serial_results(checks, executor):
+    expected = SignatureVerifier(executor=EXECUTOR_SERIAL).verify(checks)
+    verifier = SignatureVerifier(executor=executor, workers=2, chunk_size=4)
+    try:
+        assert verifier.verify(checks) == expected
+    finally:
+        verifier.shutdown()
+    assert expected[:4] == [True, True, False, False]
+
+
+def test_verify_blocks_matches_block_verify(block_bytes):
+    data = bytearray(block_bytes)
+    # Change the last byte of the signature of the last transaction
+    data[-1] ^= 0x01
+    blocks = [Block.from_bytes(block_bytes), Block.from_bytes(bytes(data), lazy=True)]
+    verifier = SignatureVerifier(executor=EXECUTOR_THREAD, workers=2, chunk_size=1)
+    try:
+        results = verifier.verify_blocks(blocks)
+    finally:
+        verifier.shutdown()
+
+    assert results == [block.verify() for block in blocks]
+    assert "One or more transactions are not verified" in results[1][1]
+
+
+def test_verify_skips_cached_checks(checks, redis, mocker):
+    verifier = SignatureVerifier(
+        executor=EXECUTOR_SERIAL, cache=SignatureCache(redis=redis)
+    )
+    expected = verifier.verify(checks)
+
+    verify_hash = mocker.patch("chain.crypto.verifier.verify_hash", return_value=False)
+    assert verifier.verify(checks) == expected
+    # Only the checks that failed are verified again
+    assert verify_hash.call_count == expected.count(False) - checks.count(None)
+
+
+def test_verify_caches_checks_only_if_asked(checks, redis):
+    cache = SignatureCache(redis=redis)
+    verifier = SignatureVerifier(executor=EXECUTOR_SERIAL, cache=cache)
+    expected = verifier.verify(checks, cache_results=False)
+    assert not any(cache.get_verified(checks))
+
+    verified = [check for check, is_verified in zip(checks, expected) if is_verified]
+    verifier.cache_verified(verified)
+    assert cache.get_verified(checks) == expected
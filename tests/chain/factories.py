@@ -1,4 +1,3 @@
-import json
 import os
 import random
 from hashlib import sha256
@@ -21,8 +20,8 @@ class RedisModelFactory(object):
             setattr(self, field, getattr(wallet, field))
 
     def refresh_from_redis(self):
-        data = self.redis.get(self.key)
-        wallet = Wallet(json.loads(data))
+        data = self.redis.hget(self.key, self.address)
+        wallet = Wallet.from_bytes(data)
         self._set_attributes(wallet)
 
 
@@ -92,11 +91,11 @@ class WalletRedisFactory(RedisModelFactory):
             address = address_from_public_key(kwargs["public_key"])
             kwargs["address"] = address
 
-        self.key = "wallets:address:{}".format(address)
+        self.key = "wallets:addresses"
         self.redis = redis
 
         wallet = Wallet(kwargs)
-        redis.set(self.key, wallet.to_json())
+        redis.hset(self.key, address, wallet.to_json())
         self._set_attributes(wallet)
 
 
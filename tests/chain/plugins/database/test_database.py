@@ -0,0 +1,177 @@
+import pytest
+
+from chain.common.config import config
+from chain.common.plugins import load_plugin
+from chain.crypto.objects.block import Block as CryptoBlock
+from chain.plugins.database.models.block import Block
+from chain.plugins.database.models.transaction import Transaction
+from chain.plugins.database.wallet_manager import WalletManager
+
+
+@pytest.fixture
+def genesis_block():
+    return CryptoBlock.from_dict(config.genesis_block)
+
+
+def _assert_saved(block):
+    db_block = Block.get_by_id(block.id)
+    assert db_block.height == block.height
+    assert db_block.payload_hash == block.payload_hash
+
+    db_transactions = list(
+        Transaction.select()
+        .where(Transaction.block_id == block.id)
+        .order_by(Transaction.sequence)
+    )
+    assert [trans.id for trans in db_transactions] == [
+        trans.id for trans in block.transactions
+    ]
+    assert [trans.serialized for trans in db_transactions] == [
+        trans.to_bytes() for trans in block.transactions
+    ]
+    assert [trans.asset for trans in db_transactions] == [
+        trans.asset for trans in block.transactions
+    ]
+
+
+def test_save_block_saves_block_and_transactions(empty_db, genesis_block):
+    database = load_plugin("chain.plugins.database")
+    database.save_block(genesis_block)
+
+    _assert_saved(genesis_block)
+
+
+def test_save_block_does_not_save_transactions_if_block_exists(empty_db, genesis_block):
+    database = load_plugin("chain.plugins.database")
+    database.save_block(genesis_block)
+    Transaction.delete().execute()
+
+    database.save_block(genesis_block)
+    assert Transaction.select().count() == 0
+
+
+def test_save_blocks_saves_all_blocks(empty_db, genesis_block):
+    database = load_plugin("chain.plugins.database")
+    database.save_blocks([genesis_block])
+
+    _assert_saved(genesis_block)
+
+
+def test_save_blocks_saves_nothing_on_error(empty_db, genesis_block):
+    database = load_plugin("chain.plugins.database")
+    duplicate = CryptoBlock.from_dict(config.genesis_block)
+
+    with pytest.raises(Exception):
+        database.save_blocks([genesis_block, duplicate])
+    assert Block.select().count() == 0
+    assert Transaction.select().count() == 0
+
+
+def test_group_commit_saves_blocks_when_it_exits(empty_db, genesis_block, mocker):
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database.wallets, "apply_block")
+    mocker.patch.object(database, "apply_round")
+
+    with database.group_commit():
+        database.apply_block(genesis_block)
+        assert Block.select().count() == 0
+        transaction_ids = genesis_block.get_transaction_ids()
+        assert database.get_forged_transaction_ids(transaction_ids) == transaction_ids
+
+    _assert_saved(genesis_block)
+    assert database._pending_blocks is None
+
+
+def test_group_commit_saves_nothing_on_error(empty_db, genesis_block, mocker):
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database.wallets, "apply_block")
+    mocker.patch.object(database, "apply_round")
+    commit_batch = mocker.patch.object(database.wallets, "commit_batch")
+
+    with pytest.raises(ValueError):
+        with database.group_commit():
+            database.apply_block(genesis_block)
+            raise ValueError("Block not accepted")
+
+    assert Block.select().count() == 0
+    assert Transaction.select().count() == 0
+    assert commit_batch.call_count == 0
+    assert database.wallets._undo_wallets is None
+    assert database.get_forged_transaction_ids(["a"]) == []
+
+
+def _wait_for_snapshots(database):
+    # Snapshots are written one at a time, so this waits for the previous ones
+    database._snapshot_writer.submit(lambda: None).result()
+
+
+def test_group_commit_writes_snapshot_after_commit(empty_db, genesis_block, mocker):
+    mocker.patch.dict(config.snapshots, {"interval": 1})
+    mocker.patch("chain.plugins.database.database.is_new_round", return_value=True)
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database.wallets, "apply_block")
+    mocker.patch.object(database, "apply_round")
+    mocker.patch.object(database.wallets, "encode_snapshot", return_value=b"data")
+    write_snapshot = mocker.patch.object(database.wallets, "write_snapshot")
+
+    with database.group_commit():
+        database.apply_block(genesis_block)
+        _wait_for_snapshots(database)
+        assert write_snapshot.call_count == 0
+
+    _wait_for_snapshots(database)
+    write_snapshot.assert_called_once_with(genesis_block.height, b"data")
+    assert database._pending_snapshot is None
+
+
+def test_group_commit_writes_no_snapshot_on_error(empty_db, genesis_block, mocker):
+    mocker.patch.dict(config.snapshots, {"interval": 1})
+    mocker.patch("chain.plugins.database.database.is_new_round", return_value=True)
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database.wallets, "apply_block")
+    mocker.patch.object(database, "apply_round")
+    mocker.patch.object(database.wallets, "encode_snapshot", return_value=b"data")
+    write_snapshot = mocker.patch.object(database.wallets, "write_snapshot")
+
+    with pytest.raises(ValueError):
+        with database.group_commit():
+            database.apply_block(genesis_block)
+            raise ValueError("Block not accepted")
+
+    _wait_for_snapshots(database)
+    assert write_snapshot.call_count == 0
+    assert database._pending_snapshot is None
+
+
+def test_load_wallets_loads_snapshot_of_block_in_database(db, redis, tmp_path, mocker):
+    mocker.patch.dict(config.snapshots, {"folder": str(tmp_path)})
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database, "wallets", WalletManager())
+    database.wallets.build()
+    genesis_block = database.get_last_block()
+    database.wallets.save_snapshot(genesis_block.height, genesis_block.id)
+    num_wallets = len(database.wallets._wallets)
+
+    build = mocker.patch.object(database.wallets, "build")
+    database.wallets._wallets = {}
+    database.load_wallets(genesis_block)
+
+    assert build.call_count == 0
+    assert len(database.wallets._wallets) == num_wallets
+    assert redis.hlen("wallets:addresses") == num_wallets
+
+
+def test_load_wallets_builds_wallets_if_snapshot_block_is_not_in_database(
+    db, redis, tmp_path, mocker
+):
+    mocker.patch.dict(config.snapshots, {"folder": str(tmp_path)})
+    database = load_plugin("chain.plugins.database")
+    mocker.patch.object(database, "wallets", WalletManager())
+    database.wallets.build()
+    genesis_block = database.get_last_block()
+    database.wallets.save_snapshot(genesis_block.height, "a" * 64)
+
+    build = mocker.patch.object(database.wallets, "build")
+    database.load_wallets(genesis_block)
+
+    assert build.call_count == 1
@@ -0,0 +1,59 @@
+import pytest
+
+from chain.common.exceptions import InvalidSnapshotException
+from chain.crypto.models.wallet import Wallet
+from chain.plugins.database.snapshots import (
+    list_snapshots,
+    read_snapshot,
+    read_snapshot_header,
+    write_snapshot,
+)
+
+
+def _wallets():
+    return [
+        Wallet({"address": "spongebob", "balance": 5, "username": "squarepants"}),
+        Wallet({"address": "patrick", "multisignature": {"min": 2}}),
+    ]
+
+
+def test_read_snapshot_returns_written_wallets(tmp_path):
+    path = write_snapshot(str(tmp_path), 51, "a" * 64, _wallets())
+
+    header, wallets = read_snapshot(path)
+    assert header.height == 51
+    assert header.block_id == "a" * 64
+    assert [wallet.to_json() for wallet in wallets] == [
+        wallet.to_json() for wallet in _wallets()
+    ]
+
+
+def test_read_snapshot_header_handles_short_block_ids(tmp_path):
+    path = write_snapshot(str(tmp_path), 51, "13114381566690093367", [])
+    assert read_snapshot_header(path).block_id == "13114381566690093367"
+
+
+def test_read_snapshot_raises_if_checksum_does_not_match(tmp_path):
+    path = write_snapshot(str(tmp_path), 51, "a" * 64, _wallets())
+    with open(path, "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"!")
+
+    with pytest.raises(InvalidSnapshotException):
+        read_snapshot(path)
+
+
+def test_read_snapshot_header_raises_for_other_files(tmp_path):
+    path = tmp_path / "wallets-0000000051.snapshot"
+    path.write_bytes(b"spongebob" * 20)
+
+    with pytest.raises(InvalidSnapshotException):
+        read_snapshot_header(str(path))
+
+
+def test_write_snapshot_keeps_newest_snapshots(tmp_path):
+    for height in [51, 102, 153]:
+        write_snapshot(str(tmp_path), height, "a" * 64, [], keep=2)
+
+    snapshots = list_snapshots(str(tmp_path))
+    assert [read_snapshot_header(path).height for path in snapshots] == [153, 102]
@@ -2,6 +2,7 @@ import json
 
 import pytest
 
+from chain.crypto.address import address_from_public_key
 from chain.crypto.constants import (
     TRANSACTION_TYPE_DELEGATE_REGISTRATION,
     TRANSACTION_TYPE_MULTI_SIGNATURE,
@@ -17,25 +18,13 @@ from chain.plugins.database.wallet_manager import WalletManager
 from tests.chain.factories import BlockFactory, TransactionFactory
 
 
-def test_key_for_address():
-    manager = WalletManager()
-    key = manager.key_for_address("spongebob")
-    assert key == "wallets:address:spongebob"
-
-
-def test_key_for_username():
-    manager = WalletManager()
-    key = manager.key_for_username("spongebob")
-    assert key == "wallets:username:spongebob"
-
-
 def test_save_wallet_saves_wallet_to_redis(redis):
     manager = WalletManager()
     wallet = Wallet({"address": "spongebob", "username": "squarepants"})
     manager.save_wallet(wallet)
 
-    keys = redis.keys("*")
-    assert keys == [b"wallets:address:spongebob"]
+    assert redis.keys("*") == [b"wallets:addresses"]
+    assert redis.hkeys("wallets:addresses") == [b"spongebob"]
 
 
 def test_find_by_address_returns_a_new_wallet_if_does_not_exist(redis):
@@ -53,18 +42,20 @@ def test_find_by_address_returns_a_new_wallet_if_does_not_exist(redis):
 
 def test_find_by_address_returns_existing_wallet(redis):
     address = "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
-    key = "wallets:address:{}".format(address).encode()
     manager = WalletManager()
 
-    redis.set(key, Wallet({"address": address, "username": "spongebob"}).to_json())
+    redis.hset(
+        "wallets:addresses",
+        address,
+        Wallet({"address": address, "username": "spongebob"}).to_json(),
+    )
 
     wallet = manager.find_by_address(address)
 
     assert wallet.address == address
     assert wallet.username == "spongebob"
 
-    keys = redis.keys("*")
-    assert keys == [key]
+    assert redis.hkeys("wallets:addresses") == [address.encode()]
 
 
 def test_find_by_address_raises_value_error_if_address_is_not_str(redis):
@@ -77,7 +68,6 @@ def test_find_by_address_raises_value_error_if_address_is_not_str(redis):
 
 def test_find_by_public_key_returns_a_new_wallet_if_does_not_exist(redis):
     address = "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
-    key = "wallets:address:{}".format(address).encode()
     public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
 
     manager = WalletManager()
@@ -87,25 +77,26 @@ def test_find_by_public_key_returns_a_new_wallet_if_does_not_exist(redis):
     assert wallet.public_key == public_key
 
     # find_by_public_key saves the wallet as it adds public_key to it
-    keys = redis.keys("*")
-    assert keys == [key]
+    assert redis.hkeys("wallets:addresses") == [address.encode()]
 
 
 def test_find_by_public_key_returns_existing_wallet(redis):
     address = "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
     public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
-    key = "wallets:address:{}".format(address).encode()
     manager = WalletManager()
 
-    redis.set(key, Wallet({"address": address, "public_key": public_key}).to_json())
+    redis.hset(
+        "wallets:addresses",
+        address,
+        Wallet({"address": address, "public_key": public_key}).to_json(),
+    )
 
     wallet = manager.find_by_public_key(public_key)
 
     assert wallet.address == address
     assert wallet.public_key == public_key
 
-    keys = redis.keys("*")
-    assert keys == [key]
+    assert redis.hkeys("wallets:addresses") == [address.encode()]
 
 
 def test_get_wallet_by_address_returns_non_if_wallet_not_in_redis():
@@ -117,12 +108,14 @@ def test_get_wallet_by_address_returns_non_if_wallet_not_in_redis():
 def test_get_wallet_by_address_returns_correct_wallet(redis):
     manager = WalletManager()
 
-    redis.set(
-        "wallets:address:spongebob",
+    redis.hset(
+        "wallets:addresses",
+        "spongebob",
         Wallet({"address": "spongebob", "username": "squarepants"}).to_json(),
     )
-    redis.set(
-        "wallets:address:patrick",
+    redis.hset(
+        "wallets:addresses",
+        "patrick",
         Wallet({"address": "patrick", "username": "star"}).to_json(),
     )
 
@@ -164,13 +157,12 @@ def test_build_received_transactions(empty_db, redis):
     manager = WalletManager()
     manager._build_received_transactions()
 
-    keys = redis.keys("*")
-
-    key_1 = b"wallets:address:DB4gFuDztmdGALMb8i1U4Z4R5SktxpNTAY"
-    key_2 = b"wallets:address:DGExsNogZR7JFa2656ZFP9TMWJYJh5djzQ"
+    key_1 = b"DB4gFuDztmdGALMb8i1U4Z4R5SktxpNTAY"
+    key_2 = b"DGExsNogZR7JFa2656ZFP9TMWJYJh5djzQ"
+    keys = redis.hkeys("wallets:addresses")
     assert sorted(keys) == sorted([key_1, key_2])
 
-    wallet_1 = json.loads(redis.get(key_1))
+    wallet_1 = Wallet.from_bytes(redis.hget("wallets:addresses", key_1)).to_dict()
     assert wallet_1 == {
         "address": "DB4gFuDztmdGALMb8i1U4Z4R5SktxpNTAY",
         "public_key": None,
@@ -186,7 +178,7 @@ def test_build_received_transactions(empty_db, redis):
         "forged_rewards": 0,
     }
 
-    wallet_2 = json.loads(redis.get(key_2))
+    wallet_2 = Wallet.from_bytes(redis.hget("wallets:addresses", key_2)).to_dict()
     assert wallet_2 == {
         "address": "DGExsNogZR7JFa2656ZFP9TMWJYJh5djzQ",
         "public_key": None,
@@ -231,12 +223,12 @@ def test_build_block_rewards(empty_db, redis):
     manager = WalletManager()
     manager._build_block_rewards()
 
-    keys = redis.keys("*")
-    key_1 = b"wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
-    key_2 = b"wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
+    key_1 = b"AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
+    key_2 = b"AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
+    keys = redis.hkeys("wallets:addresses")
     assert sorted(keys) == sorted([key_1, key_2])
 
-    wallet_1 = json.loads(redis.get(key_1))
+    wallet_1 = Wallet.from_bytes(redis.hget("wallets:addresses", key_1)).to_dict()
     assert wallet_1 == {
         "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         "public_key": (
@@ -254,7 +246,7 @@ def test_build_block_rewards(empty_db, redis):
         "forged_rewards": 0,
     }
 
-    wallet_2 = json.loads(redis.get(key_2))
+    wallet_2 = Wallet.from_bytes(redis.hget("wallets:addresses", key_2)).to_dict()
     assert wallet_2 == {
         "address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         "public_key": (
@@ -273,6 +265,39 @@ def test_build_block_rewards(empty_db, redis):
     }
 
 
+def test_save_public_keys_stores_addresses(empty_db, redis):
+    BlockFactory(
+        generator_public_key=(
+            "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
+        ),
+    )
+    BlockFactory(
+        generator_public_key=(
+            "03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"
+        ),
+    )
+
+    manager = WalletManager()
+    manager._save_public_keys()
+
+    public_keys = redis.hgetall("wallets:public_keys")
+    assert public_keys[
+        b"020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
+    ] == (b"AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+    assert public_keys[
+        b"03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"
+    ] == (b"AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+
+
+def test_init_loads_stored_addresses_into_address_cache(redis):
+    redis.hset("wallets:public_keys", "spongebob", "squarepants")
+
+    WalletManager()
+
+    # "spongebob" is not a valid public key, so the address must come from cache
+    assert address_from_public_key("spongebob") == "squarepants"
+
+
 def test_build_sent_transactions(empty_db, redis):
     block = BlockFactory()
 
@@ -316,15 +341,14 @@ def test_build_sent_transactions(empty_db, redis):
     manager = WalletManager()
     manager._build_sent_transactions()
 
-    keys = redis.keys("*")
-
-    key_1 = b"wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
-    key_2 = b"wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
+    key_1 = b"AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
+    key_2 = b"AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
+    keys = redis.hkeys("wallets:addresses")
     assert sorted(keys) == sorted([key_1, key_2])
 
     # TODO: They need to have a negative wallet balance as they've spent this money
     # and in the build code we substract this from their total balance.
-    wallet_1 = json.loads(redis.get(key_1))
+    wallet_1 = Wallet.from_bytes(redis.hget("wallets:addresses", key_1)).to_dict()
     assert wallet_1 == {
         "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         "public_key": (
@@ -342,7 +366,7 @@ def test_build_sent_transactions(empty_db, redis):
         "forged_rewards": 0,
     }
 
-    wallet_2 = json.loads(redis.get(key_2))
+    wallet_2 = Wallet.from_bytes(redis.hget("wallets:addresses", key_2)).to_dict()
     assert wallet_2 == {
         "address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         "public_key": (
@@ -391,7 +415,9 @@ def test_build_second_signatures(empty_db, redis):
     manager = WalletManager()
     manager._build_second_signatures()
 
-    data = json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+    data = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
 
     assert data["address"] == "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
     assert (
@@ -420,8 +446,9 @@ def test_build_votes(empty_db, redis):
             "03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"
         ),
     )
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         Wallet(
             {
                 "address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
@@ -477,8 +504,9 @@ def test_build_votes(empty_db, redis):
         timestamp=1234,
         sequence=0,
     )
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         Wallet(
             {
                 "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
@@ -502,8 +530,9 @@ def test_build_votes(empty_db, redis):
             "022eedf9f1cdae0cfaae635fe415b6a8f1912bc89bc3880ec41135d62cbbebd3d3"
         ),
     )
-    redis.set(
-        "wallets:address:AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7",
+    redis.hset(
+        "wallets:addresses",
+        "AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7",
         Wallet(
             {
                 "address": "AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7",
@@ -527,7 +556,9 @@ def test_build_votes(empty_db, redis):
 
     manager._build_votes()
 
-    data_1 = json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+    data_1 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert data_1["address"] == "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
     assert (
         data_1["vote"]
@@ -536,7 +567,9 @@ def test_build_votes(empty_db, redis):
     assert data_1["vote_balance"] == 1005
     assert data_1["balance"] == 4
 
-    data_2 = json.loads(redis.get("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"))
+    data_2 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+    ).to_dict()
     assert data_2["address"] == "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"
     assert (
         data_2["vote"]
@@ -544,7 +577,9 @@ def test_build_votes(empty_db, redis):
     )
     assert data_2["balance"] == 1000
 
-    data_3 = json.loads(redis.get("wallets:address:AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7"))
+    data_3 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7")
+    ).to_dict()
     assert data_3["address"] == "AcHFimRcEinGcJ1gBD3QAXKcFe8ZwNBkN7"
     assert data_3["vote"] is None
     assert data_3["balance"] == 1337
@@ -589,7 +624,9 @@ def test_build_delegate(empty_db, redis):
 
     manager._build_delegates()
 
-    data = json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+    data = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert data["address"] == "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
     assert data["username"] == "spongebob"
     assert data["forged_fees"] == 343
@@ -629,7 +666,9 @@ def test_build_multi_signatures(empty_db, redis):
 
     manager._build_multi_signatures()
 
-    data = json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+    data = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert data["address"] == "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
     assert (
         data["public_key"]
@@ -648,7 +687,7 @@ def test_exists_returns_true_if_exists(redis):
     manager = WalletManager()
     public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
 
-    redis.set("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "")
+    redis.hset("wallets:addresses", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "")
     assert manager.exists(public_key) is True
 
 
@@ -661,7 +700,7 @@ def test_delegate_exists_returns_false_if_does_not_exist(redis):
 def test_delegate_exists_returns_true_if_exists(redis):
     manager = WalletManager()
 
-    redis.set("wallets:username:test", "")
+    redis.hset("wallets:usernames", "test", "")
     assert manager.delegate_exists("test") is True
 
 
@@ -669,7 +708,11 @@ def test_is_delegate_returns_false_if_not_a_delegate(redis):
     public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
     manager = WalletManager()
 
-    redis.set("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", json.dumps({}))
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+        json.dumps({"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"}),
+    )
     assert manager.is_delegate(public_key) is False
 
 
@@ -677,11 +720,14 @@ def test_is_delegate_returns_true_if_is_delegate(redis):
     public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
     manager = WalletManager()
 
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
-        json.dumps({"username": "test"}),
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+        json.dumps(
+            {"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "username": "test"}
+        ),
     )
-    redis.set("wallets:username:test", "")
+    redis.hset("wallets:usernames", "test", "")
     assert manager.is_delegate(public_key) is True
 
 
@@ -696,8 +742,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_plus(redis):
         "votes": ["+03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"]
     }
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {"address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW", "vote_balance": 10000000}
         ),
@@ -709,9 +756,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_plus(redis):
 
     manager._update_vote_balances(sender, None, transaction)
 
-    delegate = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate["vote_balance"] == 11337000
 
 
@@ -726,8 +773,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_plus_revert(re
         "votes": ["+03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"]
     }
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {"address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW", "vote_balance": 10000000}
         ),
@@ -739,9 +787,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_plus_revert(re
 
     manager._update_vote_balances(sender, None, transaction, revert=True)
 
-    delegate = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate["vote_balance"] == 8673000
 
 
@@ -756,8 +804,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_minus(redis):
         "votes": ["-03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"]
     }
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {"address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW", "vote_balance": 10000000}
         ),
@@ -769,9 +818,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_minus(redis):
 
     manager._update_vote_balances(sender, None, transaction)
 
-    delegate = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate["vote_balance"] == 8653000
 
 
@@ -786,8 +835,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_minus_revert(r
         "votes": ["-03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"]
     }
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {"address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW", "vote_balance": 10000000}
         ),
@@ -799,9 +849,9 @@ def test_update_vote_balances_correctly_for_transaction_type_vote_minus_revert(r
 
     manager._update_vote_balances(sender, None, transaction, revert=True)
 
-    delegate = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate["vote_balance"] == 11337000
 
 
@@ -813,8 +863,9 @@ def test_update_vote_balances_correctly_for_transaction(redis):
     transaction.amount = 430000
     transaction.type = TRANSACTION_TYPE_TRANSFER
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {
                 "address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
@@ -825,8 +876,9 @@ def test_update_vote_balances_correctly_for_transaction(redis):
             }
         ),
     )
-    redis.set(
-        "wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
+    redis.hset(
+        "wallets:addresses",
+        "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
         json.dumps(
             {
                 "address": "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
@@ -866,14 +918,14 @@ def test_update_vote_balances_correctly_for_transaction(redis):
 
     manager._update_vote_balances(sender, recipient, transaction)
 
-    delegate1 = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate1 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate1["vote_balance"] == 9560000
 
-    delegate2 = json.loads(
-        redis.get("wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
-    )
+    delegate2 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
+    ).to_dict()
     assert delegate2["vote_balance"] == 2430000
 
 
@@ -885,8 +937,9 @@ def test_update_vote_balances_correctly_for_transaction_revert(redis):
     transaction.amount = 430000
     transaction.type = TRANSACTION_TYPE_TRANSFER
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {
                 "address": "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
@@ -897,8 +950,9 @@ def test_update_vote_balances_correctly_for_transaction_revert(redis):
             }
         ),
     )
-    redis.set(
-        "wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
+    redis.hset(
+        "wallets:addresses",
+        "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
         json.dumps(
             {
                 "address": "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
@@ -938,14 +992,14 @@ def test_update_vote_balances_correctly_for_transaction_revert(redis):
 
     manager._update_vote_balances(sender, recipient, transaction, revert=True)
 
-    delegate1 = json.loads(
-        redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
-    )
+    delegate1 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    ).to_dict()
     assert delegate1["vote_balance"] == 10440000
 
-    delegate2 = json.loads(
-        redis.get("wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
-    )
+    delegate2 = Wallet.from_bytes(
+        redis.hget("wallets:addresses", "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
+    ).to_dict()
     assert delegate2["vote_balance"] == 1570000
 
 
@@ -963,7 +1017,7 @@ def test_apply_transaction_raises_if_delegate_already_exists_for_delegate_reg(re
 
     manager = WalletManager()
 
-    redis.set("wallets:username:harambe", "")
+    redis.hset("wallets:usernames", "harambe", "")
 
     with pytest.raises(Exception) as excinfo:
         manager.apply_transaction(transaction, block)
@@ -1011,8 +1065,9 @@ def test_apply_transaction_transfer(redis, mocker):
     )
     transaction.recipient_id = "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
 
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         Wallet(
             {
                 "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
@@ -1028,13 +1083,17 @@ def test_apply_transaction_transfer(redis, mocker):
 
     # updated sender wallet is saved back to redis
     sender = Wallet(
-        json.loads(redis.get("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+        ).to_dict()
     )
     assert sender.balance == 560000
 
     # updated recipient wallet is saved back to redis
     recipient = Wallet(
-        json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+        ).to_dict()
     )
     assert recipient.balance == 430000
 
@@ -1055,8 +1114,9 @@ def test_apply_transaction_raises_if_cant_be_applied_to_sender_wallet(redis, moc
     )
     transaction.recipient_id = "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
 
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         Wallet(
             {
                 "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
@@ -1098,8 +1158,9 @@ def test_apply_transaction_force_apply_skips_can_be_applied_check(redis, mocker)
     )
     transaction.recipient_id = "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"
 
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         Wallet(
             {
                 "address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
@@ -1115,13 +1176,17 @@ def test_apply_transaction_force_apply_skips_can_be_applied_check(redis, mocker)
 
     # updated sender wallet is saved back to redis
     sender = Wallet(
-        json.loads(redis.get("wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+        ).to_dict()
     )
     assert sender.balance == -440000
 
     # updated recipient wallet is saved back to redis
     recipient = Wallet(
-        json.loads(redis.get("wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+        ).to_dict()
     )
     assert recipient.balance == 430000
 
@@ -1145,8 +1210,9 @@ def test_apply_block(redis, mocker):
         "0316510c1409d3307d9f205cac58f1a871499c3ffea3878ddbbb48c821cfbc079a"
     )
 
-    redis.set(
-        "wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
+    redis.hset(
+        "wallets:addresses",
+        "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
         Wallet(
             {
                 "address": "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
@@ -1162,7 +1228,9 @@ def test_apply_block(redis, mocker):
 
     assert apply_transaction_mock.call_count == 2
     delegate = Wallet(
-        json.loads(redis.get("wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe")
+        ).to_dict()
     )
     assert delegate.balance == 2
 
@@ -1184,8 +1252,9 @@ def test_apply_block_updates_vote_balance_of_voted_delegate(redis, mocker):
         "0316510c1409d3307d9f205cac58f1a871499c3ffea3878ddbbb48c821cfbc079a"
     )
 
-    redis.set(
-        "wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
+    redis.hset(
+        "wallets:addresses",
+        "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
         json.dumps(
             {
                 "address": "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
@@ -1197,8 +1266,9 @@ def test_apply_block_updates_vote_balance_of_voted_delegate(redis, mocker):
         ),
     )
 
-    redis.set(
-        "wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
+    redis.hset(
+        "wallets:addresses",
+        "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
         Wallet(
             {
                 "address": "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
@@ -1217,12 +1287,16 @@ def test_apply_block_updates_vote_balance_of_voted_delegate(redis, mocker):
 
     assert apply_transaction_mock.call_count == 2
     delegate = Wallet(
-        json.loads(redis.get("wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe")
+        ).to_dict()
     )
     assert delegate.balance == 2
 
     vote_wallet = Wallet(
-        json.loads(redis.get("wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
+        ).to_dict()
     )
     assert vote_wallet.vote_balance == 2000002
 
@@ -1270,21 +1344,24 @@ def test_apply_block_correctly_handles_genesis_block(redis, mocker):
 
     assert apply_transaction_mock.call_count == 2
     delegate = Wallet(
-        json.loads(redis.get("wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe"))
+        Wallet.from_bytes(
+            redis.hget("wallets:addresses", "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe")
+        ).to_dict()
     )
     assert delegate.balance == 2
 
 
 def test_load_active_delegate_wallets(redis, mocker):
     mocker.patch(
-        "chain.plugins.database.wallet_manager.config.get_milestone",
-        return_value={"activeDelegates": 3},
+        "chain.plugins.database.wallet_manager.config.get_active_delegates",
+        return_value=3,
     )
 
     manager = WalletManager()
 
-    redis.set(
-        "wallets:address:AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
+    redis.hset(
+        "wallets:addresses",
+        "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW",
         json.dumps(
             {
                 "public_key": (
@@ -1294,10 +1371,11 @@ def test_load_active_delegate_wallets(redis, mocker):
             }
         ),
     )
-    redis.set("wallets:username:harambe", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
+    redis.hset("wallets:usernames", "harambe", "AZYnpgXS3x43nxqhT4q29sZScRwZeNKLpW")
 
-    redis.set(
-        "wallets:address:AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
+    redis.hset(
+        "wallets:addresses",
+        "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM",
         json.dumps(
             {
                 "public_key": (
@@ -1307,10 +1385,11 @@ def test_load_active_delegate_wallets(redis, mocker):
             }
         ),
     )
-    redis.set("wallets:username:spongebob", "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
+    redis.hset("wallets:usernames", "spongebob", "AWoysqF1xm1LXYLQvmRDpfVNKzzaLVwPVM")
 
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
+    redis.hset(
+        "wallets:addresses",
+        "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
         json.dumps(
             {
                 "public_key": (
@@ -1320,10 +1399,11 @@ def test_load_active_delegate_wallets(redis, mocker):
             }
         ),
     )
-    redis.set("wallets:username:patrick", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+    redis.hset("wallets:usernames", "patrick", "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
 
-    redis.set(
-        "wallets:address:ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
+    redis.hset(
+        "wallets:addresses",
+        "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe",
         json.dumps(
             {
                 "public_key": (
@@ -1333,7 +1413,7 @@ def test_load_active_delegate_wallets(redis, mocker):
             }
         ),
     )
-    redis.set("wallets:username:squidward", "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe")
+    redis.hset("wallets:usernames", "squidward", "ASt5oBHKDW8AeJe2Ybc1RucMLS7mRCiuRe")
 
     wallets = manager.load_active_delegate_wallets(10)
 
@@ -1363,3 +1443,179 @@ def test_load_active_delegate_wallets_raises_for_not_enough_delegates():
         manager.load_active_delegate_wallets(103)
 
     assert str(excinfo.value) == "Expected to find 51 delegates but only found 0."
+
+
+def test_batch_writes_wallets_to_redis_on_commit(redis):
+    manager = WalletManager()
+    manager.begin_batch()
+    manager.save_wallet(Wallet({"address": "spongebob", "username": "squarepants"}))
+    manager.save_username("squarepants", "spongebob")
+
+    assert redis.keys("*") == []
+    assert manager.find_by_address("spongebob").username == "squarepants"
+    assert manager.delegate_exists("squarepants")
+
+    manager.commit_batch()
+    assert sorted(redis.keys("*")) == [b"wallets:addresses", b"wallets:usernames"]
+    assert redis.hget("wallets:usernames", "squarepants") == b"spongebob"
+
+
+def test_discard_batch_drops_changes(redis):
+    manager = WalletManager()
+    manager.save_username("squarepants", "spongebob")
+    manager.begin_batch()
+    manager.save_wallet(Wallet({"address": "spongebob", "username": "squarepants"}))
+    manager.delete_username("squarepants")
+    assert not manager.delegate_exists("squarepants")
+
+    manager.discard_batch()
+    assert redis.keys("*") == [b"wallets:usernames"]
+    assert redis.hkeys("wallets:usernames") == [b"squarepants"]
+    assert manager.delegate_exists("squarepants")
+
+
+def test_publish_replaces_wallets_in_redis_with_new_generation(redis):
+    redis.hset("wallets:addresses", "patrick", Wallet({"address": "patrick"}).to_json())
+    redis.hset("wallets:usernames", "star", "patrick")
+    manager = WalletManager()
+    manager._reset()
+    manager.save_wallet(Wallet({"address": "spongebob", "username": "squarepants"}))
+    manager.save_username("squarepants", "spongebob")
+    manager.flush()
+
+    # Wallets of the new generation are not visible until published
+    assert redis.hkeys("wallets:addresses") == [b"patrick"]
+    assert redis.hkeys("wallets:1:addresses") == [b"spongebob"]
+
+    manager.publish()
+    assert sorted(redis.keys("*")) == [
+        b"wallets:addresses",
+        b"wallets:generation",
+        b"wallets:usernames",
+    ]
+    assert redis.hkeys("wallets:addresses") == [b"spongebob"]
+    assert redis.hgetall("wallets:usernames") == {b"squarepants": b"spongebob"}
+
+
+def test_build_keeps_wallets_in_memory_and_writes_them_to_redis(db, redis):
+    manager = WalletManager()
+    manager.build()
+    num_keys = redis.hlen("wallets:addresses")
+    assert num_keys > 0
+    assert len(manager._wallets) == num_keys
+
+    # Changes are only written to redis on flush
+    manager.save_wallet(Wallet({"address": "spongebob", "balance": 5}))
+    manager.save_username("squarepants", "spongebob")
+    assert redis.hget("wallets:addresses", "spongebob") is None
+    assert manager.find_by_address("spongebob").balance == 5
+    assert manager.delegate_exists("squarepants")
+
+    manager.flush()
+    assert (
+        Wallet.from_bytes(redis.hget("wallets:addresses", "spongebob")).to_dict()[
+            "balance"
+        ]
+        == 5
+    )
+    assert redis.hget("wallets:usernames", "squarepants") == b"spongebob"
+
+    manager.delete_username("squarepants")
+    manager.flush()
+    assert redis.hget("wallets:usernames", "squarepants") is None
+    assert not manager.delegate_exists("squarepants")
+
+
+def test_find_by_address_returns_copy_of_built_wallet(db, redis):
+    manager = WalletManager()
+    manager.build()
+    manager.save_wallet(Wallet({"address": "spongebob", "balance": 5}))
+
+    wallet = manager.find_by_address("spongebob")
+    wallet.balance = 10
+    assert manager.find_by_address("spongebob").balance == 5
+
+
+def test_discard_batch_restores_built_wallets(db, redis):
+    manager = WalletManager()
+    manager.build()
+    manager.save_wallet(Wallet({"address": "spongebob", "balance": 5}))
+    manager.flush()
+
+    manager.begin_batch()
+    manager.save_wallet(Wallet({"address": "spongebob", "balance": 10}))
+    manager.save_wallet(Wallet({"address": "patrick", "balance": 1}))
+    manager.save_username("squarepants", "spongebob")
+    manager.flush()
+    assert (
+        Wallet.from_bytes(redis.hget("wallets:addresses", "spongebob")).to_dict()[
+            "balance"
+        ]
+        == 5
+    )
+
+    manager.discard_batch()
+    assert manager.find_by_address("spongebob").balance == 5
+    assert not manager.exists(
+        "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
+    )
+    assert manager._get_wallet_by_address("patrick") is None
+    assert not manager.delegate_exists("squarepants")
+    manager.flush()
+    assert redis.hget("wallets:addresses", "patrick") is None
+
+
+def test_load_active_delegate_wallets_reads_delegate_index(db, redis, mocker):
+    mocker.patch(
+        "chain.plugins.database.wallet_manager.config.get_active_delegates",
+        return_value=3,
+    )
+    manager = WalletManager()
+    manager.build()
+    public_key = "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
+    wallet = manager.find_by_public_key(public_key)
+    wallet.username = "patrick"
+    wallet.vote_balance = int(1e18)
+    manager.save_wallet(wallet)
+    assert manager.is_delegate(public_key)
+
+    wallets = manager.load_active_delegate_wallets(1)
+    expected = sorted(
+        (wallet for wallet in manager._wallets.values() if wallet.username),
+        key=lambda x: (-x.vote_balance, x.public_key),
+    )
+    assert [wallet.address for wallet in wallets] == [
+        wallet.address for wallet in expected[:3]
+    ]
+    assert wallets[0].address == wallet.address
+
+    wallet.vote_balance = 0
+    manager.save_wallet(wallet)
+    wallets = manager.load_active_delegate_wallets(1)
+    assert wallet.address not in [wallet.address for wallet in wallets]
+
+    wallet.username = None
+    manager.save_wallet(wallet)
+    assert not manager.is_delegate(public_key)
+    assert wallet.address not in manager._delegate_keys
+
+
+def test_discard_batch_restores_delegate_index(db, redis):
+    manager = WalletManager()
+    manager.build()
+    delegates = list(manager._delegates)
+    address, wallet = next(
+        (address, wallet)
+        for address, wallet in manager._wallets.items()
+        if wallet.username
+    )
+
+    manager.begin_batch()
+    wallet = manager.find_by_address(address)
+    wallet.vote_balance += 1000
+    manager.save_wallet(wallet)
+    manager.save_wallet(Wallet({"address": "spongebob", "username": "squarepants"}))
+    assert manager._delegates != delegates
+
+    manager.discard_batch()
+    assert manager._delegates == delegates
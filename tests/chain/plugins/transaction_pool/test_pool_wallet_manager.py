@@ -2,131 +2,152 @@ import json
 
 import pytest
 
+from chain.crypto.constants import TRANSACTION_TYPE_VOTE
 from chain.crypto.models.wallet import Wallet
+from chain.crypto.objects.transactions import VoteTransaction
 from chain.plugins.transaction_pool.pool_wallet_manager import PoolWalletManager
 
 
-def test_key_for_address():
-    manager = PoolWalletManager()
-    key = manager.key_for_address("spongebob")
-    assert key == "pool_wallet:address:spongebob"
-
-
-def test_clear_wallets(redis):
-    manager = PoolWalletManager()
-    redis.set("pool_wallet:address:spongebob", "1")
-    redis.set("pool_wallet:address:squarepants", "2")
-    assert len(redis.keys("pool_wallet:address:*")) == 2
-    manager.clear_wallets()
-    assert len(redis.keys("pool_wallet:address:*")) == 0
+SENDER_ADDRESS = "AS2YSSDbbXBAehfbm1KAEvJMJFdPPT2aRT"
+SENDER_PUBLIC_KEY = "034affdee0ef07d4f07fda19fc2be5b80adccc842445a187b2f80f2bb45c72c498"
+DELEGATE_PUBLIC_KEY = (
+    "03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2"
+)
 
 
-def test_save_wallet(redis):
-    manager = PoolWalletManager()
-    wallet = Wallet({"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof"})
-    manager.save_wallet(wallet)
-    data = json.loads(
-        redis.get("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
+def _save_sender(redis, balance=133700000):
+    wallet = Wallet(
+        {"address": SENDER_ADDRESS, "public_key": SENDER_PUBLIC_KEY, "balance": balance}
     )
-    assert data["address"] == wallet.address
+    redis.hset("wallets:addresses", SENDER_ADDRESS, wallet.to_bytes())
+    return wallet
 
 
-def test_find_by_address_copies_wallet_from_blockchain_wallet_manager(redis):
-    manager = PoolWalletManager()
+def _make_vote(transaction_id, vote):
+    transaction = VoteTransaction()
+    transaction.id = transaction_id
+    transaction.type = TRANSACTION_TYPE_VOTE
+    transaction.sender_public_key = SENDER_PUBLIC_KEY
+    transaction.fee = 100000000
+    transaction.amount = 0
+    transaction.asset = {"votes": [vote]}
+    return transaction
 
-    chain_wallet = Wallet(
-        {"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "username": "spongebob"}
-    )
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", chain_wallet.to_json()
-    )
-    wallet = manager.find_by_address("AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
 
-    assert redis.exists("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
-    assert wallet.to_json() == chain_wallet.to_json()
+def test_clear_wallets(redis):
+    manager = PoolWalletManager()
+    redis.hset("pool_wallets:debits", "spongebob", 1)
+    redis.hset("pool_wallets:flags", "spongebob:vote", "null")
+    redis.hset("pool_wallets:transactions", "1337", "{}")
+    manager.clear_wallets()
+    assert redis.keys("*") == []
 
 
-def test_find_by_address_returns_existin_wallet_from_redis(redis):
+def test_find_by_address_returns_blockchain_wallet_without_pool_changes(redis):
     manager = PoolWalletManager()
+    chain_wallet = _save_sender(redis)
 
-    existing_wallet = Wallet(
-        {"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "username": "spongebob"}
-    )
-    redis.set(
-        "pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
-        existing_wallet.to_json(),
-    )
-    wallet = manager.find_by_address("AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
-    assert len(redis.keys("pool_wallet:address:*")) == 1
-    assert wallet.to_json() == existing_wallet.to_json()
+    wallet = manager.find_by_address(SENDER_ADDRESS)
 
+    assert wallet.to_dict() == chain_wallet.to_dict()
+    assert redis.keys("*") == [b"wallets:addresses"]
 
-def test_find_by_public_key_copies_wallet_from_blockchain_wallet_manager(redis):
-    manager = PoolWalletManager()
 
-    chain_wallet = Wallet(
-        {"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "username": "spongebob"}
-    )
-    redis.set(
-        "wallets:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", chain_wallet.to_json()
-    )
-    wallet = manager.find_by_public_key(
-        "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
+def test_find_by_address_merges_pool_changes(redis):
+    manager = PoolWalletManager()
+    _save_sender(redis)
+    redis.hset("pool_wallets:debits", SENDER_ADDRESS, 700000)
+    redis.hset(
+        "pool_wallets:flags",
+        "{}:vote".format(SENDER_ADDRESS),
+        json.dumps(DELEGATE_PUBLIC_KEY),
     )
 
-    assert redis.exists("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof")
-    assert wallet.to_json() == chain_wallet.to_json()
+    wallet = manager.find_by_address(SENDER_ADDRESS)
+
+    assert wallet.balance == 133000000
+    assert wallet.vote == DELEGATE_PUBLIC_KEY
+    assert wallet.username is None
 
 
-def test_find_by_public_key_returns_existin_wallet_from_redis(redis):
+def test_find_by_public_key_merges_pool_changes(redis):
     manager = PoolWalletManager()
+    _save_sender(redis)
+    redis.hset("pool_wallets:debits", SENDER_ADDRESS, 700000)
 
-    existing_wallet = Wallet(
-        {"address": "AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "username": "spongebob"}
-    )
-    redis.set(
-        "pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof",
-        existing_wallet.to_json(),
-    )
-    wallet = manager.find_by_public_key(
-        "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
-    )
-    assert len(redis.keys("pool_wallet:address:*")) == 1
-    assert wallet.to_json() == existing_wallet.to_json()
+    wallet = manager.find_by_public_key(SENDER_PUBLIC_KEY)
+
+    assert wallet.address == SENDER_ADDRESS
+    assert wallet.balance == 133000000
 
 
 @pytest.mark.parametrize(
-    "address,expected",
-    [("AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", True), ("spongebob", False)],
+    "address,expected", [(SENDER_ADDRESS, True), ("spongebob", False)]
 )
 def test_exists_by_address(address, expected, redis):
     manager = PoolWalletManager()
-    redis.set("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "1337")
+    redis.hset("pool_wallets:debits", SENDER_ADDRESS, 1337)
     assert manager.exists_by_address(address) == expected
 
 
 @pytest.mark.parametrize(
-    "public_key,expected",
-    [
-        ("020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325", True),
-        ("03b12f99375c3b0e4f5f5c7ea74e723f0b84a6f169b47d9105ed2a179f30c82df2", False),
-    ],
+    "public_key,expected", [(SENDER_PUBLIC_KEY, True), (DELEGATE_PUBLIC_KEY, False)]
 )
 def test_exists_by_public_key(public_key, expected, redis):
     manager = PoolWalletManager()
-    redis.set("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "1337")
+    redis.hset("pool_wallets:debits", SENDER_ADDRESS, 1337)
 
     assert manager.exists_by_public_key(public_key) == expected
 
 
-def test_delete_by_public_key(redis):
+def test_apply_transaction_stores_debit(redis, crypto_transaction):
     manager = PoolWalletManager()
-    redis.set("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof", "1337")
+    _save_sender(redis)
+
+    manager.apply_transaction(crypto_transaction)
+    manager.apply_transaction(_make_vote("1", "+" + DELEGATE_PUBLIC_KEY))
+
+    wallet = manager.find_by_address(SENDER_ADDRESS)
+    assert wallet.balance == 133700000 - 100342000 - 100000000
+    assert wallet.vote == DELEGATE_PUBLIC_KEY
+    assert redis.hget("pool_wallets:debits", SENDER_ADDRESS) == b"200342000"
+    assert sorted(redis.hkeys("pool_wallets:transactions")) == [
+        b"1",
+        crypto_transaction.id.encode(),
+    ]
+    # Wallets of the blockchain are not changed
+    chain_wallet = Wallet.from_bytes(redis.hget("wallets:addresses", SENDER_ADDRESS))
+    assert chain_wallet.balance == 133700000
+    assert chain_wallet.vote is None
+
+
+def test_apply_transaction_stores_fields_set_to_none(redis):
+    manager = PoolWalletManager()
+    chain_wallet = _save_sender(redis)
+    chain_wallet.vote = DELEGATE_PUBLIC_KEY
+    redis.hset("wallets:addresses", SENDER_ADDRESS, chain_wallet.to_bytes())
 
-    manager.delete_by_public_key(
-        "020f5df4d2bc736d12ce43af5b1663885a893fade7ee5e62b3cc59315a63e6a325"
-    )
-    assert redis.exists("pool_wallet:address:AThM5PNSKdU9pu1ydqQnzRWVeNCGr8HKof") == 0
+    manager.apply_transaction(_make_vote("1", "-" + DELEGATE_PUBLIC_KEY))
+
+    assert manager.find_by_address(SENDER_ADDRESS).vote is None
+
+
+def test_drop_transactions_removes_their_changes(redis, crypto_transaction):
+    manager = PoolWalletManager()
+    _save_sender(redis)
+    manager.apply_transaction(crypto_transaction)
+    manager.apply_transaction(_make_vote("1", "+" + DELEGATE_PUBLIC_KEY))
+
+    manager.drop_transactions(["1", "unknown"])
+    wallet = manager.find_by_address(SENDER_ADDRESS)
+    assert wallet.balance == 133700000 - 100342000
+    assert wallet.vote is None
+    assert manager.exists_by_address(SENDER_ADDRESS)
+
+    manager.drop_transactions([crypto_transaction.id])
+    assert manager.find_by_address(SENDER_ADDRESS).balance == 133700000
+    assert not manager.exists_by_address(SENDER_ADDRESS)
+    assert redis.keys("*") == [b"wallets:addresses"]
 
 
 def test_can_apply_to_sender_returns_true_if_everything_ok(redis, crypto_transaction):
@@ -134,8 +155,10 @@ def test_can_apply_to_sender_returns_true_if_everything_ok(redis, crypto_transac
     chain_wallet = Wallet(
         {"address": "AS2YSSDbbXBAehfbm1KAEvJMJFdPPT2aRT", "balance": 133700000}
     )
-    redis.set(
-        "wallets:address:AS2YSSDbbXBAehfbm1KAEvJMJFdPPT2aRT", chain_wallet.to_json()
+    redis.hset(
+        "wallets:addresses",
+        "AS2YSSDbbXBAehfbm1KAEvJMJFdPPT2aRT",
+        chain_wallet.to_json(),
     )
     crypto_transaction.second_signature = None
     crypto_transaction.sign_signature = None
@@ -155,8 +178,10 @@ def test_can_apply_to_sender_returns_true_if_transaction_is_exception(
     chain_wallet = Wallet(
         {"address": "AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd", "balance": 133700000}
     )
-    redis.set(
-        "wallets:address:AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd", chain_wallet.to_json()
+    redis.hset(
+        "wallets:addresses",
+        "AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd",
+        chain_wallet.to_json(),
     )
 
     can_apply = manager.can_apply_to_sender(crypto_transaction, 2243161)
@@ -172,8 +197,10 @@ def test_can_apply_to_sender_returns_false_if_balance_is_zero(
     chain_wallet = Wallet(
         {"address": "AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd", "balance": 0}
     )
-    redis.set(
-        "wallets:address:AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd", chain_wallet.to_json()
+    redis.hset(
+        "wallets:addresses",
+        "AMm7u2Kpaf3gY2Y96MovudH2q65WHi8Sqd",
+        chain_wallet.to_json(),
     )
 
     can_apply = manager.can_apply_to_sender(crypto_transaction, 2243161)